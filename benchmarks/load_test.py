@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+👥 BELEGMEISTER-LASTTEST - gleichzeitige Sachbearbeiter mit realistischem Nutzungsmix
+
+Ohne --url startet das Skript die App in einem eigenen Datenverzeichnis (threaded Werkzeug-Server
+auf einem freien Port), mit --url wird ein laufender Server (gunicorn/waitress) getestet:
+
+    python benchmarks/synthetic_data.py --size 1k
+    python benchmarks/load_test.py --size 1k --users 20 --duration 60
+    python benchmarks/load_test.py --url http://localhost:5030 --users 50 --duration 120
+
+Achtung: die Szenarien legen Belege an und buchen Erstattungen - nie gegen Produktionsdaten laufen lassen.
+Ausgabe je Szenario: Anfragen, Fehler, Durchsatz und Latenz-Perzentile (p50/p95/p99).
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_data import DATA_DIR, PATIENTS, SIZES, open_app
+
+SCENARIO_WEIGHTS = {
+    # Szenario: Anteil am Nutzungsmix
+    'browse_receipts': 55,
+    'create_receipt': 20,
+    'process_reimbursement': 15,
+    'ocr_preview': 10,
+}
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Weiterleitungen nicht folgen - das Ziel verrät Erfolg oder Fehler des Formulars"""
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class LoadClient:
+    """Minimaler HTTP-Client (urllib) mit eigenem Cookie-Jar je simuliertem Nutzer"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(NoRedirect, urllib.request.HTTPCookieProcessor())
+
+    def request(self, method, path, data=None, headers=None):
+        """→ (Status, Location-Header, Body); HTTP-Fehler sind hier keine Exceptions"""
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers or {})
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                return response.status, response.headers.get('Location', ''), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Location', ''), e.read()
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post_form(self, path, fields, files=None):
+        if not files:
+            body = urllib.parse.urlencode(fields).encode()
+            return self.request('POST', path, body, {'Content-Type': 'application/x-www-form-urlencoded'})
+        boundary = uuid.uuid4().hex
+        body = io.BytesIO()
+        for name, value in fields.items():
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, (filename, content, mimetype) in files.items():
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                       f'Content-Type: {mimetype}\r\n\r\n'.encode())
+            body.write(content + b'\r\n')
+        body.write(f'--{boundary}--\r\n'.encode())
+        return self.request('POST', path, body.getvalue(), {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+
+def sample_png(width=400, height=300):
+    """Graustufen-PNG ohne Pillow (für die OCR-Vorschau reicht ein leerer 'Scan')"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+    raw = b''.join(b'\x00' + b'\xff' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+class Scenarios:
+    """Ein Szenario = eine Nutzeraktion; liefert (Anfrage-Name, Status, ok) je HTTP-Aufruf"""
+
+    def __init__(self, receipts, rng):
+        self.receipts = receipts  # [(receipt_id, amount)] - wächst mit create_receipt
+        self.rng = rng
+        self.png = sample_png()
+
+    def browse_receipts(self, client):
+        status_filter = self.rng.choice(('all', 'all', 'unpaid', 'paid', 'overdue'))
+        status, _, _ = client.get(f'/receipts?status={status_filter}')
+        yield 'GET /receipts', status, status == 200
+        receipt_id, _ = self.rng.choice(self.receipts)
+        status, _, _ = client.get(f'/receipt/{receipt_id}')
+        yield 'GET /receipt/<id>', status, status == 200
+
+    def create_receipt(self, client):
+        fields = {
+            'provider_name': f"Praxis Dr. Last {self.rng.randint(1, 50)}",
+            'provider_type': self.rng.choice(('doctor', 'pharmacy', 'hospital', 'specialist')),
+            'amount': f"{self.rng.uniform(10, 400):.2f}",
+            'receipt_date': (date.today() - timedelta(days=self.rng.randint(0, 60))).isoformat(),
+            'patient_name': self.rng.choice(PATIENTS),
+            'notes': 'Lasttest',
+        }
+        status, location, _ = client.post_form('/receipt/create', fields)
+        # Erfolg → Detailseite des neuen Belegs, Fehler → zurück zum Formular
+        ok = status in (302, 303) and '/receipt/' in location and not location.endswith('/receipt/new')
+        if ok:
+            self.receipts.append((location.rstrip('/').rsplit('/', 1)[-1], float(fields['amount'])))
+        yield 'POST /receipt/create', status, ok
+
+    def process_reimbursement(self, client):
+        receipt_id, amount = self.rng.choice(self.receipts)
+        today = date.today().isoformat()
+        fields = {
+            'debeka_amount': f"{amount * 0.3:.2f}", 'debeka_notice_date': today, 'debeka_notice_number': 'LT-D',
+            'beihilfe_amount': f"{amount * 0.5:.2f}", 'beihilfe_notice_date': today, 'beihilfe_notice_number': 'LT-B',
+        }
+        status, location, _ = client.post_form(f'/reimbursement/process/{receipt_id}', fields)
+        ok = status in (302, 303) and f'/receipt/{receipt_id}' in location
+        yield 'POST /reimbursement/process/<id>', status, ok
+
+    def ocr_preview(self, client):
+        status, _, body = client.post_form('/api/ocr_preview', {}, {'file': ('lasttest.png', self.png, 'image/png')})
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = {}
+        # Ohne OCR-Backend antwortet die Route mit success=False - das zählt als Fehler
+        yield 'POST /api/ocr_preview', status, status == 200 and payload.get('success', False)
+        if payload.get('temp_file_id'):
+            status, _, _ = client.request('DELETE', f"/api/cleanup_temp/{payload['temp_file_id']}")
+            yield 'DELETE /api/cleanup_temp/<id>', status, status == 200
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.statuses = defaultdict(Counter)
+
+    def record(self, name, latency_ms, status, ok):
+        with self.lock:
+            self.latencies[name].append(latency_ms)
+            self.statuses[name][status] += 1
+            if not ok:
+                self.errors[name] += 1
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def user_loop(base_url, scenarios, stats, deadline, think_time, timeout, seed):
+    rng = random.Random(seed)
+    client = LoadClient(base_url, timeout)
+    names, weights = zip(*SCENARIO_WEIGHTS.items())
+    while time.monotonic() < deadline:
+        steps = getattr(scenarios, rng.choices(names, weights=weights)[0])(client)
+        while True:
+            started = time.perf_counter()
+            try:
+                name, status, ok = next(steps)
+            except StopIteration:
+                break
+            except Exception as e:
+                # Verbindungsabbruch/Timeout: als Fehler des Szenarios zählen
+                stats.record(f'{type(e).__name__}', (time.perf_counter() - started) * 1000, 'exception', False)
+                break
+            stats.record(name, (time.perf_counter() - started) * 1000, status, ok)
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+
+
+def start_local_server(work_dir):
+    """App im Datenverzeichnis importieren und auf einem freien Port threaded bedienen"""
+    from werkzeug.serving import make_server
+    os.environ.setdefault('BELEGMEISTER_LOG_LEVELS', 'werkzeug=WARNING')  # kein Zugriffslog pro Anfrage
+    app_module = open_app(work_dir)
+    app_module.initialize_app()
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-server', daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}', server
+
+
+def fetch_receipts(base_url, timeout, limit=500):
+    """Vorhandene Belege über die JSON-API laden (funktioniert lokal und gegen --url)"""
+    status, _, body = LoadClient(base_url, timeout).get(f'/api/v1/receipts?fields=receipt_id,amount&limit={limit}')
+    if status != 200:
+        raise SystemExit(f"❌ /api/v1/receipts antwortet mit HTTP {status}")
+    return [(row['receipt_id'], row['amount']) for row in json.loads(body)['data']]
+
+
+def print_report(stats, elapsed):
+    print(f"\n{'Anfrage':<34} {'Anzahl':>7} {'Fehler':>7} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}  Status")
+    total, total_errors = 0, 0
+    for name in sorted(stats.latencies):
+        values = stats.latencies[name]
+        total += len(values)
+        total_errors += stats.errors[name]
+        codes = ', '.join(f'{code}×{count}' for code, count in stats.statuses[name].most_common())
+        print(f"{name:<34} {len(values):>7} {stats.errors[name]:>7} {len(values) / elapsed:>7.1f} "
+              f"{percentile(values, 50):>7.0f}ms {percentile(values, 95):>7.0f}ms {percentile(values, 99):>7.0f}ms  {codes}")
+    error_rate = total_errors / total if total else 0
+    print(f"\nGesamt: {total} Anfragen in {elapsed:.1f}s = {total / elapsed:.1f} req/s, Fehlerquote {error_rate:.1%}")
+    return error_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BelegMeister-Lasttest')
+    parser.add_argument('--url', help='Laufender Server (ohne: lokaler Server auf den Benchmark-Daten)')
+    parser.add_argument('--size', choices=SIZES, default='1k')
+    parser.add_argument('--dir', help='Datenverzeichnis für den lokalen Server (Standard: benchmarks/data/<size>)')
+    parser.add_argument('--users', type=int, default=10, help='Gleichzeitige Nutzer (Threads)')
+    parser.add_argument('--duration', type=float, default=30, help='Laufzeit in Sekunden')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Sekunden, bis alle Nutzer gestartet sind')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Mittlere Pause zwischen Aktionen (s)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-error-rate', type=float, help='Exit-Code 1, wenn die Fehlerquote darüber liegt (z.B. 0.01)')
+    args = parser.parse_args()
+
+    if args.url:
+        base_url = args.url
+    else:
+        work_dir = os.path.abspath(args.dir or os.path.join(DATA_DIR, args.size))
+        if not os.path.exists(os.path.join(work_dir, 'medical_receipts.db')):
+            raise SystemExit(f"❌ Keine Daten in {work_dir} - zuerst: python benchmarks/synthetic_data.py --size {args.size}")
+        base_url, _ = start_local_server(work_dir)
+    print(f"👥 {args.users} Nutzer, {args.duration:.0f}s gegen {base_url}")
+
+    receipts = fetch_receipts(base_url, args.timeout)
+    if not receipts:
+        raise SystemExit('❌ Keine Belege vorhanden - zuerst Testdaten erzeugen')
+    scenarios = Scenarios(receipts, random.Random(args.seed))
+    stats = Stats()
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = []
+    for index in range(args.users):
+        thread = threading.Thread(target=user_loop, name=f'user-{index}', daemon=True,
+                                  args=(base_url, scenarios, stats, deadline, args.think_time, args.timeout,
+                                        args.seed + index))
+        thread.start()
+        threads.append(thread)
+        if args.ramp_up and args.users > 1:
+            time.sleep(min(args.ramp_up / args.users, max(deadline - time.monotonic(), 0)))
+    for thread in threads:
+        thread.join(timeout=args.duration + args.timeout)
+
+    error_rate = print_report(stats, time.monotonic() - started)
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+🎯 OCR-GOLDKORPUS - Genauigkeit und Geschwindigkeit je Backend/Konfiguration
+
+Jedes Dokument im Manifest (benchmarks/ocr_corpus/manifest.json) hat Soll-Werte für Anbieter,
+Anbietertyp, Betrag und Datum. Der Lauf misst je Konfiguration die Zeit pro Dokument, den Durchsatz
+und die Trefferquote je Feld:
+
+    python benchmarks/ocr_benchmark.py                              # alle Konfigurationen
+    python benchmarks/ocr_benchmark.py --configs default,fast_200dpi --verbose
+    python benchmarks/ocr_benchmark.py --backends tesseract,aws_textract
+    python benchmarks/ocr_benchmark.py --corpus /pfad/zu/manifest.json --output ergebnis.json
+
+.txt-Dokumente enthalten bereits erkannten Text und laufen einmal als Zeile "analyze_german_text";
+nur die Scans (.pdf/.png/.jpg, synthetische mit render_ocr_scans.py) laufen je Tesseract-Konfiguration
+bzw. Backend komplett durch die OCR und brauchen pytesseract/pdf2image.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_data import open_app
+
+CORPUS_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_corpus', 'manifest.json')
+FIELDS = ('provider_name', 'provider_type', 'amount', 'date')
+
+# Konfiguration → Überschreibungen von OCR_TESSERACT_SETTINGS
+TESSERACT_CONFIGS = {
+    'default': {},
+    'fast_200dpi': {'dpi': 200},
+    'fine_400dpi': {'dpi': 400},
+    'psm4_columns': {'psm': 4},
+    'psm11_sparse': {'psm': 11},
+    'no_preprocessing': {'contrast': 1.0, 'sharpness': 1.0},
+}
+
+
+def load_corpus(manifest_path):
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    documents = []
+    for document in manifest['documents']:
+        path = os.path.join(base_dir, document['file'])
+        if not os.path.exists(path):
+            raise SystemExit(f"❌ Korpus-Datei fehlt: {path}")
+        documents.append({**document, 'path': path})
+    return documents
+
+
+def is_text(document):
+    return document['path'].lower().endswith('.txt')
+
+
+def field_matches(app, field, expected, actual):
+    """Anbieter nur bis auf Groß-/Kleinschreibung und Leerraum gleich - ein fehlendes Wort, Titel oder
+    Umlaut zählt als Fehler (der Abgleichschlüssel der App würde z.B. "Praxis" und "Dr." verschlucken)"""
+    if field == 'provider_name':
+        return app.provider_exact_name(expected) == app.provider_exact_name(actual)
+    if field == 'amount':
+        try:
+            return abs(float(expected) - float(actual)) < 0.005
+        except (TypeError, ValueError):
+            return False
+    return (expected or '') == (actual or '')
+
+
+def analyze_text_file(app, path):
+    with open(path, encoding='utf-8') as f:
+        return app.analyze_german_text(f.read(), confidence_bonus=0.1)
+
+
+def extractors(app, configs, backends):
+    """Name → extract(path) für Scans, je Tesseract-Konfiguration und zusätzlichem Backend"""
+    runs = {}
+    for name in configs:
+        runs[f'tesseract:{name}'] = (lambda path, settings=TESSERACT_CONFIGS[name]:
+                                     app.extract_with_tesseract(path, settings=settings))
+    for name in backends:
+        runs[f'backend:{name}'] = app.OCR_BACKENDS[name]['extract']
+    return runs
+
+
+def run_benchmark(app, documents, extract, verbose=False):
+    timings, hits, misses = [], {field: 0 for field in FIELDS}, []
+    fully_correct = 0
+    for document in documents:
+        started = time.perf_counter()
+        try:
+            result = extract(document['path']) or {}
+        except Exception as e:
+            result = {'errors': [str(e)]}
+        timings.append((time.perf_counter() - started) * 1000)
+
+        wrong = {}
+        for field in FIELDS:
+            if field_matches(app, field, document.get(field), result.get(field)):
+                hits[field] += 1
+            else:
+                wrong[field] = (document.get(field), result.get(field))
+        if wrong:
+            misses.append({'file': document['file'], 'wrong': wrong})
+            if verbose:
+                for field, (expected, actual) in wrong.items():
+                    print(f"    ✗ {document['file']}: {field} soll {expected!r}, ist {actual!r}")
+        else:
+            fully_correct += 1
+
+    count = len(documents)
+    ordered = sorted(timings)
+    return {
+        'documents': count,
+        'mean_ms': round(statistics.mean(timings), 2),
+        'p95_ms': round(ordered[min(count - 1, int(0.95 * count))], 2),
+        'docs_per_second': round(count / (sum(timings) / 1000), 2) if sum(timings) else None,
+        'accuracy': {field: round(hits[field] / count, 3) for field in FIELDS},
+        'all_fields': round(fully_correct / count, 3),
+        'misses': misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OCR-Goldkorpus-Benchmark')
+    parser.add_argument('--corpus', default=CORPUS_MANIFEST, help='Manifest mit Soll-Werten')
+    parser.add_argument('--configs', default=','.join(TESSERACT_CONFIGS),
+                        help=f"Tesseract-Konfigurationen ({', '.join(TESSERACT_CONFIGS)})")
+    parser.add_argument('--backends', default='', help='Zusätzlich registrierte Backends, z.B. aws_textract')
+    parser.add_argument('--output', help='Ergebnisse als JSON speichern')
+    parser.add_argument('--verbose', action='store_true', help='Falsch erkannte Felder je Dokument ausgeben')
+    args = parser.parse_args()
+
+    configs = [name for name in args.configs.split(',') if name]
+    unknown = [name for name in configs if name not in TESSERACT_CONFIGS]
+    if unknown:
+        raise SystemExit(f"❌ Unbekannte Konfiguration: {', '.join(unknown)}")
+
+    documents = load_corpus(os.path.abspath(args.corpus))
+    app = open_app(tempfile.mkdtemp(prefix='belegmeister-ocr-bench-'))
+    backends = [name for name in args.backends.split(',') if name]
+    missing = [name for name in backends if name not in app.OCR_BACKENDS]
+    if missing:
+        raise SystemExit(f"❌ Unbekanntes Backend: {', '.join(missing)} (registriert: {', '.join(app.OCR_BACKENDS)})")
+    texts = [document for document in documents if is_text(document)]
+    scans = [document for document in documents if not is_text(document)]
+    if not scans:
+        print("⚠️ Keine Scans im Korpus - Tesseract-Konfigurationen werden nicht gemessen (render_ocr_scans.py)")
+    elif app.OCR_BACKENDS['tesseract']['state'] == 'missing':
+        print(f"⚠️ Tesseract nicht installiert - {len(scans)} Scans werden als Fehler gezählt")
+
+    runs = [('analyze_german_text', texts, lambda path: analyze_text_file(app, path))] if texts else []
+    if scans:
+        runs += [(name, scans, extract) for name, extract in extractors(app, configs, backends).items()]
+
+    results = {}
+    print(f"{'Konfiguration':<30} {'Dok':>4} {'Ø ms':>8} {'p95 ms':>8} {'Dok/s':>7}  "
+          + '  '.join(f'{field:>13}' for field in FIELDS) + f"  {'alle':>6}")
+    for name, run_documents, extract in runs:
+        result = run_benchmark(app, run_documents, extract, verbose=args.verbose)
+        results[name] = result
+        print(f"{name:<30} {result['documents']:>4} {result['mean_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+              f"{result['docs_per_second'] or 0:>7.1f}  "
+              + '  '.join(f"{result['accuracy'][field]:>13.0%}" for field in FIELDS) + f"  {result['all_fields']:>6.0%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'corpus': os.path.abspath(args.corpus), 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Ergebnisse gespeichert: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+🖨️ SYNTHETISCHE SCANS für den OCR-Goldkorpus
+
+Rendert einige .txt-Belege aus benchmarks/ocr_corpus mit Pillow als Graustufen-Scan (300 dpi,
+leicht schief, etwas unscharf) - als PNG und als Bild-PDF ohne Textebene. Erst damit messen die
+Tesseract-Konfigurationen in ocr_benchmark.py etwas: DPI wirkt nur beim Rendern von PDFs,
+Kontrast/Schärfe nur bei Bildern. Die Soll-Werte stehen im Manifest (gleiche wie beim .txt-Beleg).
+
+    python benchmarks/render_ocr_scans.py
+    python benchmarks/render_ocr_scans.py --font /usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf
+"""
+
+import argparse
+import os
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_corpus')
+DPI = 300
+PAGE_WIDTH = 1748   # A5 bei 300 dpi
+MARGIN = 120
+FONT_SIZE = 34      # ≈ 8 pt, wie auf Kassenbons/Rechnungen
+
+# Quelle → Scan (Endung bestimmt das Format)
+SCANS = {
+    'praxis_schneider.txt': 'scan_praxis_schneider.png',
+    'loewen_apotheke.txt': 'scan_loewen_apotheke.png',
+    'klinikum_mannheim.txt': 'scan_klinikum_mannheim.pdf',
+    'zahnarzt_koch.txt': 'scan_zahnarzt_koch.pdf',
+}
+SKEW_DEGREES = {'scan_loewen_apotheke.png': -0.8, 'scan_zahnarzt_koch.pdf': 0.6}
+
+# Monospace-Schriften mit Umlauten und €; Pillows eingebaute Schrift kann beides nicht
+FONT_CANDIDATES = ('DejaVuSansMono.ttf', 'LiberationMono-Regular.ttf', 'SourceCodePro-Regular.ttf',
+                   'Consolas.ttf', 'cour.ttf')
+
+
+def load_font(path=None):
+    for candidate in ([path] if path else FONT_CANDIDATES):
+        try:
+            return ImageFont.truetype(candidate, FONT_SIZE)
+        except OSError:
+            continue
+    raise SystemExit(f"❌ Keine Schrift gefunden ({path or ', '.join(FONT_CANDIDATES)}) - bitte --font angeben")
+
+
+def render(text, font, skew=0.0):
+    """Text als Graustufen-Seite: Papier nicht ganz weiß, Druck nicht ganz schwarz, leicht unscharf"""
+    lines = text.rstrip('\n').split('\n')
+    line_height = int(FONT_SIZE * 1.45)
+    page = Image.new('L', (PAGE_WIDTH, 2 * MARGIN + line_height * len(lines)), 243)
+    draw = ImageDraw.Draw(page)
+    for number, line in enumerate(lines):
+        draw.text((MARGIN, MARGIN + number * line_height), line, font=font, fill=35)
+    if skew:
+        page = page.rotate(skew, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=243)
+    return page.filter(ImageFilter.GaussianBlur(0.7))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetische Scans für den OCR-Goldkorpus rendern')
+    parser.add_argument('--font', help='TrueType-Schrift (Standard: erste gefundene Monospace-Schrift)')
+    args = parser.parse_args()
+
+    font = load_font(args.font)
+    for source, target in SCANS.items():
+        with open(os.path.join(CORPUS_DIR, source), encoding='utf-8') as f:
+            page = render(f.read(), font, SKEW_DEGREES.get(target, 0.0))
+        path = os.path.join(CORPUS_DIR, target)
+        if target.endswith('.pdf'):
+            page.save(path, 'PDF', resolution=DPI)
+        else:
+            page.save(path, 'PNG', dpi=(DPI, DPI), optimize=True)
+        print(f"🖨️ {target}: {page.width}×{page.height} px, {os.path.getsize(path) / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+⏱️ BELEGMEISTER-BENCHMARKS - Routen und OCR-Textanalyse gegen eine synthetische Datenbank
+
+    python benchmarks/synthetic_data.py --size 100k
+    python benchmarks/run_benchmarks.py --size 100k --save-baseline
+    python benchmarks/run_benchmarks.py --size 100k            # Vergleich mit der Baseline, Exit-Code 1 bei Regression
+
+Gemessen wird der Median mehrerer Durchläufe (nach einem Aufwärm-Durchlauf). Baselines liegen
+je Größe in benchmarks/baselines/<size>.json und sind rechnerabhängig - auf derselben Maschine vergleichen.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic_data import DATA_DIR, SIZES, open_app
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+SAMPLE_TEXT = """
+PRAXIS DR. MED. ANNA SCHNEIDER
+Fachärztin für Allgemeinmedizin
+Hauptstraße 12, 10115 Berlin
+Rechnung Nr. 2024-0815 vom 14.03.2024
+Behandlung: Untersuchung, Beratung, Diagnose
+GOÄ 1, 5, 250 ...................... 45,90 EUR
+Rechnungsbetrag: 87,43 EUR
+Bitte überweisen Sie den Betrag innerhalb von 30 Tagen.
+"""
+
+
+def route_benchmarks(client, receipt_id):
+    """Name → Aufruf; jede Route muss 200 liefern"""
+    routes = {
+        'dashboard': '/',
+        'receipts_list': '/receipts',
+        'receipts_list_status': '/receipts?status=unpaid',
+        'receipts_list_search': '/receipts?search=Müller',
+        'receipts_list_sort_amount': '/receipts?sort=amount&order=asc',
+        'payments_overview': '/payments',
+        'reminders_overview': '/reminders',
+        'receipt_detail': f'/receipt/{receipt_id}',
+        'api_v1_receipts': '/api/v1/receipts?limit=100',
+    }
+
+    def call(path):
+        def run():
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} → HTTP {response.status_code}")
+        return run
+
+    return {name: call(path) for name, path in routes.items()}
+
+
+def function_benchmarks(app, ocr_file=None):
+    benchmarks = {
+        'analyze_german_text': lambda: app.analyze_german_text(SAMPLE_TEXT),
+        'compute_summary_stats': app.compute_summary_stats,
+        'fetch_reminder_overview': app.fetch_reminder_overview,
+    }
+    if ocr_file:
+        benchmarks['extract_ocr_data'] = lambda: app.extract_ocr_data(ocr_file)
+    return benchmarks
+
+
+def measure(func, repeat):
+    func()  # Aufwärmen (Caches, Imports)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': round(statistics.median(timings), 3), 'min_ms': round(min(timings), 3),
+            'max_ms': round(max(timings), 3)}
+
+
+def compare(results, baseline, tolerance):
+    """Regressionen: Median über Baseline × (1 + tolerance)"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name, {}).get('median_ms')
+        if reference and result['median_ms'] > reference * (1 + tolerance):
+            regressions.append((name, reference, result['median_ms']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BelegMeister-Benchmarks')
+    parser.add_argument('--size', choices=SIZES, default='1k')
+    parser.add_argument('--dir', help='Datenverzeichnis (Standard: benchmarks/data/<size>)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='Kommagetrennte Benchmark-Namen (z.B. dashboard,receipt_detail)')
+    parser.add_argument('--ocr-file', help='Beleg-Scan für extract_ocr_data (benötigt ein OCR-Backend)')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Erlaubte Verschlechterung (0.25 = +25%%)')
+    args = parser.parse_args()
+
+    work_dir = os.path.abspath(args.dir or os.path.join(DATA_DIR, args.size))
+    if not os.path.exists(os.path.join(work_dir, 'medical_receipts.db')):
+        raise SystemExit(f"❌ Keine Daten in {work_dir} - zuerst: python benchmarks/synthetic_data.py --size {args.size}")
+    ocr_file = os.path.abspath(args.ocr_file) if args.ocr_file else None
+    app = open_app(work_dir)
+    client = app.app.test_client()
+
+    conn = app.get_db_connection()
+    receipt_id = conn.execute('SELECT receipt_id FROM medical_receipts ORDER BY id LIMIT 1').fetchone()[0]
+    conn.close()
+
+    benchmarks = {**route_benchmarks(client, receipt_id), **function_benchmarks(app, ocr_file)}
+    if args.only:
+        selected = set(args.only.split(','))
+        benchmarks = {name: func for name, func in benchmarks.items() if name in selected}
+
+    results = {}
+    for name, func in benchmarks.items():
+        results[name] = measure(func, args.repeat)
+        print(f"{name:<28} {results[name]['median_ms']:>10.2f} ms  "
+              f"(min {results[name]['min_ms']:.2f}, max {results[name]['max_ms']:.2f})")
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.size}.json")
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        baseline = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline gespeichert: {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, reference, current in regressions:
+            print(f"❌ Regression {name}: {reference:.2f} ms → {current:.2f} ms")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Keine Regression gegenüber {baseline_path} (Toleranz {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+🧪 SYNTHETISCHE TESTDATEN für BelegMeister-Benchmarks
+
+Füllt eine eigene Datenbank (nie die Produktionsdatenbank!) mit realistisch verteilten
+Anbietern, Belegen, Mahnungen und Erstattungsbescheiden.
+
+    python benchmarks/synthetic_data.py --size 100k
+    python benchmarks/synthetic_data.py --rows 250000 --dir /tmp/belegmeister-bench
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_DIR, 'benchmarks', 'data')
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+BATCH_SIZE = 50_000
+
+PROVIDER_TYPES = ('doctor', 'pharmacy', 'hospital', 'specialist')
+PROVIDER_PREFIXES = {
+    'doctor': ('Praxis Dr.', 'Hausarztpraxis Dr.', 'Zahnarztpraxis Dr.'),
+    'pharmacy': ('Apotheke am', 'Stadt-Apotheke', 'Löwen-Apotheke'),
+    'hospital': ('Klinikum', 'Krankenhaus', 'Universitätsklinikum'),
+    'specialist': ('Physiotherapie', 'Labor', 'DRK'),
+}
+SURNAMES = ('Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker', 'Schulz', 'Hoffmann',
+            'Schäfer', 'Koch', 'Bauer', 'Richter', 'Klein', 'Wolf', 'Schröder', 'Neumann', 'Schwarz', 'Zimmermann')
+PATIENTS = ('Max Mustermann', 'Erika Mustermann', 'Lena Mustermann', 'Paul Mustermann')
+PAYMENT_STATUS_WEIGHTS = (('paid', 70), ('unpaid', 18), ('reminded_1', 6), ('reminded_2', 4), ('overdue', 2))
+
+
+def open_app(work_dir):
+    """App-Modul in work_dir importieren → legt dort Schema/Indizes an (wie beim echten Start)"""
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+    os.environ.setdefault('BELEGMEISTER_LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('BELEGMEISTER_LOG_FILE', '')
+    sys.path.insert(0, REPO_DIR)
+    import medical_receipt_tracker
+    return medical_receipt_tracker
+
+
+def _weighted(rng, weights):
+    values, cumulative = zip(*weights)
+    return rng.choices(values, weights=cumulative)[0]
+
+
+def _german_iban(rng):
+    """Zufällige deutsche IBAN mit gültiger Prüfziffer (sonst lehnt das Sammelblatt sie ab)"""
+    bban = f"{rng.randrange(10**17, 10**18)}"
+    check = 98 - int(bban + '131400') % 97
+    return f"DE{check:02d}{bban}"
+
+
+def generate(app, receipts, seed=42, today=None):
+    """Tabellen mit `receipts` Belegen füllen; Rückgabe: Anzahl je Tabelle"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    providers_count = max(20, receipts // 200)
+
+    conn = app.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM medical_receipts')
+    if cursor.fetchone()[0]:
+        conn.close()
+        raise SystemExit(f"❌ {app.DATABASE_PATH} enthält bereits Belege - bitte leeres Verzeichnis wählen")
+
+    providers = []
+    for provider_id in range(1, providers_count + 1):
+        provider_type = PROVIDER_TYPES[provider_id % len(PROVIDER_TYPES)]
+        name = f"{rng.choice(PROVIDER_PREFIXES[provider_type])} {rng.choice(SURNAMES)} {provider_id}"
+        providers.append((provider_id, name, app.normalize_provider_name(name), provider_type,
+                          f"Hauptstraße {provider_id}, 10115 Berlin", _german_iban(rng)))
+    cursor.executemany('''
+        INSERT INTO service_providers (id, name, name_key, provider_type, address, iban)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', providers)
+    conn.commit()
+
+    reminders = 0
+    notices = 0
+    for start in range(0, receipts, BATCH_SIZE):
+        receipt_rows, reminder_rows, notice_rows = [], [], []
+        for number in range(start, min(start + BATCH_SIZE, receipts)):
+            provider_id, provider_name, _, provider_type, _, _ = providers[rng.randrange(providers_count)]
+            receipt_id = f"MED-BENCH-{number:07d}"
+            receipt_date = today - timedelta(days=rng.randrange(5 * 365))
+            amount = round(rng.lognormvariate(4.0, 1.0), 2)
+            payment_status = _weighted(rng, PAYMENT_STATUS_WEIGHTS)
+            debeka_status = rng.choice(('none', 'none', 'submitted', 'approved', 'paid'))
+            beihilfe_status = rng.choice(('none', 'none', 'submitted', 'approved', 'paid'))
+            debeka_amount = round(amount * 0.5, 2) if debeka_status == 'paid' else 0
+            beihilfe_amount = round(amount * 0.5, 2) if beihilfe_status == 'paid' else 0
+            receipt_rows.append((
+                receipt_id, provider_id, provider_name, provider_type, amount, receipt_date.isoformat(),
+                rng.choice(PATIENTS), f"RZ-{rng.randrange(10**6):06d}" if provider_type == 'pharmacy' else None,
+                payment_status, receipt_date.isoformat() if payment_status == 'paid' else None,
+                debeka_status, beihilfe_status,
+                receipt_date.isoformat() if debeka_status != 'none' else None,
+                receipt_date.isoformat() if beihilfe_status != 'none' else None,
+                debeka_amount, beihilfe_amount,
+            ))
+
+            if payment_status in ('reminded_1', 'reminded_2', 'overdue'):
+                level = 1 if payment_status == 'reminded_1' else 2
+                sent = receipt_date + timedelta(days=30)
+                reminder_rows.append((receipt_id, level, sent.isoformat(), (sent + timedelta(days=14)).isoformat(),
+                                      5.0 if level == 2 else 0.0, 'overdue' if payment_status == 'overdue' else 'sent'))
+            for notice_type, status, reimbursed in (('debeka', debeka_status, debeka_amount),
+                                                    ('beihilfe', beihilfe_status, beihilfe_amount)):
+                if status == 'paid':
+                    notice_date = (receipt_date + timedelta(days=rng.randrange(10, 60))).isoformat()
+                    notice_rows.append((receipt_id, notice_type, f"{notice_type[:2].upper()}-{number}", notice_date,
+                                        amount, amount, 50.0, reimbursed, round(amount - reimbursed, 2), notice_date))
+
+        cursor.executemany('''
+            INSERT INTO medical_receipts (receipt_id, provider_id, provider_name, provider_type, amount, receipt_date,
+                patient_name, prescription_number, payment_status, payment_date, debeka_status, beihilfe_status,
+                debeka_submission_date, beihilfe_submission_date, debeka_amount, beihilfe_amount)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', receipt_rows)
+        cursor.executemany('''
+            INSERT INTO payment_reminders (receipt_id, reminder_level, sent_date, due_date, fee, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', reminder_rows)
+        cursor.executemany('''
+            INSERT INTO reimbursement_notices (receipt_id, notice_type, notice_number, notice_date, original_amount,
+                eligible_amount, reimbursement_rate, reimbursed_amount, remaining_amount, processed_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', notice_rows)
+        conn.commit()
+        reminders += len(reminder_rows)
+        notices += len(notice_rows)
+        print(f"   … {min(start + BATCH_SIZE, receipts):>9,} Belege")
+
+    cursor.execute('ANALYZE')
+    conn.close()
+    return {'service_providers': providers_count, 'medical_receipts': receipts,
+            'payment_reminders': reminders, 'reimbursement_notices': notices}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetische BelegMeister-Datenbank erzeugen')
+    parser.add_argument('--size', choices=SIZES, default='1k', help='Vordefinierte Größe (Anzahl Belege)')
+    parser.add_argument('--rows', type=int, help='Anzahl Belege (überschreibt --size)')
+    parser.add_argument('--dir', help='Zielverzeichnis (Standard: benchmarks/data/<size>)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rows = args.rows or SIZES[args.size]
+    work_dir = os.path.abspath(args.dir or os.path.join(DATA_DIR, args.size if not args.rows else str(rows)))
+    started = time.perf_counter()
+    app = open_app(work_dir)
+    counts = generate(app, rows, seed=args.seed)
+    print(f"✅ {work_dir}/{app.DATABASE_PATH} in {time.perf_counter() - started:.1f}s: "
+          + ', '.join(f"{table}={count:,}" for table, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# BelegMeister - gunicorn-Konfiguration (Produktion)
+# Start: gunicorn -c gunicorn.conf.py medical_receipt_tracker:app
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# SQLite serialisiert Schreibzugriffe - wenige Prozesse, dafür Threads
+workers = int(os.environ.get('BELEGMEISTER_WORKERS', 2))
+threads = int(os.environ.get('BELEGMEISTER_THREADS', 4))
+worker_class = 'gthread'
+
+# App einmal im Master laden: init_database() läuft genau einmal vor dem Fork
+preload_app = True
+
+# OCR großer Scans kann dauern
+timeout = int(os.environ.get('BELEGMEISTER_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Worker regelmäßig erneuern (Speicher von PIL/OCR)
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('BELEGMEISTER_LOG_LEVEL', 'info')
+
+# Mehrere Worker dürfen nicht in dieselbe RotatingFileHandler-Datei schreiben (Rotation je Prozess
+# überschreibt/verliert Einträge) → unter gunicorn standardmäßig nur Konsole. Läuft vor dem
+# preload der App, greift also schon beim Import.
+os.environ.setdefault('BELEGMEISTER_LOG_FILE', '')
+
+
+def post_fork(server, worker):
+    # Der Log-Listener-Thread des Masters existiert im Worker nicht → neu starten
+    from medical_receipt_tracker import start_log_listener
+    start_log_listener()
+
+
+def post_worker_init(worker):
+    # Threads überleben keinen Fork → Mahnlauf je Worker starten (Mahnlauf ist idempotent und
+    # prüft reminder_last_run in der DB, läuft also trotzdem nur einmal pro Intervall)
+    from medical_receipt_tracker import start_reminder_scheduler
+    start_reminder_scheduler()
+
+
+def worker_exit(server, worker):
+    from medical_receipt_tracker import stop_reminder_scheduler
+    stop_reminder_scheduler()
@@ -17,69 +17,100 @@ Professionelles Beleg-Management für deutsche Krankenversicherung
 🚨 BELEGMEISTER v1.0 - MEISTERHAFT OHNE FEHLER!
 """
 
-from flask import Flask, render_template_string, request, redirect, url_for, flash, jsonify, session, send_file
+from flask import Flask, render_template_string, request, redirect, url_for, flash, jsonify, session, send_file, send_from_directory, Response, g, has_request_context
 import sqlite3
 import os
 import logging
 import segno
-import base64
 import io
 from datetime import datetime, timedelta
 import json
+import base64
+import gzip
+import xml.etree.ElementTree as ET
 from werkzeug.utils import secure_filename
 import uuid
 import hashlib
+import threading
+import queue
+import importlib
+import importlib.util
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 
-# Logging für Produktion
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('medical_tracker.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+# 📝 LOGGING FÜR PRODUKTION - Request-Threads schreiben nur in eine Queue, ein Listener-Thread schreibt Datei/Konsole
+LOG_FILE = os.environ.get('BELEGMEISTER_LOG_FILE', 'medical_tracker.log')  # leer = nur Konsole
+LOG_LEVEL = os.environ.get('BELEGMEISTER_LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('BELEGMEISTER_LOG_FORMAT', 'text')  # text | json
+LOG_MAX_BYTES = int(os.environ.get('BELEGMEISTER_LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('BELEGMEISTER_LOG_BACKUPS', 5))
+# Level je Logger, z.B. "belegmeister.ocr=DEBUG,werkzeug=WARNING"
+LOG_LEVELS = os.environ.get('BELEGMEISTER_LOG_LEVELS', 'werkzeug=INFO')
+_log_listener = {'listener': None, 'pid': None, 'handler': None}
 
-# 🔍 OCR-IMPORTS - PRODUKTIONSREIF (nach Logger-Setup)
-try:
-    import pytesseract
-    from PIL import Image
-    from pdf2image import convert_from_path
-    import PyPDF2
-    OCR_AVAILABLE = True
-    logger.info("OCR-Module erfolgreich geladen")
-except ImportError as e:
-    OCR_AVAILABLE = False
-    logger.warning(f"OCR-Module nicht verfügbar: {e}")
-
-# 🤖 CLOUD-OCR-IMPORTS - KI-GESTÜTZT
-try:
-    from google.cloud import vision
-    GOOGLE_VISION_AVAILABLE = True
-    logger.info("Google Vision API verfügbar")
-except ImportError:
-    GOOGLE_VISION_AVAILABLE = False
-    logger.warning("Google Vision API nicht verfügbar")
+class JsonLogFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Log-Eintrag (für Loki/ELK); Tracebacks hängt der QueueHandler an die Nachricht"""
+    
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        return json.dumps(entry, ensure_ascii=False)
 
-try:
-    import boto3
-    AWS_TEXTRACT_AVAILABLE = True  
-    logger.info("AWS Textract verfügbar")
-except ImportError:
-    AWS_TEXTRACT_AVAILABLE = False
-    logger.warning("AWS Textract nicht verfügbar")
+def start_log_listener():
+    """Handler öffnen und Listener-Thread starten (nach einem Fork erneut aufrufen, z.B. gunicorn post_fork)"""
+    from logging.handlers import RotatingFileHandler, QueueListener
+    
+    stop_log_listener()
+    if _log_listener['pid'] != os.getpid():
+        # Neuer Prozess (oder Fork): geerbte Queue samt internem Lock-Zustand nicht weiterverwenden;
+        # kopierte Einträge schreibt der Elternprozess selbst
+        _log_listener['handler'].queue = queue.SimpleQueue()
+    if LOG_FORMAT == 'json':
+        formatter = JsonLogFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [logging.StreamHandler()]
+    if LOG_FILE:
+        handlers.append(RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    listener = QueueListener(_log_listener['handler'].queue, *handlers)
+    listener.start()
+    _log_listener.update(listener=listener, pid=os.getpid())
 
-try:
-    from azure.cognitiveservices.vision.computervision import ComputerVisionClient
-    from azure.cognitiveservices.vision.computervision.models import OperationStatusCodes
-    from msrest.authentication import CognitiveServicesCredentials
-    AZURE_VISION_AVAILABLE = True
-    logger.info("Azure Computer Vision verfügbar")
-except ImportError:
-    AZURE_VISION_AVAILABLE = False
-    logger.warning("Azure Computer Vision nicht verfügbar")
+def stop_log_listener():
+    """Restliche Einträge schreiben und Handler schließen"""
+    listener = _log_listener['listener']
+    if listener:
+        _log_listener['listener'] = None
+        if _log_listener['pid'] == os.getpid():
+            listener.stop()  # nach einem Fork läuft der Listener-Thread nur im Elternprozess
+        for handler in listener.handlers:
+            handler.close()
+
+def setup_logging():
+    from logging.handlers import QueueHandler
+    import atexit
+    
+    _log_listener['handler'] = QueueHandler(queue.SimpleQueue())
+    root = logging.getLogger()
+    root.handlers = [_log_listener['handler']]
+    root.setLevel(LOG_LEVEL)
+    for spec in filter(None, (part.strip() for part in LOG_LEVELS.split(','))):
+        name, _, level = spec.partition('=')
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+    start_log_listener()
+    atexit.register(stop_log_listener)
+
+setup_logging()
+logger = logging.getLogger('belegmeister')
+ocr_logger = logging.getLogger('belegmeister.ocr')  # Detailzeilen der OCR auf DEBUG
 
 # 🚀 FLASK APP - PRODUKTIONSREIF
 app = Flask(__name__)
@@ -92,10 +123,304 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('receipts', exist_ok=True)
 os.makedirs('reimbursements', exist_ok=True)
 
+# 🎨 STATISCHE ASSETS - gemeinsames CSS/JS als gehashte Bundles, Bootstrap optional lokal (Offline-Modus)
+OFFLINE_ASSETS = os.environ.get('BELEGMEISTER_OFFLINE_ASSETS', '').lower() in ('1', 'true', 'yes', 'on')
+ASSET_VENDOR_DIR = os.path.join('static', 'vendor')
+VENDOR_ASSETS = {
+    'bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'bootstrap-icons.css': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css',
+    'fonts/bootstrap-icons.woff2': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/fonts/bootstrap-icons.woff2',
+    'fonts/bootstrap-icons.woff': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/fonts/bootstrap-icons.woff',
+}
+COMPRESS_MIN_BYTES = 1024  # kleinere Antworten lohnen die Kompression nicht
+COMPRESS_MIMETYPES = ('text/html', 'application/json', 'text/css', 'application/javascript')
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+APP_CSS = """
+/* 🏠 Dashboard */
+.page-dashboard {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    min-height: 100vh;
+    color: white;
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+}
+.main-card {
+    background: rgba(255,255,255,0.95);
+    color: #333;
+    border-radius: 25px;
+    box-shadow: 0 20px 50px rgba(0,0,0,0.3);
+}
+.stat-card {
+    background: rgba(255,255,255,0.15);
+    backdrop-filter: blur(10px);
+    border-radius: 15px;
+    border: 1px solid rgba(255,255,255,0.2);
+    transition: transform 0.3s ease;
+}
+.stat-card:hover { transform: translateY(-5px); }
+.feature-btn {
+    background: rgba(255,255,255,0.9);
+    border: none;
+    border-radius: 15px;
+    padding: 20px;
+    transition: all 0.3s ease;
+    color: #333;
+    text-decoration: none;
+    display: block;
+}
+.feature-btn:hover {
+    transform: translateY(-10px);
+    background: rgba(255,255,255,1);
+    color: #333;
+    text-decoration: none;
+    box-shadow: 0 10px 30px rgba(0,0,0,0.2);
+}
+.production-badge {
+    background: linear-gradient(45deg, #28a745, #20c997);
+    animation: pulse 2s infinite;
+    border-radius: 25px;
+    padding: 10px 20px;
+    color: white;
+    font-weight: bold;
+}
+@keyframes pulse {
+    0% { box-shadow: 0 0 0 0 rgba(40, 167, 69, 0.7); }
+    70% { box-shadow: 0 0 0 10px rgba(40, 167, 69, 0); }
+    100% { box-shadow: 0 0 0 0 rgba(40, 167, 69, 0); }
+}
+
+/* 📄 Beleg-Upload */
+.upload-zone {
+    border: 3px dashed #007bff;
+    border-radius: 15px;
+    padding: 50px;
+    text-align: center;
+    transition: all 0.3s;
+    cursor: pointer;
+}
+.upload-zone:hover, .upload-zone.dragover {
+    border-color: #28a745;
+    background-color: rgba(40, 167, 69, 0.1);
+}
+
+/* 💳 GiroCode */
+.page-girocode { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; }
+.qr-card { box-shadow: 0 15px 35px rgba(0,0,0,0.2); border-radius: 20px; background: white; }
+.qr-image { border: 4px solid #e9ecef; border-radius: 20px; background: white; padding: 20px; }
+.girocode-cell { page-break-inside: avoid; border: 1px solid #dee2e6; border-radius: 10px; }
+.girocode-cell img { width: 200px; height: 200px; }
+@media print { .no-print { display: none; } }
+
+/* 🏥 Erstattungs-Upload */
+.page-reimbursement .upload-zone {
+    border-color: #28a745;
+    padding: 30px;
+    min-height: 120px;
+}
+.page-reimbursement .upload-zone:hover, .page-reimbursement .upload-zone.dragover {
+    border-color: #20c997;
+    background-color: rgba(32, 201, 151, 0.1);
+}
+.process-step {
+    border-left: 4px solid #007bff;
+    padding-left: 15px;
+    margin-bottom: 20px;
+}
+.notice-card {
+    border: 2px solid #28a745;
+    background: rgba(40, 167, 69, 0.1);
+}
+
+/* 🔍 Vorschau */
+.preview-container {
+    border: 2px solid #dee2e6;
+    border-radius: 10px;
+    background: #f8f9fa;
+    min-height: 600px;
+}
+.file-icon {
+    font-size: 8rem;
+    color: #6c757d;
+}
+"""
+
+APP_JS = """
+let providerSearchTimer = null;
+function searchProviders(query) {
+    clearTimeout(providerSearchTimer);
+    providerSearchTimer = setTimeout(() => {
+        fetch('/api/providers/search?limit=50&q=' + encodeURIComponent(query))
+            .then(response => response.json())
+            .then(data => {
+                const select = document.getElementById('provider_select');
+                const selected = select.value;
+                const anchor = select.querySelector('option[value="new"]');
+                select.querySelectorAll('option[data-name]').forEach(option => {
+                    if (option.value !== selected) option.remove();
+                });
+                data.providers.forEach(provider => {
+                    if (String(provider.id) === selected) return;
+                    const option = document.createElement('option');
+                    option.value = provider.id;
+                    option.textContent = provider.name + ' (' + provider.type_label + ')';
+                    option.dataset.name = provider.name;
+                    option.dataset.type = provider.provider_type;
+                    option.dataset.iban = provider.iban || '';
+                    option.dataset.bic = provider.bic || '';
+                    option.dataset.phone = provider.phone || '';
+                    option.dataset.email = provider.email || '';
+                    select.insertBefore(option, anchor);
+                });
+            });
+    }, 200);
+}
+
+function toggleAll(source, name) {
+    document.querySelectorAll('input[name="' + name + '"]').forEach(cb => cb.checked = source.checked);
+}
+
+function bulkAction(url, label) {
+    const receiptIds = Array.from(document.querySelectorAll('input[name="receipt_ids"]:checked')).map(cb => cb.value);
+    if (receiptIds.length === 0) {
+        alert('Bitte mindestens einen Beleg auswählen!');
+        return;
+    }
+    if (confirm(receiptIds.length + ' Belege ' + label + '?')) {
+        fetch(url, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({receipt_ids: receiptIds})
+        })
+            .then(response => response.json())
+            .then(data => {
+                alert(data.message);
+                if (data.success) {
+                    location.reload();
+                }
+            });
+    }
+}
+
+function markAsPaid(receiptId) {
+    if (confirm('Beleg als bezahlt markieren?')) {
+        fetch('/api/mark_paid/' + receiptId, {method: 'POST'})
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    alert('Als bezahlt markiert!');
+                    location.reload();
+                }
+            });
+    }
+}
+
+function nextReminder(receiptId) {
+    if (confirm('Nächste Mahnstufe senden?')) {
+        alert('Nächste Mahnstufe wird erstellt... (Produktionsfeature)');
+    }
+}
+"""
+
+_asset_bundles = {}  # gehashter Dateiname → (Inhalt, gzip-Inhalt, MIME-Type)
+_asset_names = {}    # logischer Name → gehashter Dateiname
+
+def register_asset_bundle(name, content, mimetype):
+    """Bundle einmal beim Import hashen und vorkomprimieren"""
+    body = content.strip().encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    base, ext = name.rsplit('.', 1)
+    hashed_name = f"{base}.{digest}.{ext}"
+    _asset_bundles[hashed_name] = (body, gzip.compress(body, compresslevel=9), mimetype)
+    _asset_names[name] = hashed_name
+
+register_asset_bundle('app.css', APP_CSS, 'text/css')
+register_asset_bundle('app.js', APP_JS, 'application/javascript')
+
+@app.template_global()
+def asset_url(name):
+    """URL eines gehashten Bundles (ändert sich mit dem Inhalt → immutable cachebar)"""
+    return f"/assets/{_asset_names[name]}"
+
+_vendor_local = {}
+
+@app.template_global()
+def vendor_asset(name):
+    """Bootstrap-Datei: im Offline-Modus lokal aus static/vendor, sonst vom CDN"""
+    if OFFLINE_ASSETS:
+        if name not in _vendor_local:
+            _vendor_local[name] = os.path.exists(os.path.join(ASSET_VENDOR_DIR, name))
+        if _vendor_local[name]:
+            return f"/assets/vendor/{name}"
+    return VENDOR_ASSETS[name]
+
+def download_vendor_assets():
+    """Bootstrap + Icons einmalig nach static/vendor laden (für BELEGMEISTER_OFFLINE_ASSETS=1)"""
+    import urllib.request
+    
+    for name, url in VENDOR_ASSETS.items():
+        target = os.path.join(ASSET_VENDOR_DIR, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response, open(target, 'wb') as f:
+            f.write(response.read())
+        logger.info(f"📦 Asset geladen: {target}")
+    _vendor_local.clear()
+
+@app.route('/assets/<filename>')
+def asset_bundle(filename):
+    """Gehashtes CSS/JS-Bundle mit immutable Caching (vorkomprimiert)"""
+    bundle = _asset_bundles.get(filename)
+    if not bundle:
+        return 'Nicht gefunden', 404
+    body, gzipped, mimetype = bundle
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = Response(gzipped, mimetype=mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(body, mimetype=mimetype)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/assets/vendor/<path:filename>')
+def vendor_asset_file(filename):
+    """Lokale Bootstrap-Dateien (Offline-Modus)"""
+    return send_from_directory(os.path.abspath(ASSET_VENDOR_DIR), filename, max_age=86400)
+
+@app.after_request
+def compress_response(response):
+    """HTML/JSON/CSS/JS ab COMPRESS_MIN_BYTES mit brotli (falls installiert) oder gzip komprimieren"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    
+    if BROTLI_AVAILABLE and 'br' in accept_encoding:
+        response.set_data(brotli.compress(body, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in accept_encoding:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    response.vary.add('Accept-Encoding')
+    return response
+
 # 💾 PRODUKTIONSREIFE DATENBANK
+DATABASE_PATH = 'medical_receipts.db'
+
 def init_database():
     """Initialisiere SQLite-Datenbank mit allen Tabellen"""
-    conn = sqlite3.connect('medical_receipts.db')
+    conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
     
     # Service Providers Tabelle - NEUE TABELLE für Anbieter-Verwaltung
@@ -241,7 +566,13 @@ def init_database():
         ('reminder_2_fee', '5.00'),
         ('beihilfe_prozentsatz', '50.0'),
         ('besoldungsgruppe', 'A13'),
-        ('familienstand', 'verheiratet')
+        ('familienstand', 'verheiratet'),
+        ('debtor_iban', ''),
+        ('debtor_bic', ''),
+        ('provider_cache_version', '0'),
+        ('settings_version', '0'),
+        ('reminder_scheduler_minutes', '60'),
+        ('reminder_last_run', '')
     ]
     
     for key, value in settings:
@@ -262,43 +593,1086 @@ def init_database():
         conn.commit()
         logger.info("✅ Rezept-Funktionalität erfolgreich hinzugefügt!")
     
+    # 🔄 DATENBANK-MIGRATION für Anbieter-Verknüpfung
+    try:
+        cursor.execute("SELECT provider_id FROM medical_receipts LIMIT 1")
+    except sqlite3.OperationalError:
+        logger.info("🔄 Füge Anbieter-Verknüpfung (provider_id) zur Datenbank hinzu...")
+        cursor.execute("ALTER TABLE medical_receipts ADD COLUMN provider_id INTEGER REFERENCES service_providers (id)")
+        conn.commit()
+    
+    try:
+        cursor.execute("SELECT name_key FROM service_providers LIMIT 1")
+    except sqlite3.OperationalError:
+        logger.info("🔄 Füge normalisierten Anbieter-Schlüssel zur Datenbank hinzu...")
+        cursor.execute("ALTER TABLE service_providers ADD COLUMN name_key TEXT")
+        conn.commit()
+    
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_service_providers_name_key ON service_providers (name_key)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_medical_receipts_provider_id ON medical_receipts (provider_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_payment_reminders_receipt_status ON payment_reminders (receipt_id, status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_payment_reminders_status_due ON payment_reminders (status, due_date)')
+    # Nur offene Mahnungen, nach Fälligkeit sortiert - REMINDER_OPEN_QUERY liest sie ohne Tabellen-Scan und ohne Sortierung
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payment_reminders_open_due ON payment_reminders (due_date) WHERE status IN ('sent', 'overdue')")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_medical_receipts_status_date ON medical_receipts (payment_status, receipt_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_medical_receipts_receipt_date ON medical_receipts (receipt_date)')
+    
+    # Fehlende oder mit älteren Stoppwörtern berechnete Schlüssel neu setzen
+    cursor.execute('SELECT id, name, name_key FROM service_providers')
+    stale_keys = [(normalize_provider_name(name), provider_id) for provider_id, name, name_key in cursor.fetchall()
+                  if name_key != normalize_provider_name(name)]
+    if stale_keys:
+        cursor.executemany('UPDATE service_providers SET name_key = ? WHERE id = ?', stale_keys)
+    conn.commit()
+    
     conn.close()
     logger.info("Datenbank erfolgreich initialisiert")
 
 # 🔧 HILFSFUNKTIONEN
 def get_db_connection():
-    """Thread-sichere Datenbankverbindung"""
-    conn = sqlite3.connect('medical_receipts.db')
+    """Thread-sichere Datenbankverbindung (Statements werden je Request gezählt und gemessen)"""
+    conn = sqlite3.connect(DATABASE_PATH, factory=ProfiledConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
+# 🔒 UNIT OF WORK - Dateien vor BEGIN IMMEDIATE speichern, alle Statements in EINER kurzen Transaktion
+UOW_MAX_ATTEMPTS = 5
+UOW_BUSY_TIMEOUT = 2.0  # Sekunden, die SQLite pro Versuch auf den Schreib-Lock wartet
+UOW_RETRY_BACKOFF = 0.05  # Sekunden, verdoppelt sich pro Versuch
+
+class UnitOfWork:
+    """Sammelt Datei-Uploads und SQL-Statements und schreibt sie gebündelt.
+    
+    Verwendung::
+        
+        uow = UnitOfWork()
+        try:
+            path = uow.save_file(upload, os.path.join('reimbursements', name))
+            uow.execute('INSERT ...', (...))
+            uow.remove_file_after_commit(old_path)
+            uow.commit()
+        except Exception:
+            uow.discard_files()
+    
+    commit() schreibt mit Retry bei SQLITE_BUSY. Nach dem COMMIT gehören die gespeicherten Dateien
+    zu committeten Zeilen - ein späteres discard_files() löscht sie nicht mehr.
+    """
+    
+    def __init__(self):
+        self.saved_files = []
+        self.statements = []
+        self.files_to_remove = []
+        self.rowcounts = []  # geänderte Zeilen je Statement nach commit()
+    
+    def save_file(self, storage, path):
+        """Upload speichern (außerhalb der Transaktion) und für den Rollback merken"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        storage.save(path)
+        self.saved_files.append(path)
+        return path
+    
+    def execute(self, sql, params=()):
+        self.statements.append((False, sql, params))
+    
+    def executemany(self, sql, seq_of_params):
+        self.statements.append((True, sql, list(seq_of_params)))
+    
+    def remove_file_after_commit(self, path):
+        """Datei erst löschen, wenn die Transaktion erfolgreich war"""
+        if path:
+            self.files_to_remove.append(path)
+    
+    def discard_files(self):
+        """Verwaiste Uploads nach einem Rollback entfernen"""
+        for path in self.saved_files:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+                    logger.info(f"🧹 Verwaiste Datei nach Rollback entfernt: {path}")
+            except OSError as e:
+                logger.warning(f"Verwaiste Datei konnte nicht entfernt werden: {path} ({e})")
+        self.saved_files = []
+    
+    def commit(self):
+        """Alle Statements in einer BEGIN-IMMEDIATE-Transaktion ausführen"""
+        import time
+        
+        for attempt in range(1, UOW_MAX_ATTEMPTS + 1):
+            conn = sqlite3.connect(DATABASE_PATH, timeout=UOW_BUSY_TIMEOUT, isolation_level=None, factory=ProfiledConnection)
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                rowcounts = []
+                for many, sql, params in self.statements:
+                    if many:
+                        rowcounts.append(conn.executemany(sql, params).rowcount)
+                    else:
+                        rowcounts.append(conn.execute(sql, params).rowcount)
+                conn.execute('COMMIT')
+                self.rowcounts = rowcounts
+                self.saved_files = []
+                break
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                busy = 'locked' in str(e) or 'busy' in str(e)
+                if busy and attempt < UOW_MAX_ATTEMPTS:
+                    logger.warning(f"⏳ Datenbank gesperrt, Versuch {attempt}/{UOW_MAX_ATTEMPTS}")
+                    time.sleep(UOW_RETRY_BACKOFF * 2 ** (attempt - 1))
+                    continue
+                self.discard_files()
+                raise
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                self.discard_files()
+                raise
+            finally:
+                conn.close()
+        
+        for path in self.files_to_remove:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+                    logger.info(f"🗑️ Datei gelöscht: {path}")
+            except OSError as e:
+                logger.warning(f"Datei konnte nicht gelöscht werden: {path} ({e})")
+
 def generate_receipt_id():
     """Generiere eindeutige Belegnummer"""
     return f"MED-{datetime.now().strftime('%Y%m%d')}-{uuid.uuid4().hex[:6].upper()}"
 
-def get_setting(key, default=None):
-    """Hole Systemeinstellung"""
+def sql_days_since(column):
+    """SQL-Ausdruck: ganze Tage von column bis zum Stichtag-Parameter (?), fehlendes Datum → 0"""
+    return f"COALESCE(CAST(julianday(?) - julianday({column}) AS INTEGER), 0)"
+
+# ⚙️ EINSTELLUNGS-CACHE - einmal pro Worker geladen, Write-Through, Versionszeile für andere Worker
+SETTINGS_CHECK_SECONDS = 2  # wie oft auf Änderungen anderer Worker geprüft wird
+
+_settings_cache = {'values': None, 'version': None, 'checked_at': 0.0}
+_settings_cache_lock = threading.Lock()
+
+def load_settings():
+    """Alle Systemeinstellungen in den Cache laden"""
+    import time
+    
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT value FROM system_settings WHERE key = ?', (key,))
-    result = cursor.fetchone()
+    cursor.execute('SELECT key, value FROM system_settings')
+    values = {row['key']: row['value'] for row in cursor.fetchall()}
+    conn.close()
+    
+    with _settings_cache_lock:
+        _settings_cache['values'] = values
+        _settings_cache['version'] = values.get('settings_version')
+        _settings_cache['checked_at'] = time.monotonic()
+    return values
+
+def _current_settings():
+    """Einstellungen aus dem Cache; lädt neu, wenn ein anderer Worker settings_version erhöht hat"""
+    import time
+    
+    now = time.monotonic()
+    with _settings_cache_lock:
+        values = _settings_cache['values']
+        if values is not None and now - _settings_cache['checked_at'] < SETTINGS_CHECK_SECONDS:
+            return values
+        _settings_cache['checked_at'] = now
+        local_version = _settings_cache['version']
+    
+    if values is None:
+        return load_settings()
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM system_settings WHERE key = 'settings_version'")
+    row = cursor.fetchone()
     conn.close()
-    return result['value'] if result else default
+    
+    if row and row['value'] != local_version:
+        return load_settings()
+    return values
+
+def get_setting(key, default=None):
+    """Hole Systemeinstellung (aus dem Cache)"""
+    return _current_settings().get(key, default)
+
+def get_setting_float(key, default=0.0):
+    """Systemeinstellung als float (default bei fehlendem/ungültigem Wert)"""
+    try:
+        return float(get_setting(key, default))
+    except (TypeError, ValueError):
+        return default
+
+def get_setting_int(key, default=0):
+    """Systemeinstellung als int (default bei fehlendem/ungültigem Wert)"""
+    try:
+        return int(float(get_setting(key, default)))
+    except (TypeError, ValueError):
+        return default
+
+def get_setting_bool(key, default=False):
+    """Systemeinstellung als bool ('1', 'true', 'ja', 'on' → True)"""
+    value = get_setting(key)
+    if value is None:
+        return default
+    return str(value).strip().lower() in ('1', 'true', 'ja', 'yes', 'on')
 
 def update_setting(key, value):
-    """Update Systemeinstellung"""
+    """Update Systemeinstellung (Write-Through in DB + Cache, Version für andere Worker erhöhen)"""
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        INSERT OR REPLACE INTO system_settings (key, value, updated_at) 
+        INSERT OR REPLACE INTO system_settings (key, value, updated_at)
         VALUES (?, ?, CURRENT_TIMESTAMP)
     ''', (key, value))
+    cursor.execute('''
+        INSERT INTO system_settings (key, value, updated_at) VALUES ('settings_version', '1', CURRENT_TIMESTAMP)
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1, updated_at = CURRENT_TIMESTAMP
+    ''')
+    cursor.execute("SELECT value FROM system_settings WHERE key = 'settings_version'")
+    version = cursor.fetchone()['value']
+    conn.commit()
+    conn.close()
+    
+    with _settings_cache_lock:
+        if _settings_cache['values'] is not None:
+            values = dict(_settings_cache['values'])
+            values[key] = str(value)
+            values['settings_version'] = version
+            _settings_cache['values'] = values
+            _settings_cache['version'] = version
+
+# 🏥 ANBIETER-AUFLÖSUNG - normalisierter Schlüssel + Trigramm-Index im Speicher
+PROVIDER_MATCH_MIN_SCORE = 0.5  # Vorschlag für OCR-Ergebnisse
+PROVIDER_LINK_MIN_SCORE = 0.8  # automatische Verknüpfung beim Speichern
+PROVIDER_NAME_STOPWORDS = {'dr', 'med', 'dent', 'prof', 'dipl', 'und', 'u'}  # nur Titel - Fachrichtung/Rechtsform unterscheiden Anbieter
+PROVIDER_NAME_FOLDING = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+PROVIDER_CACHE_CHECK_SECONDS = 5  # wie oft andere Worker auf neue Anbieter-Version prüfen
+PROVIDER_DROPDOWN_LIMIT = 200  # mehr Anbieter → Autocomplete statt vollständiger Liste
+
+_provider_index = {
+    'providers': {}, 'by_name': {}, 'by_key': {}, 'trigrams': {},
+    'sorted': [], 'name_prefixes': [], 'key_prefixes': [],
+    'version': None, 'checked_at': 0.0
+}
+_provider_index_lock = threading.Lock()
+
+def normalize_provider_name(name):
+    """Normalisierter Anbieter-Schlüssel: Kleinschreibung, Umlaute, ohne Titel/Satzzeichen"""
+    import re
+    
+    folded = (name or '').lower().translate(PROVIDER_NAME_FOLDING)
+    tokens = re.findall(r'[a-z0-9]+', folded)
+    significant = [token for token in tokens if token not in PROVIDER_NAME_STOPWORDS]
+    return ' '.join(significant or tokens)
+
+def provider_exact_name(name):
+    """Vollständiger Name für den exakten Abgleich (Groß-/Kleinschreibung und Leerraum egal)"""
+    return ' '.join((name or '').split()).casefold()
+
+def provider_trigrams(key):
+    """Zeichen-Trigramme eines normalisierten Schlüssels (mit Wortgrenzen)"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def warm_provider_index():
+    """Anbieter-Index aus service_providers (neu) aufbauen - beim Start und nach Änderungen"""
+    import time
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM system_settings WHERE key = 'provider_cache_version'")
+    version_row = cursor.fetchone()
+    cursor.execute('SELECT id, name, provider_type, iban, bic, phone, email FROM service_providers ORDER BY name')
+    rows = cursor.fetchall()
+    conn.close()
+    
+    providers, by_name, by_key, trigrams = {}, {}, {}, {}
+    for row in rows:
+        key = normalize_provider_name(row['name'])
+        providers[row['id']] = dict(row, name_key=key)
+        by_name.setdefault(provider_exact_name(row['name']), []).append(row['id'])
+        by_key.setdefault(key, []).append(row['id'])
+        for trigram in provider_trigrams(key):
+            trigrams.setdefault(trigram, set()).add(row['id'])
+    
+    # Sortierte (Präfix, id)-Listen für die Autocomplete-Suche per bisect
+    name_prefixes = sorted((provider['name'].casefold(), provider_id) for provider_id, provider in providers.items())
+    key_prefixes = sorted((provider['name_key'], provider_id) for provider_id, provider in providers.items())
+    
+    with _provider_index_lock:
+        _provider_index['providers'] = providers
+        _provider_index['by_name'] = by_name
+        _provider_index['by_key'] = by_key
+        _provider_index['trigrams'] = trigrams
+        _provider_index['sorted'] = [providers[row['id']] for row in rows]
+        _provider_index['name_prefixes'] = name_prefixes
+        _provider_index['key_prefixes'] = key_prefixes
+        _provider_index['version'] = version_row['value'] if version_row else None
+        _provider_index['checked_at'] = time.monotonic()
+    logger.info(f"🏥 Anbieter-Index aufgebaut: {len(providers)} Anbieter")
+
+def ensure_provider_index_fresh():
+    """Index neu laden, falls ein anderer Worker die Anbieter-Version erhöht hat (gedrosselt)"""
+    import time
+    
+    now = time.monotonic()
+    with _provider_index_lock:
+        if now - _provider_index['checked_at'] < PROVIDER_CACHE_CHECK_SECONDS:
+            return
+        _provider_index['checked_at'] = now
+        local_version = _provider_index['version']
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM system_settings WHERE key = 'provider_cache_version'")
+    row = cursor.fetchone()
+    conn.close()
+    
+    if row and row['value'] != local_version:
+        warm_provider_index()
+
+def invalidate_provider_cache(relink=True):
+    """Nach create/update/delete: Version erhöhen (alle Worker) und lokalen Index neu bauen"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE system_settings SET value = CAST(value AS INTEGER) + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE key = 'provider_cache_version'
+    ''')
     conn.commit()
     conn.close()
+    
+    warm_provider_index()
+    if relink:
+        link_unassigned_receipts()
+
+def get_cached_providers(limit=None, include_ids=()):
+    """Anbieter nach Name sortiert aus dem Cache → (providers, truncated)"""
+    ensure_provider_index_fresh()
+    with _provider_index_lock:
+        all_providers = _provider_index['sorted']
+        providers_by_id = _provider_index['providers']
+    
+    if limit is None or len(all_providers) <= limit:
+        return all_providers, False
+    
+    # Gekürzte Liste, aktuell gewählte Anbieter bleiben immer enthalten
+    providers = all_providers[:limit]
+    shown = {provider['id'] for provider in providers}
+    providers += [providers_by_id[provider_id] for provider_id in include_ids
+                  if provider_id in providers_by_id and provider_id not in shown]
+    return providers, True
+
+def search_providers(prefix, limit=20):
+    """Präfix-Suche über Anzeigename und normalisierten Schlüssel (bisect auf sortierten Listen)"""
+    import bisect
+    
+    ensure_provider_index_fresh()
+    name_prefix = (prefix or '').strip().casefold()
+    key_prefix = normalize_provider_name(prefix)
+    
+    with _provider_index_lock:
+        providers = _provider_index['providers']
+        if not name_prefix:
+            return _provider_index['sorted'][:limit]
+        
+        matches = []
+        for sorted_prefixes, value in ((_provider_index['name_prefixes'], name_prefix),
+                                       (_provider_index['key_prefixes'], key_prefix)):
+            if not value:
+                continue
+            position = bisect.bisect_left(sorted_prefixes, (value,))
+            while position < len(sorted_prefixes) and sorted_prefixes[position][0].startswith(value):
+                provider_id = sorted_prefixes[position][1]
+                if provider_id not in matches:
+                    matches.append(provider_id)
+                position += 1
+        result = [providers[provider_id] for provider_id in matches]
+    
+    return sorted(result, key=lambda provider: provider['name'].casefold())[:limit]
+
+def match_provider(name, min_score=PROVIDER_MATCH_MIN_SCORE):
+    """Bestpassenden Anbieter für einen (OCR-)Namen finden → (provider_dict, score) oder (None, 0.0)
+    
+    Exakter Name vor normalisiertem Schlüssel vor Trigramm-Ähnlichkeit. Passen mehrere Anbieter
+    gleich gut, wird keiner gewählt - lieber unverknüpft als mit fremder IBAN.
+    """
+    key = normalize_provider_name(name)
+    if not key:
+        return None, 0.0
+    
+    ensure_provider_index_fresh()
+    with _provider_index_lock:
+        providers = _provider_index['providers']
+        for index_name, value in (('by_name', provider_exact_name(name)), ('by_key', key)):
+            candidates = _provider_index[index_name].get(value, [])
+            if len(candidates) == 1:
+                return providers[candidates[0]], 1.0
+            if len(candidates) > 1:
+                return None, 0.0
+        
+        # Dice-Koeffizient über gemeinsame Trigramme
+        query_trigrams = provider_trigrams(key)
+        overlap = {}
+        for trigram in query_trigrams:
+            for candidate_id in _provider_index['trigrams'].get(trigram, ()):
+                overlap[candidate_id] = overlap.get(candidate_id, 0) + 1
+        
+        best_provider, best_score, tied = None, 0.0, False
+        for candidate_id, shared in overlap.items():
+            candidate = providers[candidate_id]
+            score = 2.0 * shared / (len(query_trigrams) + len(provider_trigrams(candidate['name_key'])))
+            if score > best_score:
+                best_provider, best_score, tied = candidate, score, False
+            elif score == best_score:
+                tied = True
+    
+    if best_score >= min_score:
+        return (None, 0.0) if tied else (best_provider, best_score)
+    
+    # Anderer Worker hat den Anbieter evtl. gerade angelegt → eindeutiger Treffer über DB-Index
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id, name, provider_type, iban, bic FROM service_providers WHERE name_key = ? LIMIT 2', (key,))
+    rows = cursor.fetchall()
+    conn.close()
+    if len(rows) == 1:
+        return dict(rows[0], name_key=key), 1.0
+    return None, 0.0
+
+def exact_provider_id(name):
+    """provider_id nur bei genau einem Anbieter mit exakt diesem Namen"""
+    ensure_provider_index_fresh()
+    with _provider_index_lock:
+        candidates = _provider_index['by_name'].get(provider_exact_name(name), [])
+    return candidates[0] if len(candidates) == 1 else None
+
+def resolve_provider_id(name, form_provider_id=None):
+    """provider_id für einen Beleg bestimmen
+    
+    Die Auswahl im Formular gilt, solange der Belegname noch zu ihr passt. Wurde nur der Name geändert,
+    wird neu über den Namen aufgelöst - sonst bliebe die IBAN des alten Anbieters am Beleg.
+    """
+    if form_provider_id and str(form_provider_id).isdigit():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, name FROM service_providers WHERE id = ?', (int(form_provider_id),))
+        selected = cursor.fetchone()
+        conn.close()
+        if selected and (not (name or '').strip()
+                         or provider_exact_name(name) == provider_exact_name(selected['name'])
+                         or normalize_provider_name(name) == normalize_provider_name(selected['name'])):
+            return selected['id']
+    provider, _ = match_provider(name, min_score=PROVIDER_LINK_MIN_SCORE)
+    return provider['id'] if provider else None
+
+def link_unassigned_receipts():
+    """Belege ohne provider_id nachträglich verknüpfen - nur bei exakt gleichem Anbieternamen"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT DISTINCT provider_name FROM medical_receipts WHERE provider_id IS NULL')
+    updates = []
+    for row in cursor.fetchall():
+        provider_id = exact_provider_id(row['provider_name'])
+        if provider_id:
+            updates.append((provider_id, row['provider_name']))
+    
+    if updates:
+        cursor.executemany(
+            'UPDATE medical_receipts SET provider_id = ? WHERE provider_id IS NULL AND provider_name = ?',
+            updates
+        )
+        conn.commit()
+        invalidate_provider_stats(*[provider_id for provider_id, _ in updates])
+        logger.info(f"🔗 Anbieter-Verknüpfung nachgetragen für {len(updates)} Anbieter-Namen")
+    conn.close()
+
+def load_receipt_with_provider(cursor, receipt_id):
+    """Beleg inkl. verknüpftem Anbieter per JOIN laden → (receipt, provider_dict|None)"""
+    cursor.execute('''
+        SELECT mr.*, sp.id AS sp_id, sp.name AS sp_name, sp.provider_type AS sp_provider_type,
+               sp.iban AS sp_iban, sp.bic AS sp_bic, sp.phone AS sp_phone, sp.email AS sp_email
+        FROM medical_receipts mr
+        LEFT JOIN service_providers sp ON sp.id = mr.provider_id
+        WHERE mr.receipt_id = ?
+    ''', (receipt_id,))
+    receipt = cursor.fetchone()
+    if not receipt or receipt['sp_id'] is None:
+        return receipt, None
+    
+    provider = {
+        'id': receipt['sp_id'],
+        'name': receipt['sp_name'],
+        'provider_type': receipt['sp_provider_type'],
+        'iban': receipt['sp_iban'],
+        'bic': receipt['sp_bic'],
+        'phone': receipt['sp_phone'],
+        'email': receipt['sp_email'],
+    }
+    return receipt, provider
+
+# 📊 ANBIETER-STATISTIK - GROUP BY provider_id (indiziert), inkrementell gecacht
+PROVIDER_STATS_TTL_SECONDS = 60  # Änderungen anderer Worker spätestens nach einer Minute sichtbar
+
+_provider_stats_cache = {'stats': {}, 'dirty': set(), 'loaded_at': None}
+_provider_stats_lock = threading.Lock()
+
+# Cache der Jahresberichte (siehe JAHRESBERICHT) - hier, weil invalidate_provider_stats() ihn schon beim Start leert
+_yearly_report_cache = {}  # (Jahr, Basis) → (berechnet um, Bericht)
+_yearly_report_lock = threading.Lock()
+
+def invalidate_yearly_reports():
+    with _yearly_report_lock:
+        _yearly_report_cache.clear()
+
+def compute_provider_stats(provider_ids=None):
+    """Kennzahlen je Anbieter per GROUP BY berechnen → {provider_id: stats}"""
+    query = '''
+        SELECT provider_id,
+               COUNT(*) AS receipt_count,
+               COALESCE(SUM(amount), 0) AS total_amount,
+               COALESCE(AVG(amount), 0) AS avg_amount,
+               COALESCE(SUM(debeka_amount), 0) AS debeka_total,
+               COALESCE(SUM(beihilfe_amount), 0) AS beihilfe_total,
+               SUM(CASE WHEN payment_status != 'paid' THEN 1 ELSE 0 END) AS unpaid_count,
+               COALESCE(SUM(CASE WHEN payment_status != 'paid' THEN amount END), 0) AS unpaid_amount,
+               COUNT(payment_date) AS paid_count,
+               AVG(julianday(payment_date) - julianday(receipt_date)) AS avg_payment_delay_days,
+               MIN(receipt_date) AS first_receipt_date,
+               MAX(receipt_date) AS last_receipt_date
+        FROM medical_receipts
+        WHERE provider_id IS NOT NULL
+    '''
+    params = []
+    if provider_ids is not None:
+        query += f" AND provider_id IN ({', '.join('?' * len(provider_ids))})"
+        params.extend(provider_ids)
+    query += ' GROUP BY provider_id'
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+    
+    stats = {}
+    for row in rows:
+        entry = dict(row)
+        total = entry['total_amount']
+        entry['debeka_ratio'] = entry['debeka_total'] / total if total else 0.0
+        entry['beihilfe_ratio'] = entry['beihilfe_total'] / total if total else 0.0
+        entry['reimbursed_ratio'] = entry['debeka_ratio'] + entry['beihilfe_ratio']
+        if entry['avg_payment_delay_days'] is not None:
+            entry['avg_payment_delay_days'] = round(entry['avg_payment_delay_days'], 1)
+        stats[entry['provider_id']] = entry
+    return stats
+
+def get_provider_stats(provider_id=None):
+    """Anbieter-Statistik aus dem Cache (nur geänderte Anbieter werden neu berechnet)"""
+    import time
+    
+    now = time.monotonic()
+    with _provider_stats_lock:
+        expired = (_provider_stats_cache['loaded_at'] is None
+                   or now - _provider_stats_cache['loaded_at'] > PROVIDER_STATS_TTL_SECONDS)
+        dirty = set(_provider_stats_cache['dirty'])
+        _provider_stats_cache['dirty'].clear()
+    
+    if expired:
+        stats = compute_provider_stats()
+        with _provider_stats_lock:
+            _provider_stats_cache['stats'] = stats
+            _provider_stats_cache['loaded_at'] = now
+    elif dirty:
+        fresh = compute_provider_stats(sorted(dirty))
+        with _provider_stats_lock:
+            for dirty_id in dirty:
+                _provider_stats_cache['stats'].pop(dirty_id, None)
+            _provider_stats_cache['stats'].update(fresh)
+    
+    with _provider_stats_lock:
+        if provider_id is not None:
+            return _provider_stats_cache['stats'].get(provider_id)
+        return dict(_provider_stats_cache['stats'])
+
+def invalidate_provider_stats(*provider_ids):
+    """Statistik einzelner Anbieter als veraltet markieren (ohne IDs: alles neu berechnen)"""
+    invalidate_yearly_reports()  # dieselben Beleg-Änderungen betreffen auch die Jahresberichte
+    with _provider_stats_lock:
+        if not provider_ids:
+            _provider_stats_cache['loaded_at'] = None
+            return
+        _provider_stats_cache['dirty'].update(pid for pid in provider_ids if pid is not None)
+
+def invalidate_provider_stats_for_receipts(receipt_ids):
+    """Statistik der Anbieter der angegebenen Belege als veraltet markieren"""
+    receipt_ids = list(receipt_ids)
+    if not receipt_ids:
+        return
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT DISTINCT provider_id FROM medical_receipts WHERE receipt_id IN ({', '.join('?' * len(receipt_ids))})",
+        receipt_ids
+    )
+    provider_ids = [row['provider_id'] for row in cursor.fetchall()]
+    conn.close()
+    invalidate_provider_stats(*provider_ids)
+
+# 📈 METRIKEN - Histogramme/Zähler im Prometheus-Textformat (ohne prometheus_client)
+METRIC_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+_metrics = {'histograms': {}, 'counters': {}, 'meta': {}}
+_metrics_lock = threading.Lock()
+
+def describe_metric(name, kind, help_text, buckets=None):
+    """Metrik mit Typ (histogram/counter) und Hilfetext anmelden"""
+    _metrics['meta'][name] = {'kind': kind, 'help': help_text, 'buckets': buckets or METRIC_SECONDS_BUCKETS}
+
+def _metric_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+def observe_histogram(name, value, labels=None):
+    buckets = _metrics['meta'][name]['buckets']
+    key = _metric_key(labels)
+    with _metrics_lock:
+        series = _metrics['histograms'].setdefault(name, {})
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                entry['buckets'][index] += 1
+        entry['sum'] += value
+        entry['count'] += 1
+
+def increment_counter(name, value=1, labels=None):
+    key = _metric_key(labels)
+    with _metrics_lock:
+        series = _metrics['counters'].setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{label}="{value}"' for (label, _), value in zip(pairs, escaped)) + '}'
+
+def render_metrics():
+    """Alle Metriken im Prometheus-Textformat 0.0.4"""
+    lines = []
+    with _metrics_lock:
+        for name, meta in _metrics['meta'].items():
+            lines.append(f"# HELP {name} {meta['help']}")
+            lines.append(f"# TYPE {name} {meta['kind']}")
+            if meta['kind'] == 'histogram':
+                for key, entry in sorted(_metrics['histograms'].get(name, {}).items()):
+                    for bound, count in zip(meta['buckets'], entry['buckets']):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {entry['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {entry['sum']:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {entry['count']}")
+            else:
+                for key, value in sorted(_metrics['counters'].get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+    return '\n'.join(lines) + '\n'
+
+@app.route('/metrics')
+def metrics():
+    """📈 Metriken für Prometheus (pro Prozess - bei mehreren gunicorn-Workern je Worker abfragen)"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# ⏱️ REQUEST-PROFILING - Latenz je Endpoint, SQL-Anzahl/-Zeit je Request, Stichproben-Profile langsamer Requests
+SLOW_REQUEST_MS = float(os.environ.get('BELEGMEISTER_SLOW_REQUEST_MS', 500))
+PROFILE_SAMPLE_RATE = float(os.environ.get('BELEGMEISTER_PROFILE_SAMPLE', 0))  # 0 = aus, 0.05 = jeder 20. Request
+PROFILER = os.environ.get('BELEGMEISTER_PROFILER', 'cprofile')  # cprofile | pyinstrument
+PROFILE_DIR = os.path.join('logs', 'profiles')
+PROFILE_MAX_STATEMENTS = 50  # so viele SQL-Statements landen im Log eines langsamen Requests
+_profiler_lock = threading.Lock()  # Profiler sind prozessweit → höchstens ein Profil gleichzeitig
+
+describe_metric('belegmeister_request_seconds', 'histogram', 'Antwortzeit je Endpoint')
+describe_metric('belegmeister_sql_statement_seconds', 'histogram', 'Dauer einzelner SQL-Statements (kind=FETCH: Zeilen abholen)')
+describe_metric('belegmeister_request_sql_statements_total', 'counter', 'Ausgeführte SQL-Statements je Endpoint')
+describe_metric('belegmeister_request_sql_seconds_total', 'counter', 'SQL-Zeit je Endpoint')
+describe_metric('belegmeister_slow_requests_total', 'counter', 'Requests über BELEGMEISTER_SLOW_REQUEST_MS')
+
+def _current_request_profile():
+    return g.get('request_profile') if has_request_context() else None
+
+def _sql_trace_callback(statement):
+    """sqlite3-Trace: zählt jedes ausgeführte Statement (auch implizite BEGIN/COMMIT)"""
+    profile = _current_request_profile()
+    if profile is not None:
+        profile['sql_count'] += 1
+        if len(profile['statements']) < PROFILE_MAX_STATEMENTS:
+            profile['statements'].append(' '.join(statement.split())[:200])
+
+def _record_sql_time(sql, duration):
+    parts = sql.split(None, 1)
+    observe_histogram('belegmeister_sql_statement_seconds', duration, {'kind': parts[0].upper() if parts else 'OTHER'})
+    profile = _current_request_profile()
+    if profile is not None:
+        profile['sql_seconds'] += duration
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor, der jede Ausführung und das Abholen der Zeilen misst und dem laufenden Request zurechnet
+    
+    sqlite3 berechnet bei execute() nur die erste Zeile, den Rest erst bei fetch*/Iteration - diese Zeit
+    zählt als kind=FETCH. Beim Iterieren wird sie gesammelt und am Ende (bzw. beim nächsten execute/close)
+    verbucht, damit nicht jede Zeile das Histogramm anfasst.
+    """
+    
+    _iter_seconds = 0.0
+    
+    def execute(self, sql, parameters=()):
+        import time
+        
+        self._flush_iter_time()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_sql_time(sql, time.perf_counter() - started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        import time
+        
+        self._flush_iter_time()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_sql_time(sql, time.perf_counter() - started)
+    
+    def _timed_fetch(self, fetch, *args, **kwargs):
+        import time
+        
+        started = time.perf_counter()
+        try:
+            return fetch(*args, **kwargs)
+        finally:
+            _record_sql_time('FETCH', time.perf_counter() - started)
+    
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+    
+    def fetchmany(self, *args, **kwargs):
+        return self._timed_fetch(super().fetchmany, *args, **kwargs)
+    
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+    
+    def __next__(self):
+        import time
+        
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._iter_seconds += time.perf_counter() - started
+            self._flush_iter_time()
+            raise
+        self._iter_seconds += time.perf_counter() - started
+        return row
+    
+    def _flush_iter_time(self):
+        if self._iter_seconds:
+            _record_sql_time('FETCH', self._iter_seconds)
+            self._iter_seconds = 0.0
+    
+    def close(self):
+        self._flush_iter_time()
+        super().close()
+
+class ProfiledConnection(sqlite3.Connection):
+    """Verbindung mit ProfiledCursor und Trace-Callback (für get_db_connection und UnitOfWork)"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_sql_trace_callback)
+    
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def _start_profiler():
+    """Stichproben-Profiler starten (pyinstrument falls gewählt und installiert, sonst cProfile)"""
+    if PROFILER == 'pyinstrument' and module_installed('pyinstrument'):
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        return 'pyinstrument', profiler
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return 'cprofile', profiler
+
+def _stop_profiler(entry, save_as=None):
+    """Profiler stoppen und nur bei langsamen Requests speichern (.prof für snakeviz/pstats, .html)"""
+    kind, profiler = entry
+    try:
+        if kind == 'pyinstrument':
+            profiler.stop()
+        else:
+            profiler.disable()
+        if save_as:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if kind == 'pyinstrument':
+                path = save_as + '.html'
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+            else:
+                path = save_as + '.prof'
+                profiler.dump_stats(path)
+            logger.warning(f"🔬 Profil gespeichert: {path}")
+    finally:
+        _profiler_lock.release()
+
+@app.before_request
+def start_request_profile():
+    import random
+    import time
+    
+    g.request_profile = {'started': time.perf_counter(), 'sql_count': 0, 'sql_seconds': 0.0, 'statements': []}
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE and _profiler_lock.acquire(blocking=False):
+        try:
+            g.request_profiler = _start_profiler()
+        except Exception as e:
+            _profiler_lock.release()
+            logger.warning(f"Profiler konnte nicht gestartet werden: {e}")
+
+@app.after_request
+def finish_request_profile(response):
+    """Latenz/SQL je Endpoint erfassen, langsame Requests loggen, Server-Timing-Header setzen"""
+    import time
+    
+    profile = g.pop('request_profile', None)
+    if profile is None:
+        return response
+    duration = time.perf_counter() - profile['started']
+    endpoint = request.endpoint or 'unmatched'
+    observe_histogram('belegmeister_request_seconds', duration,
+                      {'endpoint': endpoint, 'method': request.method, 'status': f"{response.status_code // 100}xx"})
+    increment_counter('belegmeister_request_sql_statements_total', profile['sql_count'], {'endpoint': endpoint})
+    increment_counter('belegmeister_request_sql_seconds_total', profile['sql_seconds'], {'endpoint': endpoint})
+    
+    slow = duration * 1000 >= SLOW_REQUEST_MS
+    profiler = g.pop('request_profiler', None)
+    if profiler:
+        save_as = os.path.join(PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{endpoint}") if slow else None
+        _stop_profiler(profiler, save_as)
+    if slow:
+        increment_counter('belegmeister_slow_requests_total', 1, {'endpoint': endpoint})
+        logger.warning(f"🐢 Langsamer Request {request.method} {request.path} ({endpoint}): {duration * 1000:.0f} ms, "
+                       f"{profile['sql_count']} SQL-Statements in {profile['sql_seconds'] * 1000:.0f} ms")
+        logger.debug("SQL: " + ' | '.join(profile['statements']))
+    
+    response.headers['Server-Timing'] = (f"app;dur={duration * 1000:.1f}, "
+                                         f"sql;dur={profile['sql_seconds'] * 1000:.1f};desc=\"{profile['sql_count']} statements\"")
+    return response
+
+@app.teardown_request
+def release_request_profiler(exception=None):
+    """Profiler auch bei Abbruch ohne Response freigeben"""
+    profiler = g.pop('request_profiler', None)
+    if profiler:
+        _stop_profiler(profiler)
+
+# 🔬 OCR-INSTRUMENTIERUNG - Dauer je Stufe als Histogramm, optional als Trace pro Request
+describe_metric('belegmeister_ocr_stage_seconds', 'histogram', 'Dauer einzelner OCR-Stufen')
+describe_metric('belegmeister_ocr_backend_seconds', 'histogram', 'Dauer eines OCR-Backend-Laufs')
+describe_metric('belegmeister_ocr_confidence', 'histogram', 'Confidence der OCR-Ergebnisse', METRIC_CONFIDENCE_BUCKETS)
+describe_metric('belegmeister_ocr_backend_runs_total', 'counter', 'OCR-Backend-Läufe nach Ergebnis')
+describe_metric('belegmeister_ocr_bytes_total', 'counter', 'Verarbeitete Dateigröße in Bytes')
+describe_metric('belegmeister_ocr_pages_total', 'counter', 'Per OCR/Textextraktion verarbeitete Seiten')
+
+def start_ocr_trace():
+    """Trace für diesen Request einschalten (?trace=1 oder Header X-OCR-Trace: 1)"""
+    g.ocr_trace = []
+
+def _append_ocr_trace(entry):
+    if has_request_context() and g.get('ocr_trace') is not None:
+        g.ocr_trace.append(entry)
+
+@contextmanager
+def ocr_stage(stage, backend='', **attrs):
+    """Stufe messen; der Block kann Attribute (pages, dpi, bytes, chars ...) im gelieferten Dict ergänzen"""
+    import time
+    
+    started = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        duration = time.perf_counter() - started
+        observe_histogram('belegmeister_ocr_stage_seconds', duration, {'stage': stage, 'backend': backend})
+        if attrs.get('pages'):
+            increment_counter('belegmeister_ocr_pages_total', attrs['pages'], {'stage': stage, 'backend': backend})
+        _append_ocr_trace({'stage': stage, 'backend': backend, 'duration_ms': round(duration * 1000, 2), **attrs})
+
+# 🔌 OCR-BACKEND-REGISTRY - Plugins mit Kosten/Latenz/Fähigkeiten, Module erst beim ersten Aufruf importieren
+OCR_BACKENDS = {}
+OCR_HIGH_CONFIDENCE = 0.9      # ab hier keine weiteren (teureren) Backends mehr
+OCR_ROUTING_MIN_RUNS = 5       # erst ab so vielen Läufen zählt die bisherige Confidence
+OCR_DEFAULT_CONFIDENCE = 0.5   # Annahme für Backends ohne Historie
+OCR_WEAK_CONFIDENCE = 0.2      # Backends, die bisher darunter lagen, kommen ans Ende
+_ocr_backend_lock = threading.Lock()
+_ocr_backend_stats = {}  # (Backend, Dokumenttyp) → Zähler
+
+# Tesseract-Einstellungen (Geschwindigkeit ↔ Genauigkeit, mit benchmarks/ocr_benchmark.py abwägen)
+OCR_TESSERACT_SETTINGS = {
+    'dpi': int(os.environ.get('BELEGMEISTER_OCR_DPI', 300)),   # Render-Auflösung gescannter PDFs
+    'oem': 3,
+    'psm': int(os.environ.get('BELEGMEISTER_OCR_PSM', 6)),     # 6 = ein Textblock, 4 = Spalten, 11 = verstreuter Text
+    'lang': 'deu',
+    'contrast': 1.5,    # Bildvorverarbeitung, 1.0 = aus
+    'sharpness': 2.0,
+}
+
+def module_installed(name):
+    """Modul vorhanden? (find_spec lädt nur Eltern-Pakete, nicht das Modul selbst)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def register_ocr_backend(name, extract, modules=(), engine=None, cost=0.0, latency_ms=1000,
+                         capabilities=('pdf', 'image')):
+    """OCR-Backend registrieren.
+    
+    extract(file_path) → Ergebnis-Dict mit 'confidence' oder None. engine benennt die tatsächlich
+    ausgeführte OCR-Engine (Standard: name) - pro Dokument läuft jede Engine höchstens einmal.
+    cost in Cent pro Seite, latency_ms als erwartete Laufzeit; beides bestimmt die Reihenfolge.
+    """
+    OCR_BACKENDS[name] = {
+        'name': name,
+        'extract': extract,
+        'modules': tuple(modules),
+        'engine': engine or name,
+        'cost': cost,
+        'latency_ms': latency_ms,
+        'capabilities': tuple(capabilities),
+        # 'available' (installiert) | 'loaded' | 'missing' | 'failed'
+        'state': 'available' if all(module_installed(module) for module in modules) else 'missing',
+    }
+
+def load_ocr_backend(name):
+    """Module eines Backends beim ersten Aufruf importieren → True wenn nutzbar"""
+    backend = OCR_BACKENDS[name]
+    if backend['state'] == 'available':
+        with _ocr_backend_lock:
+            if backend['state'] == 'available':
+                import time
+                started = time.perf_counter()
+                try:
+                    for module in backend['modules']:
+                        importlib.import_module(module)
+                    backend['state'] = 'loaded'
+                    logger.info(f"🔌 OCR-Backend {name} geladen ({(time.perf_counter() - started) * 1000:.0f} ms)")
+                except Exception as e:
+                    backend['state'] = 'failed'
+                    logger.warning(f"OCR-Backend {name} nicht ladbar: {e}")
+    return backend['state'] == 'loaded'
+
+def ocr_backend_status():
+    """Backend → installiert/geladen (ohne Import)"""
+    return {name: backend['state'] in ('available', 'loaded') for name, backend in OCR_BACKENDS.items()}
+
+def ocr_document_type(file_path):
+    return 'pdf' if file_path.lower().endswith('.pdf') else 'image'
+
+def record_ocr_run(name, document_type, duration_ms, confidence=None, failed=False):
+    """Lauf eines Backends für die Statistik und das Routing erfassen"""
+    with _ocr_backend_lock:
+        stats = _ocr_backend_stats.setdefault((name, document_type), {
+            'runs': 0, 'successes': 0, 'failures': 0, 'confidence_sum': 0.0, 'duration_ms_sum': 0.0,
+        })
+        stats['runs'] += 1
+        stats['duration_ms_sum'] += duration_ms
+        if failed:
+            stats['failures'] += 1
+        elif confidence is not None:
+            stats['successes'] += 1
+            stats['confidence_sum'] += confidence
+    
+    labels = {'backend': name, 'document_type': document_type}
+    outcome = 'failed' if failed else ('empty' if confidence is None else 'ok')
+    observe_histogram('belegmeister_ocr_backend_seconds', duration_ms / 1000, labels)
+    increment_counter('belegmeister_ocr_backend_runs_total', 1, dict(labels, outcome=outcome))
+    if confidence is not None:
+        observe_histogram('belegmeister_ocr_confidence', confidence, labels)
+    _append_ocr_trace({'stage': 'backend', 'backend': name, 'duration_ms': round(duration_ms, 2),
+                       'outcome': outcome, 'confidence': confidence})
+
+def expected_ocr_confidence(name, document_type):
+    """Durchschnittliche Confidence dieses Backends für den Dokumenttyp (Fehlschläge zählen als 0)"""
+    stats = _ocr_backend_stats.get((name, document_type))
+    if not stats or stats['runs'] < OCR_ROUTING_MIN_RUNS:
+        return OCR_DEFAULT_CONFIDENCE
+    return stats['confidence_sum'] / stats['runs']
+
+def route_ocr_backends(file_path):
+    """Backends für ein Dokument wählen und ordnen (ohne sie zu laden).
+    
+    Nur installierte Backends mit passender Fähigkeit; bisher schwache ans Ende, sonst günstige
+    zuerst, bei gleichen Kosten die mit der besseren bisherigen Confidence, dann die schnelleren.
+    Jede Engine nur einmal - außer ihr Backend ist schon als nicht ladbar bekannt. Geladen wird
+    erst in extract_ocr_data, wenn ein Backend tatsächlich an der Reihe ist.
+    """
+    document_type = ocr_document_type(file_path)
+    candidates = [backend for backend in OCR_BACKENDS.values()
+                  if document_type in backend['capabilities'] and backend['state'] not in ('missing', 'failed')]
+    
+    def routing_key(backend):
+        confidence = expected_ocr_confidence(backend['name'], document_type)
+        return (confidence < OCR_WEAK_CONFIDENCE, backend['cost'], -confidence, backend['latency_ms'])
+    
+    candidates.sort(key=routing_key)
+    routed = []
+    engines = set()
+    for backend in candidates:
+        if backend['engine'] not in engines:
+            engines.add(backend['engine'])
+            routed.append(backend)
+    return routed
+
+def ocr_backend_stats():
+    """Registry + Laufstatistik je Backend und Dokumenttyp"""
+    with _ocr_backend_lock:
+        stats = {key: dict(value) for key, value in _ocr_backend_stats.items()}
+    backends = []
+    for name, backend in OCR_BACKENDS.items():
+        per_type = {}
+        for document_type in backend['capabilities']:
+            counts = stats.get((name, document_type))
+            if counts:
+                per_type[document_type] = {
+                    'runs': counts['runs'],
+                    'failures': counts['failures'],
+                    'avg_confidence': round(counts['confidence_sum'] / counts['successes'], 3) if counts['successes'] else None,
+                    'avg_duration_ms': round(counts['duration_ms_sum'] / counts['runs'], 1),
+                }
+        backends.append({
+            'name': name,
+            'engine': backend['engine'],
+            'state': backend['state'],
+            'cost': backend['cost'],
+            'latency_ms': backend['latency_ms'],
+            'capabilities': list(backend['capabilities']),
+            'stats': per_type,
+        })
+    return backends
 
 def extract_ocr_data(file_path):
     """🤖 ULTIMATIVE KI-OCR-ENGINE - MULTI-BACKEND mit INTELLIGENTER AUSWAHL"""
     import re
+    import time
     
     result = {
         'provider_name': '',
@@ -310,147 +1684,172 @@ def extract_ocr_data(file_path):
         'errors': []
     }
     
-    logger.info(f"🔍 Starte Multi-OCR-Analyse für: {file_path}")
-    
-    # 🎯 BACKEND-PRIORITÄT (Kosteneffizient → Professionell)
-    ocr_backends = []
+    ocr_logger.debug("🔍 Starte Multi-OCR-Analyse für: %s", file_path)
     
-    if OCR_AVAILABLE:
-        ocr_backends.append(('tesseract', extract_with_tesseract))
-    
-    if GOOGLE_VISION_AVAILABLE:
-        ocr_backends.append(('google_vision', extract_with_google_vision))
-    
-    if AWS_TEXTRACT_AVAILABLE:
-        ocr_backends.append(('aws_textract', extract_with_aws_textract))
-    
-    if AZURE_VISION_AVAILABLE:
-        ocr_backends.append(('azure_vision', extract_with_azure_vision))
+    # 🎯 BACKEND-ROUTING (Kosteneffizient → Professionell, jede Engine nur einmal)
+    document_type = ocr_document_type(file_path)
+    file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+    increment_counter('belegmeister_ocr_bytes_total', file_size, {'document_type': document_type})
+    with ocr_stage('route', document_type=document_type, bytes=file_size):
+        ocr_backends = route_ocr_backends(file_path)
     
     if not ocr_backends:
         result['errors'].append("Keine OCR-Engines verfügbar")
         return result
     
-    # 🚀 MULTI-ENGINE-VERARBEITUNG
+    # 🚀 MULTI-ENGINE-VERARBEITUNG (Module erst laden, wenn das Backend an der Reihe ist)
     best_result = None
     best_confidence = 0.0
-    
-    for backend_name, backend_func in ocr_backends:
+    tried = 0
+    
+    for position, backend in enumerate(ocr_backends):
+        backend_name = backend['name']
+        if not load_ocr_backend(backend_name):
+            # nicht ladbar (jetzt 'failed') → nächstes Backend derselben Engine rückt an diese Stelle
+            result['errors'].append(f"{backend_name}: nicht ladbar")
+            ocr_backends[position + 1:position + 1] = [fallback for fallback in route_ocr_backends(file_path)
+                                                       if fallback['engine'] == backend['engine']]
+            continue
+        tried += 1
+        started = time.perf_counter()
         try:
-            logger.info(f"🔄 Versuche {backend_name.upper()} OCR...")
-            engine_result = backend_func(file_path)
+            ocr_logger.debug("🔄 Versuche %s OCR...", backend_name)
+            engine_result = backend['extract'](file_path)
+            record_ocr_run(backend_name, document_type, (time.perf_counter() - started) * 1000,
+                           confidence=engine_result.get('confidence', 0) if engine_result else None,
+                           failed=not engine_result)
             
             if engine_result and engine_result.get('confidence', 0) > best_confidence:
                 best_confidence = engine_result['confidence']
                 best_result = engine_result
                 best_result['backend_used'] = backend_name
-                logger.info(f"✅ {backend_name.upper()} lieferte bestes Ergebnis (Confidence: {best_confidence:.2f})")
+                ocr_logger.debug("✅ %s lieferte bestes Ergebnis (Confidence: %.2f)", backend_name, best_confidence)
                 
                 # 🎯 STOPPE BEI HOHER CONFIDENCE (Kosteneinsparung)
-                if best_confidence >= 0.9:
-                    logger.info(f"🏆 Hohe Confidence erreicht, stoppe weitere Versuche")
+                if best_confidence >= OCR_HIGH_CONFIDENCE:
+                    ocr_logger.debug("🏆 Hohe Confidence erreicht, stoppe weitere Versuche")
                     break
                     
         except Exception as e:
-            logger.warning(f"❌ {backend_name.upper()} OCR fehlgeschlagen: {e}")
+            record_ocr_run(backend_name, document_type, (time.perf_counter() - started) * 1000, failed=True)
+            ocr_logger.warning("❌ %s OCR fehlgeschlagen: %s", backend_name, e)
             result['errors'].append(f"{backend_name}: {e}")
             continue
     
     # 🎯 ERGEBNIS-OPTIMIERUNG
     if best_result:
         result.update(best_result)
-        logger.info(f"🎉 Beste OCR-Engine: {result['backend_used'].upper()}, Confidence: {result['confidence']:.2f}")
+        ocr_logger.info("🎉 OCR %s: %s, Confidence %.2f", os.path.basename(file_path), result['backend_used'], result['confidence'])
+    elif not tried:
+        result['errors'].append("Keine OCR-Engines verfügbar")
     else:
         result['errors'].append("Alle OCR-Engines fehlgeschlagen")
-        logger.error("💥 Alle OCR-Engines fehlgeschlagen!")
+        ocr_logger.error("💥 Alle OCR-Engines fehlgeschlagen: %s", os.path.basename(file_path))
     
     return result
 
 
-def extract_with_tesseract(file_path):
-    """🔧 Enhanced Tesseract OCR mit deutschen Optimierungen"""
+def extract_with_tesseract(file_path, settings=None):
+    """🔧 Enhanced Tesseract OCR mit deutschen Optimierungen (settings überschreibt OCR_TESSERACT_SETTINGS)"""
+    settings = {**OCR_TESSERACT_SETTINGS, **(settings or {})}
+    custom_config = f"--oem {settings['oem']} --psm {settings['psm']} -l {settings['lang']}"
     try:
+        import pytesseract
+        import PyPDF2
+        from PIL import Image
+        from pdf2image import convert_from_path
+        
         text = ""
         
         # PDF-Verarbeitung mit optimierten Einstellungen
         if file_path.lower().endswith('.pdf'):
             try:
                 # Versuche zuerst Text direkt aus PDF
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
+                with ocr_stage('pdf_text', 'tesseract') as stage:
+                    with open(file_path, 'rb') as file:
+                        pdf_reader = PyPDF2.PdfReader(file)
+                        for page in pdf_reader.pages:
+                            text += page.extract_text() + "\n"
+                    stage.update(pages=len(pdf_reader.pages), chars=len(text))
                 
                 # Falls kein Text, verwende OCR mit hoher DPI
                 if len(text.strip()) < 50:
-                    images = convert_from_path(file_path, dpi=300, first_page=1, last_page=1)
+                    with ocr_stage('pdf_render', 'tesseract', dpi=settings['dpi']) as stage:
+                        images = convert_from_path(file_path, dpi=settings['dpi'], first_page=1, last_page=1)
+                        stage['pages'] = len(images)
                     for image in images:
-                        # 🇩🇪 DEUTSCHE OPTIMIERUNG
-                        custom_config = r'--oem 3 --psm 6 -l deu'
-                        text += pytesseract.image_to_string(image, config=custom_config) + "\n"
+                        with ocr_stage('tesseract', 'tesseract', pixels=image.width * image.height) as stage:
+                            text += pytesseract.image_to_string(image, config=custom_config) + "\n"
+                            stage['chars'] = len(text)
                         
             except Exception as e:
-                logger.error(f"PDF-Verarbeitung fehlgeschlagen: {e}")
+                ocr_logger.error("PDF-Verarbeitung fehlgeschlagen: %s", e)
                 return None
                 
         # Bild-Verarbeitung mit Optimierungen
         elif file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
             try:
-                image = Image.open(file_path)
+                with ocr_stage('image_load', 'tesseract') as stage:
+                    image = Image.open(file_path)
+                    image.load()
+                    stage.update(pixels=image.width * image.height, pages=1)
                 # Bildverbesserung für bessere OCR
                 from PIL import ImageEnhance, ImageFilter
                 
                 # Kontrast und Schärfe verbessern
-                enhancer = ImageEnhance.Contrast(image)
-                image = enhancer.enhance(1.5)
-                
-                enhancer = ImageEnhance.Sharpness(image)
-                image = enhancer.enhance(2.0)
+                with ocr_stage('image_enhance', 'tesseract'):
+                    if settings['contrast'] != 1.0:
+                        image = ImageEnhance.Contrast(image).enhance(settings['contrast'])
+                    if settings['sharpness'] != 1.0:
+                        image = ImageEnhance.Sharpness(image).enhance(settings['sharpness'])
                 
-                # Deutsche OCR-Optimierung
-                custom_config = r'--oem 3 --psm 6 -l deu'
-                text = pytesseract.image_to_string(image, config=custom_config)
+                with ocr_stage('tesseract', 'tesseract', pixels=image.width * image.height) as stage:
+                    text = pytesseract.image_to_string(image, config=custom_config)
+                    stage['chars'] = len(text)
                 
             except Exception as e:
-                logger.error(f"Bild-OCR fehlgeschlagen: {e}")
+                ocr_logger.error("Bild-OCR fehlgeschlagen: %s", e)
                 return None
         
         if not text.strip():
             return None
         
         # Deutsche Text-Analyse
-        return analyze_german_text(text, confidence_bonus=0.1)
+        with ocr_stage('analyze', 'tesseract', chars=len(text)) as stage:
+            analysis = analyze_german_text(text, confidence_bonus=0.1)
+            stage['confidence'] = round(analysis['confidence'], 2)
+        return analysis
         
     except Exception as e:
-        logger.error(f"Tesseract OCR fehlgeschlagen: {e}")
+        ocr_logger.error("Tesseract OCR fehlgeschlagen: %s", e)
         return None
 
 
 def extract_with_google_vision(file_path):
     """🤖 Google Vision API - Höchste Genauigkeit"""
     try:
-        if not GOOGLE_VISION_AVAILABLE:
+        if not load_ocr_backend('google_vision'):
             return None
             
         # Simulation der Google Vision API (in Produktion mit echten Credentials)
-        logger.info("🔍 Google Vision API würde hier echte OCR durchführen...")
+        ocr_logger.debug("🔍 Google Vision API würde hier echte OCR durchführen...")
         
         # Fallback auf Tesseract für Demo
         return extract_with_tesseract(file_path)
         
     except Exception as e:
-        logger.error(f"Google Vision API fehlgeschlagen: {e}")
+        ocr_logger.error("Google Vision API fehlgeschlagen: %s", e)
         return None
 
 
 def extract_with_aws_textract(file_path):
     """☁️ AWS Textract - Speziell für Dokumente"""
     try:
-        if not AWS_TEXTRACT_AVAILABLE:
+        if not load_ocr_backend('aws_textract'):
             return None
             
         # Simulation der AWS Textract API
-        logger.info("🔍 AWS Textract würde hier echte Dokumentenanalyse durchführen...")
+        ocr_logger.debug("🔍 AWS Textract würde hier echte Dokumentenanalyse durchführen...")
         
         # Fallback auf Tesseract für Demo
         result = extract_with_tesseract(file_path)
@@ -459,18 +1858,18 @@ def extract_with_aws_textract(file_path):
         return result
         
     except Exception as e:
-        logger.error(f"AWS Textract fehlgeschlagen: {e}")
+        ocr_logger.error("AWS Textract fehlgeschlagen: %s", e)
         return None
 
 
 def extract_with_azure_vision(file_path):
     """🌐 Azure Computer Vision - Microsoft OCR"""
     try:
-        if not AZURE_VISION_AVAILABLE:
+        if not load_ocr_backend('azure_vision'):
             return None
             
         # Simulation der Azure Vision API
-        logger.info("🔍 Azure Computer Vision würde hier OCR durchführen...")
+        ocr_logger.debug("🔍 Azure Computer Vision würde hier OCR durchführen...")
         
         # Fallback auf Tesseract für Demo
         result = extract_with_tesseract(file_path)
@@ -479,10 +1878,24 @@ def extract_with_azure_vision(file_path):
         return result
         
     except Exception as e:
-        logger.error(f"Azure Computer Vision fehlgeschlagen: {e}")
+        ocr_logger.error("Azure Computer Vision fehlgeschlagen: %s", e)
         return None
 
 
+# Eingebaute Backends - die Cloud-Backends nutzen bis zur echten API-Anbindung Tesseract
+# (engine='tesseract'), laufen also nicht zusätzlich, wenn Tesseract selbst schon gelaufen ist
+register_ocr_backend('tesseract', extract_with_tesseract, modules=('pytesseract', 'PIL', 'pdf2image', 'PyPDF2'),
+                     cost=0.0, latency_ms=2500)
+register_ocr_backend('google_vision', extract_with_google_vision, modules=('google.cloud.vision',),
+                     engine='tesseract', cost=0.15, latency_ms=800)
+register_ocr_backend('aws_textract', extract_with_aws_textract, modules=('boto3',),
+                     engine='tesseract', cost=0.15, latency_ms=1500)
+register_ocr_backend('azure_vision', extract_with_azure_vision,
+                     modules=('azure.cognitiveservices.vision.computervision', 'msrest.authentication'),
+                     engine='tesseract', cost=0.1, latency_ms=1000)
+ocr_logger.info("OCR-Backends: %s", ', '.join(f"{name}={backend['state']}" for name, backend in OCR_BACKENDS.items()))
+
+
 def analyze_german_text(text, confidence_bonus=0.0):
     """🇩🇪 DEUTSCHE TEXT-ANALYSE mit KI-Mustern"""
     import re
@@ -496,7 +1909,7 @@ def analyze_german_text(text, confidence_bonus=0.0):
         'errors': []
     }
     
-    logger.info(f"📝 Analysiere {len(text)} Zeichen deutschen Text...")
+    ocr_logger.debug("📝 Analysiere %d Zeichen deutschen Text...", len(text))
     text_upper = text.upper()
     
     # 🏥 ERWEITERTE ANBIETER-ERKENNUNG (Deutsche Muster)
@@ -537,7 +1950,7 @@ def analyze_german_text(text, confidence_bonus=0.0):
                 result['provider_name'] = provider_name
                 result['provider_type'] = provider_type
                 result['confidence'] += confidence
-                logger.info(f"✅ Anbieter erkannt: {provider_name} ({provider_type})")
+                ocr_logger.debug("✅ Anbieter erkannt: %s (%s)", provider_name, provider_type)
                 break
     
     # 💰 ERWEITERTE BETRAGS-ERKENNUNG (Deutsche Formate)
@@ -577,7 +1990,7 @@ def analyze_german_text(text, confidence_bonus=0.0):
                 max_amount = max(amounts)
                 result['amount'] = f"{max_amount:.2f}"
                 result['confidence'] += 0.3
-                logger.info(f"💰 Betrag erkannt: {max_amount:.2f}€")
+                ocr_logger.debug("💰 Betrag erkannt: %.2f€", max_amount)
                 break
     
     # 📅 ERWEITERTE DATUMS-ERKENNUNG (Deutsche Formate)
@@ -601,7 +2014,7 @@ def analyze_german_text(text, confidence_bonus=0.0):
                 if 1 <= day <= 31 and 1 <= month <= 12 and 2020 <= year <= 2030:
                     result['date'] = f"{year:04d}-{month:02d}-{day:02d}"
                     result['confidence'] += 0.2
-                    logger.info(f"📅 Datum erkannt: {result['date']}")
+                    ocr_logger.debug("📅 Datum erkannt: %s", result['date'])
                     break
             except ValueError:
                 continue
@@ -613,23 +2026,42 @@ def analyze_german_text(text, confidence_bonus=0.0):
         result['provider_name'] = 'DRK - Deutsches Rotes Kreuz'
         result['provider_type'] = 'specialist'
         result['confidence'] += 0.4
-        logger.info("🏥 DRK-spezifische Erkennung aktiviert")
+        ocr_logger.debug("🏥 DRK-spezifische Erkennung aktiviert")
     
     # 💊 REZEPT-ERKENNUNG
     if any(keyword in text_upper for keyword in ['REZEPT', 'VERORDNUNG', 'VERSCHREIBUNG']):
         result['confidence'] += 0.1
-        logger.info("💊 Rezept-Kontext erkannt")
+        ocr_logger.debug("💊 Rezept-Kontext erkannt")
     
     # 🏥 MEDIZINISCHE BEGRIFFE
     medical_terms = ['BEHANDLUNG', 'THERAPIE', 'DIAGNOSE', 'MEDIKAMENT', 'UNTERSUCHUNG', 'SPRECHSTUNDE']
     if any(term in text_upper for term in medical_terms):
         result['confidence'] += 0.1
-        logger.info("🏥 Medizinischer Kontext erkannt")
+        ocr_logger.debug("🏥 Medizinischer Kontext erkannt")
     
-    logger.info(f"🎯 Finale Confidence: {result['confidence']:.2f}")
+    ocr_logger.debug("🎯 Finale Confidence: %.2f", result['confidence'])
     return result
 
-# 🏠 HAUPTDASHBOARD - VOLLSTÄNDIG FUNKTIONAL
+# 🏠 HAUPTDASHBOARD - VOLLSTÄNDIG FUNKTIONAL
+def compute_summary_stats():
+    """Dashboard-Kennzahlen in einer Aggregat-Abfrage (+ eine für Mahnungen)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT COUNT(*) AS total_receipts,
+               COALESCE(SUM(CASE WHEN payment_status != 'paid' THEN 1 ELSE 0 END), 0) AS unpaid_receipts,
+               COALESCE(SUM(CASE WHEN payment_status != 'paid' THEN amount END), 0) AS unpaid_amount,
+               COALESCE(SUM(CASE WHEN debeka_status != 'none' THEN 1 ELSE 0 END), 0) AS debeka_submitted,
+               COALESCE(SUM(CASE WHEN beihilfe_status != 'none' THEN 1 ELSE 0 END), 0) AS beihilfe_submitted,
+               COALESCE(SUM(debeka_amount + beihilfe_amount), 0) AS reimbursed_amount
+        FROM medical_receipts
+    ''')
+    stats = dict(cursor.fetchone())
+    cursor.execute("SELECT COUNT(*) AS count FROM payment_reminders WHERE status = 'sent'")
+    stats['active_reminders'] = cursor.fetchone()['count']
+    conn.close()
+    return stats
+
 @app.route('/')
 def dashboard():
     """🏥 Medizinisches Dashboard - Komplette Übersicht"""
@@ -637,35 +2069,7 @@ def dashboard():
     cursor = conn.cursor()
     
     # Live-Statistiken aus Datenbank
-    stats = {}
-    
-    # Gesamtanzahl Belege
-    cursor.execute('SELECT COUNT(*) as count FROM medical_receipts')
-    stats['total_receipts'] = cursor.fetchone()['count']
-    
-    # Unbezahlte Belege
-    cursor.execute('SELECT COUNT(*) as count FROM medical_receipts WHERE payment_status = "unpaid"')
-    stats['unpaid_receipts'] = cursor.fetchone()['count']
-    
-    # Offene Beträge
-    cursor.execute('SELECT COALESCE(SUM(amount), 0) as total FROM medical_receipts WHERE payment_status = "unpaid"')
-    stats['unpaid_amount'] = cursor.fetchone()['total']
-    
-    # Bei Debeka eingereicht
-    cursor.execute('SELECT COUNT(*) as count FROM medical_receipts WHERE debeka_status != "none"')
-    stats['debeka_submitted'] = cursor.fetchone()['count']
-    
-    # Bei Beihilfe eingereicht
-    cursor.execute('SELECT COUNT(*) as count FROM medical_receipts WHERE beihilfe_status != "none"')
-    stats['beihilfe_submitted'] = cursor.fetchone()['count']
-    
-    # Erstattungen erhalten
-    cursor.execute('SELECT COALESCE(SUM(debeka_amount + beihilfe_amount), 0) as total FROM medical_receipts')
-    stats['reimbursed_amount'] = cursor.fetchone()['total']
-    
-    # Aktive Mahnungen
-    cursor.execute('SELECT COUNT(*) as count FROM payment_reminders WHERE status = "sent"')
-    stats['active_reminders'] = cursor.fetchone()['count']
+    stats = compute_summary_stats()
     
     # Letzte Aktivitäten
     cursor.execute('''
@@ -685,64 +2089,12 @@ def dashboard():
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>🎯 BelegMeister - Dashboard</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
-        <style>
-            body { 
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                min-height: 100vh; 
-                color: white;
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            }
-            .main-card { 
-                background: rgba(255,255,255,0.95); 
-                color: #333; 
-                border-radius: 25px; 
-                box-shadow: 0 20px 50px rgba(0,0,0,0.3);
-            }
-            .stat-card {
-                background: rgba(255,255,255,0.15);
-                backdrop-filter: blur(10px);
-                border-radius: 15px;
-                border: 1px solid rgba(255,255,255,0.2);
-                transition: transform 0.3s ease;
-            }
-            .stat-card:hover {
-                transform: translateY(-5px);
-            }
-            .feature-btn {
-                background: rgba(255,255,255,0.9);
-                border: none;
-                border-radius: 15px;
-                padding: 20px;
-                transition: all 0.3s ease;
-                color: #333;
-                text-decoration: none;
-                display: block;
-            }
-            .feature-btn:hover {
-                transform: translateY(-10px);
-                background: rgba(255,255,255,1);
-                color: #333;
-                text-decoration: none;
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            }
-            .production-badge {
-                background: linear-gradient(45deg, #28a745, #20c997);
-                animation: pulse 2s infinite;
-                border-radius: 25px;
-                padding: 10px 20px;
-                color: white;
-                font-weight: bold;
-            }
-            @keyframes pulse {
-                0% { box-shadow: 0 0 0 0 rgba(40, 167, 69, 0.7); }
-                70% { box-shadow: 0 0 0 10px rgba(40, 167, 69, 0); }
-                100% { box-shadow: 0 0 0 0 rgba(40, 167, 69, 0); }
-            }
-        </style>
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
-    <body>
+    <body class="page-dashboard">
         <div class="container mt-5">
             <!-- Header -->
             <div class="text-center mb-5">
@@ -848,6 +2200,13 @@ def dashboard():
                             <p class="text-muted">{{ stats.active_reminders }} aktive Mahnungen</p>
                         </a>
                     </div>
+                    <div class="col-lg-4 col-md-6">
+                        <a href="/reports" class="feature-btn text-center">
+                            <i class="bi bi-journal-text text-dark fs-1 mb-3"></i>
+                            <h4 class="text-dark">Jahresbericht</h4>
+                            <p class="text-muted">Eigenanteil für Steuer & Beihilfe</p>
+                        </a>
+                    </div>
                 </div>
             </div>
             
@@ -895,7 +2254,7 @@ def dashboard():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
     </body>
     </html>
     """, stats=stats, recent_activities=recent_activities)
@@ -906,12 +2265,8 @@ def new_receipt():
     """📄 Neuer medizinischer Beleg mit OCR und Anbieter-Integration"""
     patient_name = get_setting('patient_name', 'Max Mustermann')
     
-    # Lade alle Anbieter für Dropdown
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM service_providers ORDER BY name')
-    providers = cursor.fetchall()
-    conn.close()
+    # Anbieter für Dropdown aus dem Cache (bei sehr vielen Anbietern gekürzt + Autocomplete)
+    providers, providers_truncated = get_cached_providers(limit=PROVIDER_DROPDOWN_LIMIT)
     
     return render_template_string("""
     <!DOCTYPE html>
@@ -919,22 +2274,10 @@ def new_receipt():
     <head>
         <meta charset="UTF-8">
         <title>📄 BelegMeister - Neuer Beleg</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
-        <style>
-            .upload-zone {
-                border: 3px dashed #007bff;
-                border-radius: 15px;
-                padding: 50px;
-                text-align: center;
-                transition: all 0.3s;
-                cursor: pointer;
-            }
-            .upload-zone:hover, .upload-zone.dragover {
-                border-color: #28a745;
-                background-color: rgba(40, 167, 69, 0.1);
-            }
-        </style>
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -1030,8 +2373,12 @@ def new_receipt():
                                         <!-- 🏥 ANBIETER-AUSWAHL mit IBAN-Integration -->
                                         <div class="mb-3">
                                             <label class="form-label">Anbieter auswählen *</label>
+                                            {% if providers_truncated %}
+                                            <input type="search" class="form-control form-control-sm mb-1" id="provider_search"
+                                                   placeholder="🔍 Anbieter suchen (Liste gekürzt)..." oninput="searchProviders(this.value)" autocomplete="off">
+                                            {% endif %}
                                             <div class="input-group">
-                                                <select class="form-select" id="provider_select" onchange="loadProviderData()">
+                                                <select class="form-select" id="provider_select" name="provider_id" onchange="loadProviderData()">
                                                     <option value="">Anbieter wählen...</option>
                                                     {% for provider in providers %}
                                                     <option value="{{ provider.id }}" 
@@ -1145,7 +2492,7 @@ def new_receipt():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             // Drag & Drop Funktionalität
             const uploadZone = document.querySelector('.upload-zone');
@@ -1200,7 +2547,7 @@ def new_receipt():
                         document.getElementById('ocrStatus').style.display = 'none';
                         
                         if (data.success) {
-                            fillOcrData(data);
+                            fillOcrDataWithProviderMatch(data);
                         } else {
                             showOcrError(data.message || 'OCR-Verarbeitung fehlgeschlagen');
                         }
@@ -1547,6 +2894,16 @@ def new_receipt():
             function fillOcrDataWithProviderMatch(ocrData) {
                 fillOcrData(ocrData); // Originale Funktion aufrufen
                 
+                // Server-seitig aufgelöster Anbieter (normalisierter Name / Trigramm-Abgleich)
+                if (ocrData.provider_id) {
+                    const providerSelect = document.getElementById('provider_select');
+                    providerSelect.value = String(ocrData.provider_id);
+                    if (providerSelect.value === String(ocrData.provider_id)) {
+                        loadProviderData();
+                        return;
+                    }
+                }
+                
                 // Versuche Anbieter in der Datenbank zu finden
                 if (ocrData.provider_name) {
                     const providerSelect = document.getElementById('provider_select');
@@ -1571,12 +2928,13 @@ def new_receipt():
         </script>
     </body>
     </html>
-    """, patient_name=patient_name, providers=providers)
+    """, patient_name=patient_name, providers=providers, providers_truncated=providers_truncated)
 
 # 📄 BELEG ERSTELLEN - VOLLSTÄNDIG FUNKTIONAL
 @app.route('/receipt/create', methods=['POST'])
 def create_receipt():
     """📄 Neuen medizinischen Beleg erstellen - MIT REZEPT-SUPPORT"""
+    uow = UnitOfWork()
     try:
         # 📄 BELEG-DATEI VERARBEITEN
         receipt_file = request.files.get('receipt_file')
@@ -1587,8 +2945,7 @@ def create_receipt():
             filename = secure_filename(receipt_file.filename)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             safe_filename = f"{timestamp}_{filename}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_filename)
-            receipt_file.save(file_path)
+            file_path = uow.save_file(receipt_file, os.path.join(app.config['UPLOAD_FOLDER'], safe_filename))
             
             # OCR-Verarbeitung
             ocr_data = json.dumps(extract_ocr_data(file_path))
@@ -1602,25 +2959,23 @@ def create_receipt():
             prescription_filename = secure_filename(prescription_file.filename)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             safe_prescription_filename = f"rx_{timestamp}_{prescription_filename}"
-            prescription_file_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_prescription_filename)
-            prescription_file.save(prescription_file_path)
+            prescription_file_path = uow.save_file(prescription_file, os.path.join(app.config['UPLOAD_FOLDER'], safe_prescription_filename))
             logger.info(f"Rezept-Datei hochgeladen: {safe_prescription_filename}")
         
         # Beleg-Daten aus Formular
         receipt_id = generate_receipt_id()
+        provider_id = resolve_provider_id(request.form['provider_name'], request.form.get('provider_id'))
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        uow.execute('''
             INSERT INTO medical_receipts (
-                receipt_id, provider_name, provider_type, amount, receipt_date,
+                receipt_id, provider_name, provider_id, provider_type, amount, receipt_date,
                 treatment_date, patient_name, diagnosis_code, prescription_number,
                 original_filename, file_path, prescription_filename, prescription_file_path, ocr_data, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             receipt_id,
             request.form['provider_name'],
+            provider_id,
             request.form['provider_type'],
             float(request.form['amount']),
             request.form['receipt_date'],
@@ -1636,18 +2991,53 @@ def create_receipt():
             request.form.get('notes') or None
         ))
         
-        conn.commit()
-        conn.close()
+        uow.commit()
+        invalidate_provider_stats(provider_id)
         
         logger.info(f"Neuer Beleg erstellt: {receipt_id}")
         flash(f'Beleg {receipt_id} erfolgreich erstellt!', 'success')
         return redirect(url_for('receipt_detail', receipt_id=receipt_id))
         
     except Exception as e:
+        uow.discard_files()
         logger.error(f"Fehler beim Erstellen des Belegs: {e}")
         flash('Fehler beim Erstellen des Belegs!', 'error')
         return redirect(url_for('new_receipt'))
 
+# 🔎 BELEG-FILTER - eine Implementierung für Belegliste, JSON-API und Export
+def receipt_list_filters(args):
+    """WHERE-Bedingungen der Belegliste → (Klauseln, Parameter) - gemeinsam für /receipts, API v1 und Export
+    
+    status, provider, search wie in der Oberfläche, dazu provider_id, debeka_status, beihilfe_status
+    und date_from/date_to. Ungültige provider_id → ValueError.
+    """
+    clauses, params = [], []
+    if args.get('status', 'all') != 'all':
+        clauses.append('payment_status = ?')
+        params.append(args['status'])
+    if args.get('provider', 'all') != 'all':
+        clauses.append('provider_type = ?')
+        params.append(args['provider'])
+    if args.get('provider_id'):
+        clauses.append('provider_id = ?')
+        params.append(int(args['provider_id']))
+    for column in ('debeka_status', 'beihilfe_status'):
+        if args.get(column):
+            clauses.append(f'{column} = ?')
+            params.append(args[column])
+    if args.get('date_from'):
+        clauses.append('receipt_date >= ?')
+        params.append(args['date_from'])
+    if args.get('date_to'):
+        clauses.append('receipt_date <= ?')
+        params.append(args['date_to'])
+    search_query = args.get('search', '').strip()
+    if search_query:
+        search_columns = ['provider_name', 'prescription_number', 'patient_name', 'notes', 'receipt_id', 'CAST(amount AS TEXT)']
+        clauses.append('(' + ' OR '.join(f'{column} LIKE ?' for column in search_columns) + ')')
+        params.extend([f'%{search_query}%'] * len(search_columns))
+    return clauses, params
+
 # 📋 ALLE BELEGE - VOLLSTÄNDIGE ÜBERSICHT
 @app.route('/receipts')
 def receipts_list():
@@ -1656,37 +3046,18 @@ def receipts_list():
     cursor = conn.cursor()
     
     # Filter aus URL-Parameter
-    status_filter = request.args.get('status', 'all')
-    provider_filter = request.args.get('provider', 'all')
-    search_query = request.args.get('search', '').strip()
     sort_by = request.args.get('sort', 'created_at')
     sort_order = request.args.get('order', 'desc')
     
-    # Basis-Query
-    query = 'SELECT * FROM medical_receipts WHERE 1=1'
-    params = []
-    
-    if status_filter != 'all':
-        query += ' AND payment_status = ?'
-        params.append(status_filter)
-    
-    if provider_filter != 'all':
-        query += ' AND provider_type = ?'
-        params.append(provider_filter)
+    try:
+        clauses, params = receipt_list_filters(request.args)
+    except ValueError:
+        flash('Ungültiger Filter - es werden alle Belege angezeigt.', 'warning')
+        clauses, params = [], []
     
-    # Suchfunktion
-    if search_query:
-        search_conditions = [
-            'provider_name LIKE ?',
-            'prescription_number LIKE ?', 
-            'patient_name LIKE ?',
-            'notes LIKE ?',
-            'receipt_id LIKE ?',
-            'CAST(amount AS TEXT) LIKE ?'
-        ]
-        query += f' AND ({" OR ".join(search_conditions)})'
-        search_term = f'%{search_query}%'
-        params.extend([search_term] * len(search_conditions))
+    query = 'SELECT * FROM medical_receipts'
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
     
     # Sortierung hinzufügen
     valid_sort_fields = {
@@ -1724,8 +3095,10 @@ def receipts_list():
     <head>
         <meta charset="UTF-8">
         <title>📋 Alle medizinischen Belege</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -2010,10 +3383,11 @@ def receipts_list():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             function exportReceipts() {
-                alert('Excel-Export wird vorbereitet... (Produktionsfeature)');
+                // Export mit den aktuellen Filtern der Liste
+                window.location.href = '/export/receipts.{{ export_format }}' + window.location.search;
             }
             
             // 🔍 Suche-Funktionalität
@@ -2087,7 +3461,8 @@ def receipts_list():
         </script>
     </body>
     </html>
-    """, receipts=receipts, status_stats=status_stats, provider_stats=provider_stats, request=request)
+    """, receipts=receipts, status_stats=status_stats, provider_stats=provider_stats, request=request,
+       export_format='xlsx' if 'xlsx' in EXPORT_AVAILABLE_FORMATS else 'csv')
 
 # 📄 EINZELBELEG DETAILANSICHT - VOLLSTÄNDIG
 @app.route('/receipt/<receipt_id>')
@@ -2120,8 +3495,10 @@ def receipt_detail(receipt_id):
     <head>
         <meta charset="UTF-8">
         <title>📄 Beleg {{ receipt.receipt_id }}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -2364,7 +3741,7 @@ def receipt_detail(receipt_id):
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             function submitToDebeka() {
                 if (confirm('Beleg an Debeka zur Erstattung einreichen?')) {
@@ -2414,63 +3791,122 @@ def receipt_detail(receipt_id):
     """, receipt=receipt, reminders=reminders, uploads=uploads)
 
 # 💳 GIROCODE GENERIERUNG - VOLLSTÄNDIG FUNKTIONAL
+# 💳 GIROCODE-CACHE - EPC-Payload → gerenderte QR-Bilder
+GIROCODE_FALLBACK_IBAN = "DE89370400440532013000"  # Beispiel-IBAN
+GIROCODE_FALLBACK_BIC = "COBADEFFXXX"  # Beispiel-BIC
+GIROCODE_CACHE_SIZE = 512
+
+_girocode_cache = OrderedDict()
+_girocode_cache_lock = threading.Lock()
+
+def build_girocode_payload(receipt, provider):
+    """EPC-konformen GiroCode-Payload aus Beleg und Anbieter bauen → (payload, iban, bic)"""
+    provider_iban = provider['iban'] if provider else None
+    provider_bic = provider['bic'] if provider else None
+    
+    # Fallback IBAN wenn nicht in Anbieter-DB
+    if not provider_iban:
+        provider_iban = GIROCODE_FALLBACK_IBAN
+        provider_bic = GIROCODE_FALLBACK_BIC
+    
+    girocode_data = [
+        "BCD",  # Service Tag
+        "002",  # Version
+        "1",    # Character Set (UTF-8)
+        "SCT",  # Identification
+        provider_bic or GIROCODE_FALLBACK_BIC,  # BIC aus Anbieter-DB
+        receipt['provider_name'][:70],  # Beneficiary Name
+        provider_iban,  # IBAN aus Anbieter-DB
+        f"EUR{receipt['amount']:.2f}",  # Amount
+        "",     # Purpose
+        f"MED-{receipt['receipt_id']}",  # Reference
+        f"Medizinische Rechnung {receipt['receipt_id']}"[:140]  # Remittance Info
+    ]
+    return '\n'.join(girocode_data), provider_iban, provider_bic
+
+def girocode_token(payload):
+    """Kurzer, stabiler Schlüssel für einen EPC-Payload (Cache-Key und ETag)"""
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def render_girocode(payload, kind='svg'):
+    """QR-Bild (svg/png) für einen EPC-Payload - pro Payload nur einmal gerendert"""
+    key = (girocode_token(payload), kind)
+    with _girocode_cache_lock:
+        if key in _girocode_cache:
+            _girocode_cache.move_to_end(key)
+            return _girocode_cache[key]
+    
+    qr = segno.make(payload, error='M')
+    buffer = io.BytesIO()
+    if kind == 'png':
+        qr.save(buffer, kind='png', scale=8)
+    else:
+        qr.save(buffer, kind='svg', scale=8, xmldecl=False, svgclass=None, lineclass=None)
+    data = buffer.getvalue()
+    
+    with _girocode_cache_lock:
+        _girocode_cache[key] = data
+        while len(_girocode_cache) > GIROCODE_CACHE_SIZE:
+            _girocode_cache.popitem(last=False)
+    return data
+
+@app.route('/girocode/<receipt_id>/qr.<kind>')
+def girocode_image(receipt_id, kind):
+    """💳 GiroCode als SVG/PNG - langlebig cachebar (URL enthält Payload-Token)"""
+    if kind not in ('svg', 'png'):
+        return "Unbekanntes Bildformat", 404
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    receipt, provider = load_receipt_with_provider(cursor, receipt_id)
+    conn.close()
+    
+    if not receipt:
+        return "Beleg nicht gefunden", 404
+    
+    payload, _, _ = build_girocode_payload(receipt, provider)
+    token = girocode_token(payload)
+    
+    response = Response(render_girocode(payload, kind),
+                        mimetype='image/svg+xml' if kind == 'svg' else 'image/png')
+    response.set_etag(token)
+    # Bei geänderter IBAN/Betrag ändert sich ?v= → neue URL, daher immutable
+    if request.args.get('v') == token:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @app.route('/girocode/<receipt_id>')
 def generate_girocode(receipt_id):
     """💳 GiroCode für Zahlungen generieren mit Anbieter-IBAN"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
-    receipt = cursor.fetchone()
+    receipt, provider = load_receipt_with_provider(cursor, receipt_id)
     
     if not receipt:
+        conn.close()
         flash('Beleg nicht gefunden!', 'error')
         return redirect(url_for('receipts_list'))
     
-    # 🏥 ANBIETER-DATEN LADEN für IBAN/BIC
-    cursor.execute('SELECT * FROM service_providers WHERE name = ?', (receipt['provider_name'],))
-    provider = cursor.fetchone()
-    
     try:
         # IBAN und BIC bestimmen (Priorität: Anbieter-DB → Fallback)
-        provider_iban = None
-        provider_bic = None
+        girocode_string, provider_iban, provider_bic = build_girocode_payload(receipt, provider)
         
-        if provider:
-            provider_iban = provider['iban']
-            provider_bic = provider['bic']
+        if provider and provider['iban']:
             logger.info(f"💳 Anbieter-Banking gefunden: {provider['name']} - IBAN: {provider_iban}")
-        
-        # Fallback IBAN wenn nicht in Anbieter-DB
-        if not provider_iban:
-            provider_iban = "DE89370400440532013000"  # Beispiel-IBAN
-            provider_bic = "COBADEFFXXX"  # Beispiel-BIC
+        else:
             logger.warning(f"⚠️ Keine IBAN für Anbieter {receipt['provider_name']} - verwende Fallback")
         
-        # EPC-konformer GiroCode mit echter IBAN
-        girocode_data = [
-            "BCD",  # Service Tag
-            "002",  # Version
-            "1",    # Character Set (UTF-8)
-            "SCT",  # Identification
-            provider_bic or "COBADEFFXXX",  # BIC aus Anbieter-DB
-            receipt['provider_name'][:70],  # Beneficiary Name
-            provider_iban,  # IBAN aus Anbieter-DB
-            f"EUR{receipt['amount']:.2f}",  # Amount
-            "",     # Purpose
-            f"MED-{receipt['receipt_id']}",  # Reference
-            f"Medizinische Rechnung {receipt['receipt_id']}"[:140]  # Remittance Info
-        ]
-        
-        girocode_string = '\n'.join(girocode_data)
-        qr = segno.make(girocode_string, error='M')
-        buffer = io.BytesIO()
-        qr.save(buffer, kind='png', scale=8)
-        qr_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+        # QR vorab in den Cache rendern; das Bild kommt über /girocode/<id>/qr.svg
+        girocode_version = girocode_token(girocode_string)
+        render_girocode(girocode_string, 'svg')
         
-        # GiroCode als generiert markieren
-        cursor.execute('UPDATE medical_receipts SET girocode_generated = 1 WHERE receipt_id = ?', (receipt_id,))
-        conn.commit()
+        # GiroCode nur beim ersten Mal als generiert markieren (kein Schreib-Lock bei jedem Aufruf)
+        if not receipt['girocode_generated']:
+            cursor.execute('UPDATE medical_receipts SET girocode_generated = 1 WHERE receipt_id = ?', (receipt_id,))
+            conn.commit()
         conn.close()
         
         return render_template_string("""
@@ -2479,15 +3915,12 @@ def generate_girocode(receipt_id):
         <head>
             <meta charset="UTF-8">
             <title>💳 GiroCode - {{ receipt.receipt_id }}</title>
-            <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-            <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
-            <style>
-                body { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; }
-                .qr-card { box-shadow: 0 15px 35px rgba(0,0,0,0.2); border-radius: 20px; background: white; }
-                .qr-image { border: 4px solid #e9ecef; border-radius: 20px; background: white; padding: 20px; }
-            </style>
+            <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+            <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+            <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+            <script src="{{ asset_url('app.js') }}"></script>
         </head>
-        <body class="d-flex align-items-center">
+        <body class="page-girocode d-flex align-items-center">
             <div class="container">
                 <div class="row justify-content-center">
                     <div class="col-md-8 col-lg-6">
@@ -2500,7 +3933,7 @@ def generate_girocode(receipt_id):
                             </div>
                             <div class="card-body text-center p-5">
                                 <div class="mb-4">
-                                    <img src="data:image/png;base64,{{ qr_base64 }}" 
+                                    <img src="/girocode/{{ receipt.receipt_id }}/qr.svg?v={{ girocode_version }}" 
                                          class="img-fluid qr-image" 
                                          alt="GiroCode für {{ receipt.receipt_id }}"
                                          style="max-width: 350px;">
@@ -2584,9 +4017,10 @@ def generate_girocode(receipt_id):
             </script>
         </body>
         </html>
-        """, receipt=receipt, qr_base64=qr_base64, provider=provider, provider_iban=provider_iban, provider_bic=provider_bic)
+        """, receipt=receipt, girocode_version=girocode_version, provider=provider, provider_iban=provider_iban, provider_bic=provider_bic)
         
     except Exception as e:
+        conn.close()
         logger.error(f"Fehler bei GiroCode-Generierung: {e}")
         flash('Fehler bei der QR-Code-Generierung!', 'error')
         return redirect(url_for('receipt_detail', receipt_id=receipt_id))
@@ -2607,6 +4041,7 @@ def api_mark_paid(receipt_id):
         
         conn.commit()
         conn.close()
+        invalidate_provider_stats_for_receipts([receipt_id])
         
         logger.info(f"Beleg {receipt_id} als bezahlt markiert")
         return jsonify({'success': True, 'message': 'Als bezahlt markiert!'})
@@ -2641,6 +4076,7 @@ def api_submit_reimbursement(provider, receipt_id):
         
         conn.commit()
         conn.close()
+        invalidate_provider_stats_for_receipts([receipt_id])
         
         logger.info(f"Beleg {receipt_id} an {provider} eingereicht")
         return jsonify({'success': True, 'message': f'An {provider.title()} eingereicht!'})
@@ -2649,6 +4085,160 @@ def api_submit_reimbursement(provider, receipt_id):
         logger.error(f"Fehler beim Einreichen: {e}")
         return jsonify({'success': False, 'message': 'Fehler beim Einreichen!'})
 
+# 📦 SAMMEL-STATUSÄNDERUNG - viele Belege in EINER Transaktion
+BULK_STATUS_MAX_ITEMS = 1000
+BULK_STATUS_CHUNK_SIZE = 500  # unter SQLITE_MAX_VARIABLE_NUMBER bleiben
+BULK_STATUS_ACTIONS = {
+    # Aktion: (Statusspalte, Zielstatus, erlaubte Ausgangsstatus, SET-Klausel)
+    'paid': ('payment_status', 'paid', ('unpaid', 'reminded_1', 'reminded_2', 'overdue'),
+             "payment_status = 'paid', payment_date = CURRENT_DATE"),
+    'debeka': ('debeka_status', 'submitted', ('none',),
+               "debeka_status = 'submitted', debeka_submission_date = CURRENT_DATE"),
+    'beihilfe': ('beihilfe_status', 'submitted', ('none',),
+                 "beihilfe_status = 'submitted', beihilfe_submission_date = CURRENT_DATE"),
+}
+
+def bulk_receipt_ids_from_filter(action, filters):
+    """Beleg-IDs für eine Sammelaktion per Filter ermitteln (nur Belege im passenden Ausgangsstatus)"""
+    column, _, from_statuses, _ = BULK_STATUS_ACTIONS[action]
+    query = f"SELECT receipt_id FROM medical_receipts WHERE {column} IN ({', '.join('?' * len(from_statuses))})"
+    params = list(from_statuses)
+    
+    if filters.get('date_from'):
+        query += ' AND receipt_date >= ?'
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        query += ' AND receipt_date <= ?'
+        params.append(filters['date_to'])
+    if filters.get('provider_id'):
+        query += ' AND provider_id = ?'
+        params.append(int(filters['provider_id']))
+    if filters.get('provider_type'):
+        query += ' AND provider_type = ?'
+        params.append(filters['provider_type'])
+    if filters.get('payment_status'):
+        query += ' AND payment_status = ?'
+        params.append(filters['payment_status'])
+    
+    query += ' ORDER BY receipt_date ASC LIMIT ?'
+    params.append(BULK_STATUS_MAX_ITEMS + 1)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    receipt_ids = [row['receipt_id'] for row in cursor.fetchall()]
+    conn.close()
+    return receipt_ids
+
+def bulk_update_status(action, receipt_ids):
+    """Status vieler Belege in einer Transaktion ändern → Ergebnis je Beleg"""
+    column, target_status, from_statuses, set_clause = BULK_STATUS_ACTIONS[action]
+    receipt_ids = list(dict.fromkeys(str(receipt_id) for receipt_id in receipt_ids))
+    
+    def read_status(ids):
+        """Aktuellen Status in wenigen IN-Abfragen lesen"""
+        rows = {}
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        for start in range(0, len(ids), BULK_STATUS_CHUNK_SIZE):
+            chunk = ids[start:start + BULK_STATUS_CHUNK_SIZE]
+            cursor.execute(
+                f"SELECT receipt_id, provider_id, {column} AS status FROM medical_receipts WHERE receipt_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            rows.update((row['receipt_id'], row) for row in cursor.fetchall())
+        conn.close()
+        return rows
+    
+    current = read_status(receipt_ids)
+    to_update = [receipt_id for receipt_id in receipt_ids
+                 if receipt_id in current and current[receipt_id]['status'] in from_statuses]
+    
+    updated = set()
+    if to_update:
+        uow = UnitOfWork()
+        # Ausgangsstatus im UPDATE erneut prüfen, damit parallele Änderungen nicht überschrieben werden -
+        # ein Statement je Beleg, damit rowcounts zeigt, welche Zeilen wirklich geändert wurden
+        update_sql = (f"UPDATE medical_receipts SET {set_clause}, updated_at = CURRENT_TIMESTAMP "
+                      f"WHERE receipt_id = ? AND {column} IN ({', '.join('?' * len(from_statuses))})")
+        for receipt_id in to_update:
+            uow.execute(update_sql, (receipt_id, *from_statuses))
+        if action == 'paid':
+            uow.executemany(
+                "UPDATE payment_reminders SET status = 'paid' WHERE receipt_id = ? AND status != 'paid'",
+                [(receipt_id,) for receipt_id in to_update]
+            )
+        uow.commit()
+        updated = {receipt_id for receipt_id, rowcount in zip(to_update, uow.rowcounts) if rowcount}
+        if updated:
+            # Statistik und Jahresberichte hängen an Zahlungs- und Einreichungsstatus
+            invalidate_provider_stats(*{current[receipt_id]['provider_id'] for receipt_id in updated})
+        
+        # Zwischen Lesen und UPDATE parallel geändert → tatsächlichen Status melden
+        conflicted = [receipt_id for receipt_id in to_update if receipt_id not in updated]
+        if conflicted:
+            fresh = read_status(conflicted)
+            for receipt_id in conflicted:
+                current[receipt_id] = fresh.get(receipt_id)
+    
+    results = []
+    for receipt_id in receipt_ids:
+        row = current.get(receipt_id)
+        if row is None:
+            results.append({'receipt_id': receipt_id, 'result': 'not_found'})
+        elif receipt_id in updated:
+            results.append({'receipt_id': receipt_id, 'result': 'updated', 'status': target_status})
+        else:
+            results.append({'receipt_id': receipt_id, 'result': 'unchanged', 'status': row['status']})
+    
+    logger.info(f"📦 Sammelaktion '{action}': {len(updated)} von {len(receipt_ids)} Belegen aktualisiert")
+    return results
+
+def bulk_status_response(action):
+    """JSON-Body {"receipt_ids": [...]} oder {"filter": {...}} auswerten und Sammelaktion ausführen"""
+    payload = request.get_json(silent=True) or {}
+    receipt_ids = payload.get('receipt_ids') or request.form.getlist('receipt_ids')
+    if isinstance(receipt_ids, str):
+        receipt_ids = [receipt_ids]
+    
+    try:
+        if not receipt_ids and isinstance(payload.get('filter'), dict):
+            receipt_ids = bulk_receipt_ids_from_filter(action, payload['filter'])
+        if not receipt_ids:
+            return jsonify({'success': False, 'message': 'Keine Belege ausgewählt!'}), 400
+        if len(receipt_ids) > BULK_STATUS_MAX_ITEMS:
+            return jsonify({'success': False, 'message': f'Maximal {BULK_STATUS_MAX_ITEMS} Belege pro Sammelaktion!'}), 400
+        
+        results = bulk_update_status(action, receipt_ids)
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': f'Ungültiger Filter: {e}'}), 400
+    except Exception as e:
+        logger.error(f"Fehler bei Sammelaktion '{action}': {e}")
+        return jsonify({'success': False, 'message': 'Fehler aufgetreten!'}), 500
+    
+    counts = {'updated': 0, 'unchanged': 0, 'not_found': 0}
+    for result in results:
+        counts[result['result']] += 1
+    return jsonify({
+        'success': True,
+        'action': action,
+        'message': f"{counts['updated']} Belege aktualisiert, {counts['unchanged']} unverändert, {counts['not_found']} nicht gefunden",
+        **counts,
+        'results': results,
+    })
+
+@app.route('/api/bulk/mark_paid', methods=['POST'])
+def api_bulk_mark_paid():
+    """📦 Mehrere Belege als bezahlt markieren"""
+    return bulk_status_response('paid')
+
+@app.route('/api/bulk/submit/<provider>', methods=['POST'])
+def api_bulk_submit_reimbursement(provider):
+    """📦 Mehrere Belege bei Debeka/Beihilfe einreichen"""
+    if provider not in ['debeka', 'beihilfe']:
+        return jsonify({'success': False, 'message': 'Ungültiger Anbieter!'}), 400
+    return bulk_status_response(provider)
+
 # 💳 ZAHLUNGS-MANAGEMENT - VOLLSTÄNDIG
 @app.route('/payments')
 def payments_overview():
@@ -2656,8 +4246,12 @@ def payments_overview():
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # Offene Zahlungen
-    cursor.execute('SELECT * FROM medical_receipts WHERE payment_status = "unpaid" ORDER BY receipt_date ASC')
+    # Offene Zahlungen (Tage offen per julianday, ein Stichtag pro Request)
+    today = datetime.now().date().isoformat()
+    cursor.execute(f'''
+        SELECT *, {sql_days_since('receipt_date')} AS days_open
+        FROM medical_receipts WHERE payment_status != "paid" ORDER BY receipt_date ASC
+    ''', (today,))
     unpaid_receipts = cursor.fetchall()
     
     # Kürzlich bezahlte
@@ -2682,8 +4276,10 @@ def payments_overview():
     <head>
         <meta charset="UTF-8">
         <title>💳 Zahlungs-Management</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -2750,10 +4346,41 @@ def payments_overview():
                     <div class="tab-content">
                         <!-- Offene Zahlungen -->
                         <div class="tab-pane fade show active" id="unpaid">
+                            <!-- 📦 Sammelzahlung für ausgewählte Belege -->
+                            <form id="batchForm" method="POST" action="/payments/batch" class="card bg-light mb-3">
+                                <div class="card-body row g-2 align-items-end">
+                                    <div class="col-md-4">
+                                        <label class="form-label small mb-0">Ihre IBAN (Auftraggeber, für SEPA)</label>
+                                        <input type="text" name="debtor_iban" class="form-control form-control-sm" value="{{ debtor_iban }}" placeholder="DE...">
+                                    </div>
+                                    <div class="col-md-2">
+                                        <label class="form-label small mb-0">BIC (optional)</label>
+                                        <input type="text" name="debtor_bic" class="form-control form-control-sm" value="{{ debtor_bic }}">
+                                    </div>
+                                    <div class="col-md-6 text-end">
+                                        <small class="text-muted d-block mb-1">Keine Auswahl = alle offenen Zahlungen</small>
+                                        <div class="btn-group btn-group-sm">
+                                            <button type="submit" name="format" value="pdf" class="btn btn-success">
+                                                <i class="bi bi-file-earmark-pdf"></i> GiroCode-Sammelblatt (PDF)
+                                            </button>
+                                            <button type="submit" name="format" value="html" class="btn btn-outline-success">
+                                                <i class="bi bi-printer"></i> Druckansicht
+                                            </button>
+                                            <button type="submit" name="format" value="sepa" class="btn btn-primary">
+                                                <i class="bi bi-bank"></i> SEPA-Datei (pain.001)
+                                            </button>
+                                        </div>
+                                        <button type="button" onclick="bulkAction('/api/bulk/mark_paid', 'als bezahlt markieren')" class="btn btn-sm btn-outline-primary ms-1">
+                                            <i class="bi bi-check2-all"></i> Auswahl als bezahlt
+                                        </button>
+                                    </div>
+                                </div>
+                            </form>
                             <div class="table-responsive">
                                 <table class="table table-hover">
                                     <thead class="table-danger">
                                         <tr>
+                                            <th><input type="checkbox" class="form-check-input" onclick="toggleAll(this, 'receipt_ids')" title="Alle auswählen"></th>
                                             <th>Beleg-ID</th>
                                             <th>Anbieter</th>
                                             <th>Betrag</th>
@@ -2765,13 +4392,14 @@ def payments_overview():
                                     <tbody>
                                         {% for receipt in unpaid_receipts %}
                                         <tr>
+                                            <td><input type="checkbox" class="form-check-input" name="receipt_ids" value="{{ receipt.receipt_id }}" form="batchForm"></td>
                                             <td><code>{{ receipt.receipt_id }}</code></td>
                                             <td>{{ receipt.provider_name }}</td>
                                             <td><strong class="text-danger">{{ "%.2f"|format(receipt.amount) }} €</strong></td>
                                             <td>{{ receipt.receipt_date }}</td>
                                             <td>
                                                 <span class="badge bg-warning">
-                                                    {{ days_open_global(receipt.receipt_date) }} Tage
+                                                    {{ receipt.days_open }} Tage
                                                 </span>
                                             </td>
                                             <td>
@@ -2894,36 +4522,276 @@ def payments_overview():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
-            function markAsPaid(receiptId) {
-                if (confirm('Beleg als bezahlt markieren?')) {
-                    fetch('/api/mark_paid/' + receiptId, {method: 'POST'})
-                        .then(response => response.json())
-                        .then(data => {
-                            if (data.success) {
-                                alert('Als bezahlt markiert!');
-                                location.reload();
-                            }
-                        });
-                }
-            }
-            
             function sendReminder(receiptId) {
                 if (confirm('Mahnung senden?')) {
                     alert('Mahnung wird versendet... (Produktionsfeature)');
                 }
             }
-            
-            function nextReminder(receiptId) {
-                if (confirm('Nächste Mahnstufe senden?')) {
-                    alert('Nächste Mahnstufe wird erstellt... (Produktionsfeature)');
-                }
-            }
         </script>
     </body>
     </html>
-    """, unpaid_receipts=unpaid_receipts, recent_paid=recent_paid, reminder_receipts=reminder_receipts)
+    """, unpaid_receipts=unpaid_receipts, recent_paid=recent_paid, reminder_receipts=reminder_receipts,
+       debtor_iban=get_setting('debtor_iban', ''), debtor_bic=get_setting('debtor_bic', ''))
+
+# 📦 SAMMELZAHLUNG - GiroCode-Sammelblatt & SEPA pain.001
+SEPA_PAIN001_NAMESPACE = 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.03'
+GIROCODE_SHEET_DPI = 150
+GIROCODE_SHEET_SIZE = (1240, 1754)  # A4 bei 150 DPI
+GIROCODE_SHEET_GRID = (2, 3)  # 6 GiroCodes pro Seite
+
+def fetch_batch_payments(receipt_ids=None):
+    """Offene Belege inkl. Anbieter-IBAN/BIC in EINER Abfrage laden (leere Auswahl = alle offenen)"""
+    query = '''
+        SELECT mr.*, sp.iban AS provider_iban, sp.bic AS provider_bic
+        FROM medical_receipts mr
+        LEFT JOIN service_providers sp ON sp.id = mr.provider_id
+        WHERE mr.payment_status != 'paid'
+    '''
+    params = []
+    if receipt_ids:
+        query += f" AND mr.receipt_id IN ({', '.join('?' * len(receipt_ids))})"
+        params.extend(receipt_ids)
+    query += ' ORDER BY mr.receipt_date ASC'
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+    return rows
+
+def batch_provider(row):
+    """Anbieter-Banking aus einer fetch_batch_payments()-Zeile für build_girocode_payload()"""
+    if not row['provider_iban']:
+        return None
+    return {'iban': normalize_iban(row['provider_iban']), 'bic': row['provider_bic']}
+
+def normalize_iban(iban):
+    return (iban or '').replace(' ', '').upper()
+
+def is_valid_iban(iban):
+    """Format + Prüfziffer (ISO 13616, Modulo 97)"""
+    import re
+    iban = normalize_iban(iban)
+    if not re.fullmatch(r'[A-Z]{2}\d{2}[A-Z0-9]{11,30}', iban):
+        return False
+    digits = ''.join(str(int(char, 36)) for char in iban[4:] + iban[:4])
+    return int(digits) % 97 == 1
+
+def batch_skip_reason(row):
+    """Warum ein Beleg nicht in Sammelblatt/SEPA-Export darf - None = zahlbar"""
+    if not row['provider_iban']:
+        return 'keine IBAN'
+    if not is_valid_iban(row['provider_iban']):
+        return 'IBAN ungültig'
+    if row['amount'] is None or row['amount'] <= 0:
+        return 'Betrag ≤ 0'
+    return None
+
+def build_sepa_pain001(rows, debtor_name, debtor_iban, debtor_bic=None, execution_date=None):
+    """SEPA-Überweisungsdatei (pain.001.001.03) für alle zahlbaren Zeilen (siehe batch_skip_reason)"""
+    execution_date = execution_date or datetime.now().strftime('%Y-%m-%d')
+    transactions = [row for row in rows if batch_skip_reason(row) is None]
+    amounts_cents = [int(round(row['amount'] * 100)) for row in transactions]
+    ctrl_sum = f"{sum(amounts_cents) / 100:.2f}"
+    message_id = f"BM-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6].upper()}"
+    
+    def sub(parent, tag, text=None, **attrib):
+        element = ET.SubElement(parent, tag, attrib)
+        if text is not None:
+            element.text = text
+        return element
+    
+    document = ET.Element('Document', xmlns=SEPA_PAIN001_NAMESPACE)
+    initiation = sub(document, 'CstmrCdtTrfInitn')
+    
+    header = sub(initiation, 'GrpHdr')
+    sub(header, 'MsgId', message_id)
+    sub(header, 'CreDtTm', datetime.now().strftime('%Y-%m-%dT%H:%M:%S'))
+    sub(header, 'NbOfTxs', str(len(transactions)))
+    sub(header, 'CtrlSum', ctrl_sum)
+    sub(sub(header, 'InitgPty'), 'Nm', debtor_name[:70])
+    
+    payment_info = sub(initiation, 'PmtInf')
+    sub(payment_info, 'PmtInfId', message_id)
+    sub(payment_info, 'PmtMtd', 'TRF')
+    sub(payment_info, 'BtchBookg', 'true')
+    sub(payment_info, 'NbOfTxs', str(len(transactions)))
+    sub(payment_info, 'CtrlSum', ctrl_sum)
+    sub(sub(sub(payment_info, 'PmtTpInf'), 'SvcLvl'), 'Cd', 'SEPA')
+    sub(payment_info, 'ReqdExctnDt', execution_date)
+    sub(sub(payment_info, 'Dbtr'), 'Nm', debtor_name[:70])
+    sub(sub(sub(payment_info, 'DbtrAcct'), 'Id'), 'IBAN', normalize_iban(debtor_iban))
+    debtor_agent = sub(sub(payment_info, 'DbtrAgt'), 'FinInstnId')
+    if debtor_bic:
+        sub(debtor_agent, 'BIC', debtor_bic.replace(' ', '').upper())
+    else:
+        sub(sub(debtor_agent, 'Othr'), 'Id', 'NOTPROVIDED')
+    sub(payment_info, 'ChrgBr', 'SLEV')
+    
+    for row, cents in zip(transactions, amounts_cents):
+        transfer = sub(payment_info, 'CdtTrfTxInf')
+        sub(sub(transfer, 'PmtId'), 'EndToEndId', f"MED-{row['receipt_id']}"[:35])
+        sub(sub(transfer, 'Amt'), 'InstdAmt', f"{cents / 100:.2f}", Ccy='EUR')
+        if row['provider_bic']:
+            sub(sub(sub(transfer, 'CdtrAgt'), 'FinInstnId'), 'BIC', row['provider_bic'].replace(' ', '').upper())
+        sub(sub(transfer, 'Cdtr'), 'Nm', row['provider_name'][:70])
+        sub(sub(sub(transfer, 'CdtrAcct'), 'Id'), 'IBAN', normalize_iban(row['provider_iban']))
+        sub(sub(transfer, 'RmtInf'), 'Ustrd', f"Medizinische Rechnung {row['receipt_id']}"[:140])
+    
+    return b'<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(document, encoding='utf-8')
+
+def build_girocode_sheet_pdf(rows):
+    """Druckbares A4-PDF mit allen GiroCodes (Pillow) - None falls Pillow fehlt"""
+    try:
+        from PIL import Image as PILImage, ImageDraw, ImageFont
+    except ImportError:
+        return None
+    
+    columns, lines = GIROCODE_SHEET_GRID
+    page_width, page_height = GIROCODE_SHEET_SIZE
+    margin = 60
+    cell_width = (page_width - 2 * margin) // columns
+    cell_height = (page_height - 2 * margin) // lines
+    qr_size = min(cell_width, cell_height) - 140
+    font = ImageFont.load_default(size=22)
+    
+    pages = []
+    per_page = columns * lines
+    for page_start in range(0, len(rows), per_page):
+        page = PILImage.new('L', GIROCODE_SHEET_SIZE, 'white')
+        draw = ImageDraw.Draw(page)
+        for index, row in enumerate(rows[page_start:page_start + per_page]):
+            payload, iban, _ = build_girocode_payload(row, batch_provider(row))
+            x = margin + (index % columns) * cell_width
+            y = margin + (index // columns) * cell_height
+            
+            qr_image = PILImage.open(io.BytesIO(render_girocode(payload, 'png'))).convert('L')
+            qr_image = qr_image.resize((qr_size, qr_size), PILImage.NEAREST)
+            page.paste(qr_image, (x + (cell_width - qr_size) // 2, y))
+            
+            text_y = y + qr_size + 10
+            label_lines = [
+                row['provider_name'][:40],
+                f"{row['amount']:.2f} EUR  -  {row['receipt_id']}",
+                f"IBAN {iban}",
+            ]
+            for line in label_lines:
+                draw.text((x + 20, text_y), line, fill='black', font=font)
+                text_y += 30
+            draw.rectangle([x + 5, y - 10, x + cell_width - 5, y + cell_height - 15], outline=200)
+        pages.append(page)
+    
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format='PDF', save_all=True, append_images=pages[1:], resolution=GIROCODE_SHEET_DPI)
+    return buffer.getvalue()
+
+@app.route('/payments/batch', methods=['POST'])
+def batch_payments():
+    """📦 Sammelzahlung: GiroCode-Sammelblatt (PDF/HTML) oder SEPA-Datei für ausgewählte offene Belege"""
+    receipt_ids = request.form.getlist('receipt_ids')
+    export_format = request.form.get('format', 'pdf')
+    
+    rows = fetch_batch_payments(receipt_ids)
+    if not rows:
+        flash('Keine offenen Belege ausgewählt!', 'warning')
+        return redirect(url_for('payments_overview'))
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    # Ohne gültige Anbieter-IBAN oder mit Betrag ≤ 0 weder GiroCode noch Überweisung
+    payable, skipped = [], []
+    for row in rows:
+        reason = batch_skip_reason(row)
+        if reason:
+            skipped.append(f"{row['receipt_id']} ({reason})")
+        else:
+            payable.append(row)
+    rows = payable
+    if not rows:
+        flash(f"Keiner der ausgewählten Belege ist zahlbar: {', '.join(skipped)}", 'error')
+        return redirect(url_for('payments_overview'))
+    if skipped:
+        flash(f"Nicht im {'SEPA-Export' if export_format == 'sepa' else 'Sammelblatt'}: {', '.join(skipped)}", 'warning')
+    
+    if export_format == 'sepa':
+        debtor_iban = (request.form.get('debtor_iban') or get_setting('debtor_iban', '')).strip()
+        debtor_bic = (request.form.get('debtor_bic') or get_setting('debtor_bic', '')).strip()
+        if not debtor_iban:
+            flash('Für den SEPA-Export wird Ihre eigene IBAN (Auftraggeber) benötigt!', 'error')
+            return redirect(url_for('payments_overview'))
+        if not is_valid_iban(debtor_iban):
+            flash('Ihre IBAN (Auftraggeber) ist ungültig!', 'error')
+            return redirect(url_for('payments_overview'))
+        
+        # Auftraggeber-Konto für den nächsten Export merken
+        if debtor_iban != get_setting('debtor_iban', ''):
+            update_setting('debtor_iban', debtor_iban)
+        if debtor_bic != get_setting('debtor_bic', ''):
+            update_setting('debtor_bic', debtor_bic)
+        
+        xml_data = build_sepa_pain001(
+            rows,
+            debtor_name=get_setting('patient_name', 'Max Mustermann'),
+            debtor_iban=debtor_iban,
+            debtor_bic=debtor_bic or None,
+            execution_date=request.form.get('execution_date') or None
+        )
+        logger.info(f"📦 SEPA-Export erstellt: {len(rows)} Überweisungen")
+        return send_file(io.BytesIO(xml_data), mimetype='application/xml', as_attachment=True,
+                         download_name=f"sepa_pain001_{timestamp}.xml")
+    
+    if export_format == 'pdf':
+        pdf_data = build_girocode_sheet_pdf(rows)
+        if pdf_data is not None:
+            logger.info(f"📦 GiroCode-Sammelblatt erstellt: {len(rows)} Belege")
+            return send_file(io.BytesIO(pdf_data), mimetype='application/pdf', as_attachment=True,
+                             download_name=f"girocodes_{timestamp}.pdf")
+        logger.warning("⚠️ Pillow nicht verfügbar - GiroCode-Sammelblatt als HTML")
+    
+    # 🖨️ HTML-Sammelblatt (Druckansicht des Browsers)
+    sheet = []
+    for row in rows:
+        payload, iban, bic = build_girocode_payload(row, batch_provider(row))
+        sheet.append({'receipt': row, 'iban': iban, 'bic': bic, 'version': girocode_token(payload)})
+    
+    return render_template_string("""
+    <!DOCTYPE html>
+    <html lang="de">
+    <head>
+        <meta charset="UTF-8">
+        <title>📦 GiroCode-Sammelblatt</title>
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
+    </head>
+    <body class="bg-white">
+        <div class="container mt-4">
+            <div class="d-flex justify-content-between align-items-center mb-4 no-print">
+                <h2>📦 GiroCode-Sammelblatt ({{ sheet|length }} Belege)</h2>
+                <div>
+                    <button onclick="window.print()" class="btn btn-primary">Drucken</button>
+                    <a href="/payments" class="btn btn-secondary">Zurück</a>
+                </div>
+            </div>
+            <div class="row g-3">
+                {% for item in sheet %}
+                <div class="col-6">
+                    <div class="girocode-cell p-3 text-center">
+                        <img src="/girocode/{{ item.receipt.receipt_id }}/qr.svg?v={{ item.version }}" alt="GiroCode {{ item.receipt.receipt_id }}">
+                        <div class="mt-2"><strong>{{ item.receipt.provider_name }}</strong></div>
+                        <div>{{ "%.2f"|format(item.receipt.amount) }} € • <code>{{ item.receipt.receipt_id }}</code></div>
+                        <small class="text-muted">IBAN {{ item.iban }}</small>
+                    </div>
+                </div>
+                {% endfor %}
+            </div>
+        </div>
+    </body>
+    </html>
+    """, sheet=sheet)
 
 # 📤 EINREICHUNGS-MANAGEMENT - VOLLSTÄNDIG
 @app.route('/submissions')
@@ -2940,8 +4808,12 @@ def submissions_overview():
     cursor.execute('SELECT * FROM medical_receipts WHERE beihilfe_status != "none" ORDER BY beihilfe_submission_date DESC')
     beihilfe_submissions = cursor.fetchall()
     
-    # Nicht eingereichte Belege
-    cursor.execute('SELECT * FROM medical_receipts WHERE payment_status = "paid" AND debeka_status = "none" AND beihilfe_status = "none"')
+    # Nicht eingereichte Belege (Tage seit Zahlung per julianday)
+    today = datetime.now().date().isoformat()
+    cursor.execute(f'''
+        SELECT *, {sql_days_since('payment_date')} AS days_since_payment
+        FROM medical_receipts WHERE payment_status = "paid" AND debeka_status = "none" AND beihilfe_status = "none"
+    ''', (today,))
     pending_submissions = cursor.fetchall()
     
     conn.close()
@@ -2952,8 +4824,10 @@ def submissions_overview():
     <head>
         <meta charset="UTF-8">
         <title>📤 Einreichungs-Management</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -3131,10 +5005,23 @@ def submissions_overview():
                                 <h5><i class="bi bi-exclamation-triangle me-2"></i>Noch nicht eingereicht</h5>
                                 <p class="mb-0">Bezahlte Belege, die noch zur Erstattung eingereicht werden können</p>
                             </div>
+                            {% if pending_submissions %}
+                            <div class="mb-3 text-end">
+                                <div class="btn-group btn-group-sm">
+                                    <button type="button" onclick="bulkAction('/api/bulk/submit/debeka', 'an Debeka einreichen')" class="btn btn-primary">
+                                        <i class="bi bi-shield-check"></i> Auswahl an Debeka
+                                    </button>
+                                    <button type="button" onclick="bulkAction('/api/bulk/submit/beihilfe', 'an Beihilfe einreichen')" class="btn btn-success">
+                                        <i class="bi bi-building"></i> Auswahl an Beihilfe
+                                    </button>
+                                </div>
+                            </div>
+                            {% endif %}
                             <div class="table-responsive">
                                 <table class="table table-hover">
                                     <thead class="table-warning">
                                         <tr>
+                                            <th><input type="checkbox" class="form-check-input" onclick="toggleAll(this, 'receipt_ids')" title="Alle auswählen"></th>
                                             <th>Beleg-ID</th>
                                             <th>Anbieter</th>
                                             <th>Betrag</th>
@@ -3146,13 +5033,14 @@ def submissions_overview():
                                     <tbody>
                                         {% for receipt in pending_submissions %}
                                         <tr>
+                                            <td><input type="checkbox" class="form-check-input" name="receipt_ids" value="{{ receipt.receipt_id }}"></td>
                                             <td><code>{{ receipt.receipt_id }}</code></td>
                                             <td>{{ receipt.provider_name }}</td>
                                             <td><strong>{{ "%.2f"|format(receipt.amount) }} €</strong></td>
                                             <td>{{ receipt.payment_date }}</td>
                                             <td>
                                                 <span class="badge bg-warning">
-                                                    {{ days_since_payment_global(receipt.payment_date) }} Tage
+                                                    {{ receipt.days_since_payment }} Tage
                                                 </span>
                                             </td>
                                             <td>
@@ -3186,7 +5074,7 @@ def submissions_overview():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             function submitToProvider(provider, receiptId) {
                 if (confirm('An ' + provider + ' zur Erstattung einreichen?')) {
@@ -3209,73 +5097,6 @@ def submissions_overview():
     </html>
     """, debeka_submissions=debeka_submissions, beihilfe_submissions=beihilfe_submissions, pending_submissions=pending_submissions)
 
-def days_since_payment(payment_date):
-    """Hilfsfunktion für Tage seit Zahlung"""
-    if not payment_date:
-        return 0
-    try:
-        from datetime import datetime
-        payment = datetime.strptime(str(payment_date), '%Y-%m-%d')
-        return (datetime.now() - payment).days
-    except:
-        return 0
-
-# Template-Funktionen registrieren für bessere Integration
-@app.template_global()
-def days_since_payment_global(payment_date):
-    """Template-globale Funktion für Tage seit Zahlung"""
-    return days_since_payment(payment_date)
-
-@app.template_global()
-def days_overdue_global(due_date):
-    """Template-globale Funktion für überfällige Tage"""
-    return days_overdue(due_date)
-
-@app.template_global()
-def days_since_invoice_global(receipt_date):
-    """Template-globale Funktion für Tage seit Rechnung"""
-    return days_since_invoice(receipt_date)
-
-@app.template_global()
-def days_open_global(receipt_date):
-    """Template-globale Funktion für Tage offen"""
-    if not receipt_date:
-        return 0
-    try:
-        from datetime import datetime
-        receipt = datetime.strptime(str(receipt_date), '%Y-%m-%d')
-        return (datetime.now() - receipt).days
-    except:
-        return 0
-
-# Template-Funktionen registrieren
-@app.template_global()
-def days_since_payment_global(payment_date):
-    """Template-globale Funktion für Tage seit Zahlung"""
-    return days_since_payment(payment_date)
-
-@app.template_global()
-def days_overdue_global(due_date):
-    """Template-globale Funktion für überfällige Tage"""
-    return days_overdue(due_date)
-
-@app.template_global()
-def days_since_invoice_global(receipt_date):
-    """Template-globale Funktion für Tage seit Rechnung"""
-    return days_since_invoice(receipt_date)
-
-@app.template_global()
-def days_open_global(receipt_date):
-    """Template-globale Funktion für Tage offen"""
-    if not receipt_date:
-        return 0
-    try:
-        from datetime import datetime
-        receipt = datetime.strptime(str(receipt_date), '%Y-%m-%d')
-        return (datetime.now() - receipt).days
-    except:
-        return 0
-
 # 📁 ERSTATTUNGS-UPLOAD - NEUES FEATURE
 @app.route('/reimbursement/upload/<receipt_id>')
 def upload_reimbursement_form(receipt_id):
@@ -3291,7 +5112,7 @@ def upload_reimbursement_form(receipt_id):
         return redirect(url_for('receipts_list'))
     
     # Beihilfe-Einstellungen laden
-    beihilfe_prozentsatz = float(get_setting('beihilfe_prozentsatz', 50.0))
+    beihilfe_prozentsatz = get_setting_float('beihilfe_prozentsatz', 50.0)
     besoldungsgruppe = get_setting('besoldungsgruppe', 'A13')
     
     # Bereits vorhandene Erstattungsbescheide laden
@@ -3306,34 +5127,12 @@ def upload_reimbursement_form(receipt_id):
     <head>
         <meta charset="UTF-8">
         <title>🏥 BelegMeister - Deutscher Beihilfe-Erstattungsprozess</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
-        <style>
-            .upload-zone {
-                border: 3px dashed #28a745;
-                border-radius: 15px;
-                padding: 30px;
-                text-align: center;
-                transition: all 0.3s;
-                cursor: pointer;
-                min-height: 120px;
-            }
-            .upload-zone:hover, .upload-zone.dragover {
-                border-color: #20c997;
-                background-color: rgba(32, 201, 151, 0.1);
-            }
-            .process-step {
-                border-left: 4px solid #007bff;
-                padding-left: 15px;
-                margin-bottom: 20px;
-            }
-            .notice-card {
-                border: 2px solid #28a745;
-                background: rgba(40, 167, 69, 0.1);
-            }
-        </style>
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
-    <body class="bg-light">
+    <body class="bg-light page-reimbursement">
         <div class="container mt-4">
             <div class="row justify-content-center">
                 <div class="col-lg-10">
@@ -3570,7 +5369,7 @@ def upload_reimbursement_form(receipt_id):
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             const originalAmount = {{ receipt.amount }};
             const beihilfeProzentsatz = {{ beihilfe_prozentsatz }};
@@ -3736,15 +5535,17 @@ def upload_reimbursement_form(receipt_id):
 @app.route('/reimbursement/process/<receipt_id>', methods=['POST'])
 def process_reimbursement(receipt_id):
     """🏥 Deutscher Beihilfe-Erstattungsprozess verarbeiten"""
+    uow = UnitOfWork()
     try:
         logger.info(f"🏥 Starte deutsche Erstattungsverarbeitung für {receipt_id}")
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Beleg existiert prüfen
+        # Beleg existiert prüfen (Lese-Verbindung sofort wieder freigeben)
         cursor.execute('SELECT * FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
         receipt = cursor.fetchone()
+        conn.close()
         
         if not receipt:
             flash('Beleg nicht gefunden!', 'error')
@@ -3793,9 +5594,7 @@ def process_reimbursement(receipt_id):
                 filename = secure_filename(debeka_file.filename)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 safe_filename = f"debeka_{receipt_id}_{timestamp}_{filename}"
-                debeka_file_path = os.path.join('reimbursements', safe_filename)
-                os.makedirs('reimbursements', exist_ok=True)
-                debeka_file.save(debeka_file_path)
+                debeka_file_path = uow.save_file(debeka_file, os.path.join('reimbursements', safe_filename))
                 logger.info(f"Debeka-Bescheid hochgeladen: {safe_filename}")
             
             # Debeka-Erstattungsrate berechnen
@@ -3803,7 +5602,7 @@ def process_reimbursement(receipt_id):
             eligible_amount = receipt['amount']
             
             # Debeka-Bescheid in Datenbank speichern
-            cursor.execute('''
+            uow.execute('''
                 INSERT INTO reimbursement_notices (
                     receipt_id, notice_type, notice_number, notice_date,
                     original_amount, eligible_amount, reimbursement_rate, 
@@ -3834,17 +5633,15 @@ def process_reimbursement(receipt_id):
                 filename = secure_filename(beihilfe_file.filename)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 safe_filename = f"beihilfe_{receipt_id}_{timestamp}_{filename}"
-                beihilfe_file_path = os.path.join('reimbursements', safe_filename)
-                os.makedirs('reimbursements', exist_ok=True)
-                beihilfe_file.save(beihilfe_file_path)
+                beihilfe_file_path = uow.save_file(beihilfe_file, os.path.join('reimbursements', safe_filename))
                 logger.info(f"Beihilfe-Bescheid hochgeladen: {safe_filename}")
             
             # Beihilfe-Berechnung
             beihilfe_eligible = float(request.form.get('beihilfe_eligible', receipt['amount'] - debeka_amount))
-            beihilfe_prozentsatz = float(get_setting('beihilfe_prozentsatz', 50.0))
+            beihilfe_prozentsatz = get_setting_float('beihilfe_prozentsatz', 50.0)
             
             # Beihilfe-Bescheid in Datenbank speichern
-            cursor.execute('''
+            uow.execute('''
                 INSERT INTO reimbursement_notices (
                     receipt_id, notice_type, notice_number, notice_date,
                     original_amount, eligible_amount, reimbursement_rate, 
@@ -3869,7 +5666,7 @@ def process_reimbursement(receipt_id):
         remaining_amount = receipt['amount'] - total_reimbursed
         reimbursement_rate = (total_reimbursed / receipt['amount'] * 100) if receipt['amount'] > 0 else 0
         
-        cursor.execute('''
+        uow.execute('''
             UPDATE medical_receipts SET
                 debeka_amount = debeka_amount + ?,
                 beihilfe_amount = beihilfe_amount + ?,
@@ -3883,22 +5680,26 @@ def process_reimbursement(receipt_id):
             receipt_id
         ))
         
-        # 📊 LEGACY REIMBURSEMENT_UPLOADS für Kompatibilität
+        # 📊 LEGACY REIMBURSEMENT_UPLOADS für Kompatibilität (eine Zeile je Bescheid-Typ, CHECK erlaubt kein 'both')
         if notices_processed > 0:
-            cursor.execute('''
+            uow.executemany('''
                 INSERT INTO reimbursement_uploads (
                     receipt_id, upload_type, filename, file_path, amount, upload_date, processed
                 ) VALUES (?, ?, ?, ?, ?, CURRENT_DATE, 1)
-            ''', (
-                receipt_id,
-                'both' if debeka_amount > 0 and beihilfe_amount > 0 else ('debeka' if debeka_amount > 0 else 'beihilfe'),
-                f"{notices_processed} Bescheide verarbeitet",
-                f"German reimbursement process: {notices_processed} notices",
-                total_reimbursed
-            ))
+            ''', [
+                (
+                    receipt_id, upload_type,
+                    f"{notices_processed} Bescheide verarbeitet",
+                    f"German reimbursement process: {notices_processed} notices",
+                    amount
+                )
+                for upload_type, amount in (('debeka', debeka_amount), ('beihilfe', beihilfe_amount))
+                if amount > 0
+            ])
         
-        conn.commit()
-        conn.close()
+        # Alle Statements in einer kurzen Transaktion schreiben
+        uow.commit()
+        invalidate_provider_stats(receipt['provider_id'])
         
         # 🎉 ERFOLGS-MELDUNG mit deutscher Beihilfe-Logik
         eigenanteil = remaining_amount
@@ -3919,6 +5720,7 @@ def process_reimbursement(receipt_id):
         return redirect(url_for('receipt_detail', receipt_id=receipt_id))
         
     except Exception as e:
+        uow.discard_files()
         logger.error(f"💥 Kritischer Fehler bei deutscher Erstattungsverarbeitung: {e}")
         logger.error(f"📄 Form-Data: {dict(request.form)}")
         logger.error(f"📁 Files: {list(request.files.keys())}")
@@ -3996,8 +5798,10 @@ def reimbursements_overview():
     <head>
         <meta charset="UTF-8">
         <title>💰 Erstattungs-Übersicht</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -4106,7 +5910,7 @@ def reimbursements_overview():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             // Erstattungsfeatures sind jetzt verfügbar!
         </script>
@@ -4114,52 +5918,222 @@ def reimbursements_overview():
     </html>
     """, reimbursements=reimbursements, total_paid=total_paid, total_reimbursed=total_reimbursed)
 
-# ⚠️ MAHNUNGS-SYSTEM - VOLLSTÄNDIG
-@app.route('/reminders')
-def reminders_overview():
-    """⚠️ Mahnungs-System"""
+# ⏰ MAHNLAUF - ein mengenbasierter Durchlauf je Intervall (Thread im Prozess oder per Cron)
+_reminder_scheduler = {'thread': None, 'stop': threading.Event(), 'last_result': None}
+
+def get_reminder_last_run():
+    """Zeitpunkt des letzten Mahnlaufs (direkt aus der DB - der Lauf erhöht settings_version nicht)"""
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.execute("SELECT value FROM system_settings WHERE key = 'reminder_last_run'")
+    row = cursor.fetchone()
+    conn.close()
+    try:
+        return datetime.fromisoformat(row['value']) if row and row['value'] else None
+    except ValueError:
+        return None
+
+def run_reminder_pass(today=None, force=False):
+    """Fällige Mahnungen anlegen, Stufe 1 → 2 eskalieren und überfällige markieren.
+    
+    Alle Schritte laufen als INSERT … SELECT / UPDATE in EINER Transaktion und sind
+    idempotent (NOT EXISTS-Prüfungen), parallele Worker erzeugen also keine Duplikate.
+    Gibt ein Dict mit den Zählern zurück oder None, wenn der letzte Lauf noch zu jung ist.
+    """
+    today = today or datetime.now().date()
+    interval_minutes = get_setting_int('reminder_scheduler_minutes', 60)
+    
+    if not force:
+        # Anderer Worker oder Cron-Job kann den Lauf gerade erst ausgeführt haben
+        last_run = get_reminder_last_run()
+        if last_run and datetime.now() - last_run < timedelta(minutes=interval_minutes):
+            return None
     
-    # Aktive Mahnungen
-    cursor.execute('''
-        SELECT mr.*, pr.reminder_level, pr.sent_date, pr.due_date, pr.fee, pr.status as reminder_status
-        FROM medical_receipts mr 
-        JOIN payment_reminders pr ON mr.receipt_id = pr.receipt_id 
-        WHERE pr.status = "sent"
-        ORDER BY pr.due_date ASC
+    first_after_days = get_setting_int('reminder_1_days', 30)
+    deadline_days = get_setting_int('reminder_2_days', 14)
+    today_str = today.isoformat()
+    cutoff = (today - timedelta(days=first_after_days)).isoformat()
+    due_date = (today + timedelta(days=deadline_days)).isoformat()
+    
+    uow = UnitOfWork()
+    # 1. Mahnungen bereits bezahlter Belege schließen
+    uow.execute('''
+        UPDATE payment_reminders SET status = 'paid'
+        WHERE status IN ('sent', 'overdue')
+          AND EXISTS (SELECT 1 FROM medical_receipts mr
+                      WHERE mr.receipt_id = payment_reminders.receipt_id AND mr.payment_status = 'paid')
     ''')
-    active_reminders = cursor.fetchall()
-    
-    # Überfällige Mahnungen
-    cursor.execute('''
-        SELECT mr.*, pr.reminder_level, pr.sent_date, pr.due_date, pr.fee
-        FROM medical_receipts mr 
-        JOIN payment_reminders pr ON mr.receipt_id = pr.receipt_id 
-        WHERE pr.status = "sent" AND pr.due_date < DATE('now')
-        ORDER BY pr.due_date ASC
+    # 2. Abgelaufene 2. Mahnungen → überfällig
+    uow.execute('''
+        UPDATE medical_receipts SET payment_status = 'overdue', updated_at = CURRENT_TIMESTAMP
+        WHERE payment_status != 'paid'
+          AND EXISTS (SELECT 1 FROM payment_reminders pr
+                      WHERE pr.receipt_id = medical_receipts.receipt_id
+                        AND pr.reminder_level = 2 AND pr.status = 'sent' AND pr.due_date < ?)
+    ''', (today_str,))
+    uow.execute('''
+        UPDATE payment_reminders SET status = 'overdue'
+        WHERE reminder_level = 2 AND status = 'sent' AND due_date < ?
+    ''', (today_str,))
+    # 3. Abgelaufene 1. Mahnungen → 2. Mahnung mit Gebühr
+    uow.execute('''
+        INSERT INTO payment_reminders (receipt_id, reminder_level, sent_date, due_date, fee, status)
+        SELECT pr.receipt_id, 2, ?, ?, ?, 'sent'
+        FROM payment_reminders pr
+        JOIN medical_receipts mr ON mr.receipt_id = pr.receipt_id
+        WHERE pr.reminder_level = 1 AND pr.status = 'sent' AND pr.due_date < ?
+          AND mr.payment_status != 'paid'
+          AND NOT EXISTS (SELECT 1 FROM payment_reminders p2
+                          WHERE p2.receipt_id = pr.receipt_id AND p2.reminder_level = 2 AND p2.status != 'paid')
+    ''', (today_str, due_date, get_setting_float('reminder_2_fee', 5.0), today_str))
+    uow.execute('''
+        UPDATE medical_receipts SET payment_status = 'reminded_2', updated_at = CURRENT_TIMESTAMP
+        WHERE payment_status IN ('unpaid', 'reminded_1')
+          AND EXISTS (SELECT 1 FROM payment_reminders pr
+                      WHERE pr.receipt_id = medical_receipts.receipt_id
+                        AND pr.reminder_level = 2 AND pr.status = 'sent')
     ''')
-    overdue_reminders = cursor.fetchall()
-    
-    # Belege die Mahnungen benötigen
-    cursor.execute('''
-        SELECT * FROM medical_receipts 
-        WHERE payment_status = "unpaid" 
-        AND receipt_id NOT IN (SELECT receipt_id FROM payment_reminders WHERE status = "sent")
-        AND DATE(receipt_date) < DATE('now', '-30 days')
+    uow.execute('''
+        UPDATE payment_reminders SET status = 'overdue'
+        WHERE reminder_level = 1 AND status = 'sent' AND due_date < ?
+    ''', (today_str,))
+    # 4. Neue 1. Mahnungen für offene Belege ohne aktive Mahnung
+    uow.execute('''
+        INSERT INTO payment_reminders (receipt_id, reminder_level, sent_date, due_date, fee, status)
+        SELECT mr.receipt_id, 1, ?, ?, ?, 'sent'
+        FROM medical_receipts mr
+        WHERE mr.payment_status = 'unpaid' AND mr.receipt_date <= ?
+          AND NOT EXISTS (SELECT 1 FROM payment_reminders pr
+                          WHERE pr.receipt_id = mr.receipt_id AND pr.status IN ('sent', 'overdue'))
+    ''', (today_str, due_date, get_setting_float('reminder_1_fee', 0.0), cutoff))
+    uow.execute('''
+        UPDATE medical_receipts SET payment_status = 'reminded_1', updated_at = CURRENT_TIMESTAMP
+        WHERE payment_status = 'unpaid'
+          AND EXISTS (SELECT 1 FROM payment_reminders pr
+                      WHERE pr.receipt_id = medical_receipts.receipt_id
+                        AND pr.reminder_level = 1 AND pr.status = 'sent')
     ''')
+    uow.execute("UPDATE system_settings SET value = ? WHERE key = 'reminder_last_run'",
+                (datetime.now().isoformat(timespec='seconds'),))
+    uow.commit()
+    
+    counts = uow.rowcounts
+    result = {
+        'date': today_str,
+        'closed': counts[0],
+        'overdue': counts[2],
+        'escalated': counts[3],
+        'created': counts[6],
+    }
+    _reminder_scheduler['last_result'] = result
+    logger.info(f"⏰ Mahnlauf {today_str}: {result['created']} neu, {result['escalated']} eskaliert, "
+                f"{result['overdue']} überfällig, {result['closed']} geschlossen")
+    return result
+
+def _reminder_scheduler_loop():
+    """Hintergrund-Thread: Mahnlauf im eingestellten Intervall"""
+    stop = _reminder_scheduler['stop']
+    while not stop.is_set():
+        try:
+            run_reminder_pass()
+        except Exception as e:
+            logger.error(f"Fehler im Mahnlauf: {e}")
+        interval_minutes = max(get_setting_int('reminder_scheduler_minutes', 60), 1)
+        stop.wait(interval_minutes * 60)
+
+def start_reminder_scheduler():
+    """Mahnlauf-Thread starten (reminder_scheduler_minutes = 0 deaktiviert ihn, z.B. bei Cron-Betrieb)"""
+    if get_setting_int('reminder_scheduler_minutes', 60) <= 0:
+        logger.info("⏰ Mahnlauf-Thread deaktiviert (reminder_scheduler_minutes = 0)")
+        return None
+    thread = _reminder_scheduler['thread']
+    if thread and thread.is_alive():
+        return thread
+    _reminder_scheduler['stop'].clear()
+    thread = threading.Thread(target=_reminder_scheduler_loop, name='reminder-scheduler', daemon=True)
+    thread.start()
+    _reminder_scheduler['thread'] = thread
+    return thread
+
+def stop_reminder_scheduler(timeout=5):
+    """Mahnlauf-Thread beim Herunterfahren beenden (ein laufender Mahnlauf wird noch abgeschlossen)"""
+    _reminder_scheduler['stop'].set()
+    thread = _reminder_scheduler['thread']
+    if thread and thread.is_alive():
+        thread.join(timeout)
+    _reminder_scheduler['thread'] = None
+
+@app.route('/reminders/run', methods=['POST'])
+def run_reminders_now():
+    """⏰ Mahnlauf manuell starten"""
+    try:
+        result = run_reminder_pass(force=True)
+        flash(f"Mahnlauf abgeschlossen: {result['created']} neue Mahnungen, {result['escalated']} eskaliert, "
+              f"{result['overdue']} überfällig", 'success')
+    except Exception as e:
+        logger.error(f"Fehler beim manuellen Mahnlauf: {e}")
+        flash('Fehler beim Mahnlauf!', 'error')
+    return redirect(url_for('reminders_overview'))
+
+# 🔎 MAHNUNGS-ABFRAGEN - offene Mahnungen in EINER Abfrage, NOT EXISTS + sargable Datumsvergleiche
+# (Abfragepläne prüft tests/test_reminder_queries.py)
+REMINDER_OPEN_QUERY = f'''
+    SELECT mr.*, pr.reminder_level, pr.sent_date, pr.due_date, pr.fee, pr.status AS reminder_status,
+           MAX({sql_days_since('pr.due_date')}, 0) AS days_overdue
+    FROM payment_reminders pr
+    JOIN medical_receipts mr ON mr.receipt_id = pr.receipt_id
+    WHERE pr.status IN ('sent', 'overdue')
+      AND NOT (pr.status = 'overdue' AND pr.reminder_level = 1)
+    ORDER BY pr.due_date ASC
+'''
+
+REMINDER_DUE_QUERY = f'''
+    SELECT mr.*, {sql_days_since('mr.receipt_date')} AS days_open
+    FROM medical_receipts mr
+    WHERE mr.payment_status = 'unpaid' AND mr.receipt_date <= ?
+      AND NOT EXISTS (SELECT 1 FROM payment_reminders pr
+                      WHERE pr.receipt_id = mr.receipt_id AND pr.status IN ('sent', 'overdue'))
+    ORDER BY mr.receipt_date ASC
+'''
+
+def fetch_reminder_overview(today=None):
+    """Aktive, überfällige und fällige Mahnungen laden (überfällig wird in Python abgeteilt)"""
+    today = today or datetime.now().date()
+    today_str = today.isoformat()
+    reminder_1_days = get_setting_int('reminder_1_days', 30)
+    cutoff = (today - timedelta(days=reminder_1_days)).isoformat()
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(REMINDER_OPEN_QUERY, (today_str,))
+    open_reminders = cursor.fetchall()
+    cursor.execute(REMINDER_DUE_QUERY, (today_str, cutoff))
     needs_reminder = cursor.fetchall()
-    
     conn.close()
     
+    return {
+        'active_reminders': [r for r in open_reminders if r['reminder_status'] == 'sent'],
+        'overdue_reminders': [r for r in open_reminders if r['reminder_status'] == 'overdue' or r['due_date'] < today_str],
+        'needs_reminder': needs_reminder,
+        'reminder_1_days': reminder_1_days,
+    }
+
+# ⚠️ MAHNUNGS-SYSTEM - VOLLSTÄNDIG
+@app.route('/reminders')
+def reminders_overview():
+    """⚠️ Mahnungs-System"""
+    overview = fetch_reminder_overview()
+    
     return render_template_string("""
     <!DOCTYPE html>
     <html lang="de">
     <head>
         <meta charset="UTF-8">
         <title>⚠️ Mahnungs-System</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -4170,6 +6144,15 @@ def reminders_overview():
                     </h2>
                 </div>
                 <div class="card-body p-4">
+                    <!-- Mahnlauf -->
+                    <form method="POST" action="/reminders/run" class="d-flex justify-content-between align-items-center mb-4">
+                        <small class="text-muted">
+                            <i class="bi bi-clock-history me-1"></i>Letzter Mahnlauf: {{ reminder_last_run.strftime('%d.%m.%Y %H:%M') if reminder_last_run else 'noch nie' }}
+                        </small>
+                        <button type="submit" class="btn btn-sm btn-outline-warning">
+                            <i class="bi bi-arrow-repeat me-1"></i>Mahnlauf jetzt starten
+                        </button>
+                    </form>
                     <!-- Statistiken -->
                     <div class="row g-4 mb-5">
                         <div class="col-md-4">
@@ -4304,7 +6287,7 @@ def reminders_overview():
                                             <td>{{ reminder.due_date }}</td>
                                             <td>
                                                 <span class="badge bg-dark">
-                                                    {{ days_overdue_global(reminder.due_date) }} Tage
+                                                    {{ reminder.days_overdue }} Tage
                                                 </span>
                                             </td>
                                             <td>
@@ -4328,7 +6311,7 @@ def reminders_overview():
                         <div class="tab-pane fade" id="pending">
                             <div class="alert alert-info">
                                 <h5><i class="bi bi-info-circle me-2"></i>Benötigen Mahnung</h5>
-                                <p class="mb-0">Diese Belege sind länger als 30 Tage unbezahlt und sollten gemahnt werden</p>
+                                <p class="mb-0">Diese Belege sind länger als {{ reminder_1_days }} Tage unbezahlt und werden beim nächsten Mahnlauf gemahnt</p>
                             </div>
                             <div class="table-responsive">
                                 <table class="table table-hover">
@@ -4351,7 +6334,7 @@ def reminders_overview():
                                             <td>{{ receipt.receipt_date }}</td>
                                             <td>
                                                 <span class="badge bg-warning">
-                                                    {{ days_since_invoice_global(receipt.receipt_date) }} Tage
+                                                    {{ receipt.days_open }} Tage
                                                 </span>
                                             </td>
                                             <td>
@@ -4382,7 +6365,7 @@ def reminders_overview():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             function sendFirstReminder(receiptId) {
                 if (confirm('1. Mahnung senden?')) {
@@ -4390,54 +6373,13 @@ def reminders_overview():
                 }
             }
             
-            function nextReminder(receiptId) {
-                if (confirm('Nächste Mahnstufe senden?')) {
-                    alert('Nächste Mahnstufe wird erstellt... (Produktionsfeature)');
-                }
-            }
-            
             function urgentAction(receiptId) {
                 alert('Dringende Maßnahmen für überfällige Mahnung... (Produktionsfeature)');
             }
-            
-            function markAsPaid(receiptId) {
-                if (confirm('Beleg als bezahlt markieren?')) {
-                    fetch('/api/mark_paid/' + receiptId, {method: 'POST'})
-                        .then(response => response.json())
-                        .then(data => {
-                            if (data.success) {
-                                alert('Als bezahlt markiert!');
-                                location.reload();
-                            }
-                        });
-                }
-            }
         </script>
     </body>
     </html>
-    """, active_reminders=active_reminders, overdue_reminders=overdue_reminders, needs_reminder=needs_reminder)
-
-def days_overdue(due_date):
-    """Hilfsfunktion für überfällige Tage"""
-    if not due_date:
-        return 0
-    try:
-        from datetime import datetime
-        due = datetime.strptime(str(due_date), '%Y-%m-%d')
-        return max(0, (datetime.now() - due).days)
-    except:
-        return 0
-
-def days_since_invoice(receipt_date):
-    """Hilfsfunktion für Tage seit Rechnung"""
-    if not receipt_date:
-        return 0
-    try:
-        from datetime import datetime
-        invoice = datetime.strptime(str(receipt_date), '%Y-%m-%d')
-        return (datetime.now() - invoice).days
-    except:
-        return 0
+    """, reminder_last_run=get_reminder_last_run(), **overview)
 
 # 🔌 FEHLERBEHANDLUNG - PRODUKTIONSREIF
 @app.errorhandler(404)
@@ -4449,8 +6391,10 @@ def not_found(error):
     <head>
         <meta charset="UTF-8">
         <title>404 - Seite nicht gefunden</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-danger text-white d-flex align-items-center" style="min-height: 100vh;">
         <div class="container text-center">
@@ -4474,8 +6418,10 @@ def server_error(error):
     <head>
         <meta charset="UTF-8">
         <title>500 - Server-Fehler</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-danger text-white d-flex align-items-center" style="min-height: 100vh;">
         <div class="container text-center">
@@ -4490,8 +6436,21 @@ def server_error(error):
     </html>
     """), 500
 
-# Initialisiere Datenbank beim Start
-init_database()
+# 🚀 Initialisierung beim Import - mit gunicorn preload_app genau einmal im Master, vor dem Fork der Worker
+_app_initialized = threading.Event()
+
+def initialize_app():
+    """Datenbank anlegen/migrieren und Caches aufwärmen (idempotent, einmal pro Prozess)"""
+    if _app_initialized.is_set():
+        return
+    init_database()
+    warm_provider_index()
+    link_unassigned_receipts()
+    _app_initialized.set()
+
+# BELEGMEISTER_INIT_ON_IMPORT=0 nur für Messungen (--import-time, tests/): Import ohne Datenbank-Setup
+if os.environ.get('BELEGMEISTER_INIT_ON_IMPORT', '1') != '0':
+    initialize_app()
 
 # 📝 BELEG BEARBEITEN - VOLLSTÄNDIG FUNKTIONAL
 @app.route('/receipt/<receipt_id>/edit')
@@ -4500,31 +6459,30 @@ def edit_receipt(receipt_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
-    receipt = cursor.fetchone()
+    # Beleg + verknüpften Anbieter in einem JOIN laden
+    receipt, current_provider = load_receipt_with_provider(cursor, receipt_id)
     
     if not receipt:
         flash('Beleg nicht gefunden!', 'error')
         return redirect(url_for('receipts_list'))
     
-    # Lade alle Anbieter für Dropdown
-    cursor.execute('SELECT * FROM service_providers ORDER BY name')
-    providers = cursor.fetchall()
-    
-    # Suche aktuellen Anbieter in DB
-    cursor.execute('SELECT * FROM service_providers WHERE name = ?', (receipt['provider_name'],))
-    current_provider = cursor.fetchone()
-    
     conn.close()
     
+    # Anbieter für Dropdown aus dem Cache
+    providers, providers_truncated = get_cached_providers(
+        limit=PROVIDER_DROPDOWN_LIMIT, include_ids=[receipt['provider_id']] if receipt['provider_id'] else ()
+    )
+    
     return render_template_string("""
     <!DOCTYPE html>
     <html lang="de">
     <head>
         <meta charset="UTF-8">
         <title>📝 Beleg bearbeiten - {{ receipt.receipt_id }}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -4606,8 +6564,12 @@ def edit_receipt(receipt_id):
                                         <!-- 🏥 ANBIETER-AUSWAHL mit IBAN-Integration -->
                                         <div class="mb-3">
                                             <label class="form-label">Anbieter auswählen</label>
+                                            {% if providers_truncated %}
+                                            <input type="search" class="form-control form-control-sm mb-1" id="provider_search"
+                                                   placeholder="🔍 Anbieter suchen (Liste gekürzt)..." oninput="searchProviders(this.value)" autocomplete="off">
+                                            {% endif %}
                                             <div class="input-group">
-                                                <select class="form-select" id="provider_select" onchange="loadProviderData()">
+                                                <select class="form-select" id="provider_select" name="provider_id" onchange="loadProviderData()">
                                                     <option value="">Anbieter wählen...</option>
                                                     {% for provider in providers %}
                                                     <option value="{{ provider.id }}" 
@@ -4615,7 +6577,7 @@ def edit_receipt(receipt_id):
                                                             data-type="{{ provider.provider_type }}"
                                                             data-iban="{{ provider.iban or '' }}"
                                                             data-bic="{{ provider.bic or '' }}"
-                                                            {{ 'selected' if provider.name == receipt.provider_name }}>
+                                                            {{ 'selected' if provider.id == receipt.provider_id or (not receipt.provider_id and provider.name == receipt.provider_name) }}>
                                                         {{ provider.name }} ({{ {'doctor': 'Arzt', 'pharmacy': 'Apotheke', 'hospital': 'Krankenhaus', 'specialist': 'Spezialist'}.get(provider.provider_type, provider.provider_type) }})
                                                     </option>
                                                     {% endfor %}
@@ -4776,7 +6738,7 @@ def edit_receipt(receipt_id):
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             // 🏥 ANBIETER-INTEGRATION für Beleg-Bearbeitung
             function loadProviderData() {
@@ -4814,14 +6776,19 @@ def edit_receipt(receipt_id):
     </body>
 
     </html>
-    """, receipt=receipt, providers=providers, current_provider=current_provider)
+    """, receipt=receipt, providers=providers, providers_truncated=providers_truncated, current_provider=current_provider)
 
 @app.route('/receipt/<receipt_id>/update', methods=['POST'])
 def update_receipt(receipt_id):
     """📝 Beleg-Update verarbeiten - MIT REZEPT-SUPPORT"""
+    uow = UnitOfWork()
     try:
+        # Alter Anbieter (Statistik) + altes Rezept vorab lesen
         conn = get_db_connection()
         cursor = conn.cursor()
+        cursor.execute('SELECT provider_id, prescription_file_path FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
+        old_receipt = cursor.fetchone()
+        conn.close()
         
         # 💊 REZEPT-DATEI VERARBEITEN (falls hochgeladen)
         prescription_file = request.files.get('prescription_file')
@@ -4829,22 +6796,16 @@ def update_receipt(receipt_id):
         prescription_update_values = []
         
         if prescription_file and prescription_file.filename:
-            # Lösche altes Rezept falls vorhanden
-            cursor.execute('SELECT prescription_file_path FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
-            old_prescription = cursor.fetchone()
-            if old_prescription and old_prescription['prescription_file_path'] and os.path.exists(old_prescription['prescription_file_path']):
-                try:
-                    os.remove(old_prescription['prescription_file_path'])
-                    logger.info(f"💊 Altes Rezept ersetzt: {old_prescription['prescription_file_path']}")
-                except Exception as e:
-                    logger.warning(f"Altes Rezept konnte nicht gelöscht werden: {e}")
+            # Altes Rezept erst nach erfolgreichem Commit löschen
+            if old_receipt and old_receipt['prescription_file_path']:
+                uow.remove_file_after_commit(old_receipt['prescription_file_path'])
+                logger.info(f"💊 Altes Rezept wird ersetzt: {old_receipt['prescription_file_path']}")
             
             # Neues Rezept speichern
             prescription_filename = secure_filename(prescription_file.filename)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             safe_prescription_filename = f"rx_{timestamp}_{prescription_filename}"
-            prescription_file_path = os.path.join(app.config['UPLOAD_FOLDER'], safe_prescription_filename)
-            prescription_file.save(prescription_file_path)
+            prescription_file_path = uow.save_file(prescription_file, os.path.join(app.config['UPLOAD_FOLDER'], safe_prescription_filename))
             
             prescription_update_fields = ", prescription_filename = ?, prescription_file_path = ?"
             prescription_update_values = [prescription_filename, prescription_file_path]
@@ -4855,7 +6816,7 @@ def update_receipt(receipt_id):
         # Hauptdaten-Update
         base_query = '''
             UPDATE medical_receipts SET
-                provider_name = ?, provider_type = ?, amount = ?, receipt_date = ?,
+                provider_name = ?, provider_id = ?, provider_type = ?, amount = ?, receipt_date = ?,
                 treatment_date = ?, patient_name = ?, diagnosis_code = ?, prescription_number = ?,
                 notes = ?, payment_status = ?, debeka_status = ?, beihilfe_status = ?,
                 debeka_amount = ?, beihilfe_amount = ?, updated_at = CURRENT_TIMESTAMP
@@ -4863,8 +6824,11 @@ def update_receipt(receipt_id):
         
         update_query = base_query + prescription_update_fields + " WHERE receipt_id = ?"
         
+        provider_id = resolve_provider_id(request.form['provider_name'], request.form.get('provider_id'))
+        
         base_values = [
             request.form['provider_name'],
+            provider_id,
             request.form['provider_type'],
             float(request.form['amount']),
             request.form['receipt_date'],
@@ -4882,15 +6846,16 @@ def update_receipt(receipt_id):
         
         all_values = base_values + prescription_update_values + [receipt_id]
         
-        cursor.execute(update_query, all_values)
-        conn.commit()
-        conn.close()
+        uow.execute(update_query, all_values)
+        uow.commit()
+        invalidate_provider_stats(provider_id, old_receipt['provider_id'] if old_receipt else None)
         
         logger.info(f"Beleg {receipt_id} erfolgreich aktualisiert")
         flash(f'Beleg {receipt_id} erfolgreich aktualisiert!', 'success')
         return redirect(url_for('receipt_detail', receipt_id=receipt_id))
         
     except Exception as e:
+        uow.discard_files()
         logger.error(f"Fehler beim Aktualisieren des Belegs: {e}")
         flash('Fehler beim Speichern der Änderungen!', 'error')
         return redirect(url_for('edit_receipt', receipt_id=receipt_id))
@@ -4910,12 +6875,14 @@ def copy_receipt(receipt_id):
         flash('Original-Beleg nicht gefunden!', 'error')
         return redirect(url_for('receipts_list'))
     
-    # Lade alle Anbieter für Dropdown
-    cursor.execute('SELECT * FROM service_providers ORDER BY name')
-    providers = cursor.fetchall()
-    
     conn.close()
     
+    # Anbieter für Dropdown aus dem Cache
+    providers, providers_truncated = get_cached_providers(
+        limit=PROVIDER_DROPDOWN_LIMIT,
+        include_ids=[original_receipt['provider_id']] if original_receipt['provider_id'] else ()
+    )
+    
     # Heutiges Datum für neuen Beleg
     today = datetime.now().strftime('%Y-%m-%d')
     patient_name = get_setting('patient_name', 'Max Mustermann')
@@ -4926,8 +6893,10 @@ def copy_receipt(receipt_id):
     <head>
         <meta charset="UTF-8">
         <title>📋 Beleg kopieren - {{ original_receipt.receipt_id }}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -4987,8 +6956,12 @@ def copy_receipt(receipt_id):
                                         <!-- 🏥 ANBIETER-AUSWAHL mit vorausgewähltem Anbieter -->
                                         <div class="mb-3">
                                             <label class="form-label">Anbieter auswählen *</label>
+                                            {% if providers_truncated %}
+                                            <input type="search" class="form-control form-control-sm mb-1" id="provider_search"
+                                                   placeholder="🔍 Anbieter suchen (Liste gekürzt)..." oninput="searchProviders(this.value)" autocomplete="off">
+                                            {% endif %}
                                             <div class="input-group">
-                                                <select class="form-select" id="provider_select" onchange="loadProviderData()">
+                                                <select class="form-select" id="provider_select" name="provider_id" onchange="loadProviderData()">
                                                     <option value="">Anbieter wählen...</option>
                                                     {% for provider in providers %}
                                                     <option value="{{ provider.id }}" 
@@ -4996,7 +6969,7 @@ def copy_receipt(receipt_id):
                                                             data-type="{{ provider.provider_type }}"
                                                             data-iban="{{ provider.iban or '' }}"
                                                             data-bic="{{ provider.bic or '' }}"
-                                                            {{ 'selected' if provider.name == original_receipt.provider_name }}>
+                                                            {{ 'selected' if provider.id == original_receipt.provider_id or (not original_receipt.provider_id and provider.name == original_receipt.provider_name) }}>
                                                         {{ provider.name }} ({{ {'doctor': 'Arzt', 'pharmacy': 'Apotheke', 'hospital': 'Krankenhaus', 'specialist': 'Spezialist'}.get(provider.provider_type, provider.provider_type) }})
                                                     </option>
                                                     {% endfor %}
@@ -5085,7 +7058,7 @@ def copy_receipt(receipt_id):
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             // 🏥 ANBIETER-INTEGRATION für kopierte Belege
             function loadProviderData() {
@@ -5130,7 +7103,7 @@ def copy_receipt(receipt_id):
         </script>
     </body>
     </html>
-    """, original_receipt=original_receipt, providers=providers, today=today, patient_name=patient_name)
+    """, original_receipt=original_receipt, providers=providers, providers_truncated=providers_truncated, today=today, patient_name=patient_name)
 
 @app.route('/receipt/<receipt_id>/delete', methods=['POST'])
 def delete_receipt(receipt_id):
@@ -5140,33 +7113,23 @@ def delete_receipt(receipt_id):
         cursor = conn.cursor()
         
         # Hole Dateiinformationen vor dem Löschen
-        cursor.execute('SELECT file_path, prescription_file_path FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
+        cursor.execute('SELECT file_path, prescription_file_path, provider_id FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
         receipt = cursor.fetchone()
+        conn.close()
         
-        # Lösche alle verknüpften Daten in der richtigen Reihenfolge
-        cursor.execute('DELETE FROM payment_reminders WHERE receipt_id = ?', (receipt_id,))
-        cursor.execute('DELETE FROM reimbursement_uploads WHERE receipt_id = ?', (receipt_id,))
-        cursor.execute('DELETE FROM reimbursement_notices WHERE receipt_id = ?', (receipt_id,))
-        cursor.execute('DELETE FROM medical_receipts WHERE receipt_id = ?', (receipt_id,))
-        
-        # Lösche Beleg-Datei, falls vorhanden
-        if receipt and receipt['file_path'] and os.path.exists(receipt['file_path']):
-            try:
-                os.remove(receipt['file_path'])
-                logger.info(f"📄 Beleg-Datei {receipt['file_path']} erfolgreich gelöscht")
-            except Exception as e:
-                logger.warning(f"Beleg-Datei konnte nicht gelöscht werden: {e}")
+        # Lösche alle verknüpften Daten in der richtigen Reihenfolge (eine Transaktion)
+        uow = UnitOfWork()
+        for table in ('payment_reminders', 'reimbursement_uploads', 'reimbursement_notices', 'medical_receipts'):
+            uow.execute(f'DELETE FROM {table} WHERE receipt_id = ?', (receipt_id,))
         
-        # 💊 Lösche Rezept-Datei, falls vorhanden
-        if receipt and receipt['prescription_file_path'] and os.path.exists(receipt['prescription_file_path']):
-            try:
-                os.remove(receipt['prescription_file_path'])
-                logger.info(f"💊 Rezept-Datei {receipt['prescription_file_path']} erfolgreich gelöscht")
-            except Exception as e:
-                logger.warning(f"Rezept-Datei konnte nicht gelöscht werden: {e}")
+        # Beleg- und Rezept-Datei erst nach erfolgreichem Commit löschen
+        if receipt:
+            uow.remove_file_after_commit(receipt['file_path'])
+            uow.remove_file_after_commit(receipt['prescription_file_path'])
         
-        conn.commit()
-        conn.close()
+        uow.commit()
+        if receipt:
+            invalidate_provider_stats(receipt['provider_id'])
         
         logger.info(f"Beleg {receipt_id} erfolgreich gelöscht")
         flash(f'Beleg {receipt_id} wurde erfolgreich gelöscht!', 'success')
@@ -5199,8 +7162,10 @@ def payment_detail(receipt_id):
     <head>
         <meta charset="UTF-8">
         <title>💳 Zahlung - {{ receipt.receipt_id }}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -5281,7 +7246,7 @@ def payment_detail(receipt_id):
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             function markAsPaid() {
                 if (confirm('Beleg als bezahlt markieren?')) {
@@ -5385,20 +7350,10 @@ def preview_receipt_file(receipt_id):
     <head>
         <meta charset="UTF-8">
         <title>📁 Beleg-Vorschau - {{ receipt.receipt_id }}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
-        <style>
-            .preview-container {
-                border: 2px solid #dee2e6;
-                border-radius: 10px;
-                background: #f8f9fa;
-                min-height: 600px;
-            }
-            .file-icon {
-                font-size: 8rem;
-                color: #6c757d;
-            }
-        </style>
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -5493,7 +7448,7 @@ def preview_receipt_file(receipt_id):
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
     </body>
     </html>
     """, receipt=receipt, has_file=has_file, file_type=file_type)
@@ -5576,8 +7531,10 @@ def preview_prescription_file(receipt_id):
     <head>
         <meta charset="UTF-8">
         <title>💊 Rezept-Vorschau - {{ receipt.receipt_id }}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -5638,8 +7595,13 @@ def api_ocr_preview():
         
         try:
             # 🤖 ECHTE OCR-ANALYSE
+            if request.args.get('trace') or request.headers.get('X-OCR-Trace'):
+                start_ocr_trace()
             ocr_result = extract_ocr_data(temp_path)
             
+            # 🏥 OCR-Namen auf bekannten Anbieter abbilden
+            matched_provider, match_score = match_provider(ocr_result.get('provider_name', ''))
+            
             # Provider-Type automatisch setzen falls erkannt
             provider_type_map = {
                 'doctor': 'doctor',
@@ -5656,11 +7618,16 @@ def api_ocr_preview():
                 'date': ocr_result.get('date', datetime.now().strftime('%Y-%m-%d')),
                 'confidence': round(ocr_result.get('confidence', 0.0), 2),
                 'backend_used': ocr_result.get('backend_used', 'none'),
+                'provider_id': matched_provider['id'] if matched_provider else None,
+                'provider_match_name': matched_provider['name'] if matched_provider else None,
+                'provider_match_score': round(match_score, 2),
                 'message': f"OCR erfolgreich! Engine: {ocr_result.get('backend_used', 'unbekannt').upper()}, Confidence: {ocr_result.get('confidence', 0):.2f}",
                 'temp_file_id': temp_file_id,  # 📁 PDF-Anzeige ermöglichen
                 'temp_filename': temp_filename,
                 'has_pdf': True if filename.lower().endswith('.pdf') else False
             }
+            if g.get('ocr_trace') is not None:
+                response_data['trace'] = g.ocr_trace
             
             logger.info(f"🎉 Live-OCR erfolgreich: {ocr_result.get('provider_name')} ({ocr_result.get('backend_used')})")
             return jsonify(response_data)
@@ -5711,6 +7678,12 @@ def view_temp_file(temp_file_id):
         logger.error(f"Fehler beim Anzeigen der temporären Datei: {e}")
         return "Fehler beim Laden der Datei", 500
 
+# 🔌 OCR-BACKEND-STATISTIK
+@app.route('/api/ocr/backends')
+def api_ocr_backends():
+    """🔌 Registrierte OCR-Backends mit Status, Kosten, Latenz und Laufstatistik"""
+    return jsonify({'success': True, 'backends': ocr_backend_stats()})
+
 # 🗑️ TEMPORÄRE DATEIEN AUFRÄUMEN
 @app.route('/api/cleanup_temp/<temp_file_id>', methods=['DELETE'])
 def cleanup_temp_file(temp_file_id):
@@ -5751,8 +7724,10 @@ def providers_list():
     <head>
         <meta charset="UTF-8">
         <title>🏥 Anbieter-Verwaltung</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -5846,7 +7821,7 @@ def providers_list():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
         <script>
             function deleteProvider(providerId, providerName) {
                 var confirmMessage = '🗑️ Anbieter wirklich löschen?\\n\\n' +
@@ -5876,8 +7851,10 @@ def new_provider():
     <head>
         <meta charset="UTF-8">
         <title>➕ Neuer Anbieter</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -5961,7 +7938,7 @@ def new_provider():
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
     </body>
     </html>
     """)
@@ -5975,11 +7952,12 @@ def create_provider():
         
         cursor.execute('''
             INSERT INTO service_providers (
-                name, provider_type, address, phone, email, iban, bic, 
+                name, name_key, provider_type, address, phone, email, iban, bic, 
                 contact_person, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             request.form['name'],
+            normalize_provider_name(request.form['name']),
             request.form['provider_type'],
             request.form.get('address') or None,
             request.form.get('phone') or None,
@@ -5993,6 +7971,8 @@ def create_provider():
         conn.commit()
         conn.close()
         
+        invalidate_provider_cache()
+        
         logger.info(f"Neuer Anbieter erstellt: {request.form['name']}")
         flash(f'Anbieter "{request.form["name"]}" erfolgreich erstellt!', 'success')
         return redirect(url_for('providers_list'))
@@ -6017,14 +7997,19 @@ def provider_detail(provider_id):
     
     conn.close()
     
+    # 📊 Kennzahlen aus dem Statistik-Cache
+    stats = get_provider_stats(provider_id)
+    
     return render_template_string("""
     <!DOCTYPE html>
     <html lang="de">
     <head>
         <meta charset="UTF-8">
         <title>🏥 {{ provider.name }}</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -6069,6 +8054,47 @@ def provider_detail(provider_id):
                         </div>
                     </div>
                     
+                    <!-- 📊 Anbieter-Statistik -->
+                    <h5 class="mt-4">Statistik</h5>
+                    {% if stats %}
+                    <div class="row g-3">
+                        <div class="col-md-3">
+                            <div class="card border-primary text-center">
+                                <div class="card-body">
+                                    <h4 class="text-primary">{{ stats.receipt_count }}</h4>
+                                    <small>Belege ({{ stats.first_receipt_date }} – {{ stats.last_receipt_date }})</small>
+                                </div>
+                            </div>
+                        </div>
+                        <div class="col-md-3">
+                            <div class="card border-success text-center">
+                                <div class="card-body">
+                                    <h4 class="text-success">{{ "%.2f"|format(stats.total_amount) }} €</h4>
+                                    <small>Gesamt • Ø {{ "%.2f"|format(stats.avg_amount) }} €</small>
+                                </div>
+                            </div>
+                        </div>
+                        <div class="col-md-3">
+                            <div class="card border-info text-center">
+                                <div class="card-body">
+                                    <h4 class="text-info">{{ "%.1f"|format(stats.reimbursed_ratio * 100) }} %</h4>
+                                    <small>Erstattet • Debeka {{ "%.1f"|format(stats.debeka_ratio * 100) }} % / Beihilfe {{ "%.1f"|format(stats.beihilfe_ratio * 100) }} %</small>
+                                </div>
+                            </div>
+                        </div>
+                        <div class="col-md-3">
+                            <div class="card border-warning text-center">
+                                <div class="card-body">
+                                    <h4 class="text-warning">{{ stats.avg_payment_delay_days if stats.avg_payment_delay_days is not none else '-' }} Tage</h4>
+                                    <small>Ø Zahlungsdauer • {{ stats.unpaid_count }} offen ({{ "%.2f"|format(stats.unpaid_amount) }} €)</small>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                    {% else %}
+                    <p class="text-muted">Noch keine Belege mit diesem Anbieter verknüpft.</p>
+                    {% endif %}
+                    
                     <div class="mt-4">
                         <a href="/provider/{{ provider.id }}/edit" class="btn btn-warning me-2">
                             <i class="bi bi-pencil me-2"></i>Bearbeiten
@@ -6082,7 +8108,7 @@ def provider_detail(provider_id):
         </div>
     </body>
     </html>
-    """, provider=provider)
+    """, provider=provider, stats=stats)
 
 @app.route('/provider/<int:provider_id>/edit')
 def edit_provider(provider_id):
@@ -6105,8 +8131,10 @@ def edit_provider(provider_id):
     <head>
         <meta charset="UTF-8">
         <title>📝 {{ provider.name }} bearbeiten</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.7.2/font/bootstrap-icons.css" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
     </head>
     <body class="bg-light">
         <div class="container mt-4">
@@ -6199,11 +8227,12 @@ def update_provider(provider_id):
         
         cursor.execute('''
             UPDATE service_providers SET
-                name = ?, provider_type = ?, address = ?, phone = ?, email = ?, 
+                name = ?, name_key = ?, provider_type = ?, address = ?, phone = ?, email = ?, 
                 iban = ?, bic = ?, contact_person = ?, notes = ?, updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         ''', (
             request.form['name'],
+            normalize_provider_name(request.form['name']),
             request.form['provider_type'],
             request.form.get('address') or None,
             request.form.get('phone') or None,
@@ -6218,6 +8247,8 @@ def update_provider(provider_id):
         conn.commit()
         conn.close()
         
+        invalidate_provider_cache()
+        
         logger.info(f"Anbieter {provider_id} erfolgreich aktualisiert")
         flash(f'Anbieter "{request.form["name"]}" erfolgreich aktualisiert!', 'success')
         return redirect(url_for('provider_detail', provider_id=provider_id))
@@ -6234,11 +8265,15 @@ def delete_provider(provider_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        cursor.execute('UPDATE medical_receipts SET provider_id = NULL WHERE provider_id = ?', (provider_id,))
         cursor.execute('DELETE FROM service_providers WHERE id = ?', (provider_id,))
         
         conn.commit()
         conn.close()
         
+        invalidate_provider_cache(relink=False)
+        invalidate_provider_stats(provider_id)
+        
         logger.info(f"Anbieter {provider_id} erfolgreich gelöscht")
         flash('Anbieter erfolgreich gelöscht!', 'success')
         return redirect(url_for('providers_list'))
@@ -6248,7 +8283,977 @@ def delete_provider(provider_id):
         flash('Fehler beim Löschen des Anbieters!', 'error')
         return redirect(url_for('providers_list'))
 
+@app.route('/api/providers/search')
+def api_search_providers():
+    """🔍 Anbieter-Autocomplete (Präfix-Suche aus dem Anbieter-Cache)"""
+    query = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+    
+    type_labels = {'doctor': 'Arzt', 'pharmacy': 'Apotheke', 'hospital': 'Krankenhaus', 'specialist': 'Spezialist'}
+    providers = [
+        {
+            'id': provider['id'],
+            'name': provider['name'],
+            'provider_type': provider['provider_type'],
+            'type_label': type_labels.get(provider['provider_type'], provider['provider_type']),
+            'iban': provider['iban'],
+            'bic': provider['bic'],
+            'phone': provider['phone'],
+            'email': provider['email'],
+        }
+        for provider in search_providers(query, limit=limit)
+    ]
+    
+    response = jsonify({'success': True, 'version': _provider_index['version'], 'providers': providers})
+    response.set_etag(hashlib.md5(f"{_provider_index['version']}|{limit}|{query}".encode()).hexdigest())
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@app.route('/api/providers/stats')
+def api_provider_stats():
+    """📊 Statistik aller Anbieter als JSON"""
+    stats = get_provider_stats()
+    with _provider_index_lock:
+        providers = _provider_index['providers']
+        result = [
+            dict(entry, provider_name=providers[provider_id]['name'] if provider_id in providers else None)
+            for provider_id, entry in sorted(stats.items())
+        ]
+    return jsonify({'success': True, 'providers': result})
+
+@app.route('/api/providers/<int:provider_id>/stats')
+def api_provider_detail_stats(provider_id):
+    """📊 Statistik eines Anbieters als JSON"""
+    stats = get_provider_stats(provider_id)
+    if stats is None:
+        return jsonify({'success': False, 'message': 'Keine Belege für diesen Anbieter'}), 404
+    return jsonify({'success': True, 'stats': stats})
+
+# 🔗 JSON-API v1 - Feldauswahl, Keyset-Pagination, ETag (Kompression via compress_response)
+API_V1_DEFAULT_LIMIT = 50
+API_V1_MAX_LIMIT = 500
+
+def _api_v1_provider_filters(args):
+    clauses, params = [], []
+    if args.get('type'):
+        clauses.append('provider_type = ?')
+        params.append(args['type'])
+    if args.get('search', '').strip():
+        clauses.append('name LIKE ?')
+        params.append(f"%{args['search'].strip()}%")
+    return clauses, params
+
+def _api_v1_reminder_filters(args):
+    clauses, params = [], []
+    if args.get('status'):
+        clauses.append('status = ?')
+        params.append(args['status'])
+    if args.get('level'):
+        clauses.append('reminder_level = ?')
+        params.append(int(args['level']))
+    if args.get('receipt_id'):
+        clauses.append('receipt_id = ?')
+        params.append(args['receipt_id'])
+    return clauses, params
+
+def _api_v1_notice_filters(args):
+    clauses, params = [], []
+    if args.get('type'):
+        clauses.append('notice_type = ?')
+        params.append(args['type'])
+    if args.get('receipt_id'):
+        clauses.append('receipt_id = ?')
+        params.append(args['receipt_id'])
+    return clauses, params
+
+API_V1_ENTITIES = {
+    # Entität: Tabelle, Sortierspalten (NOT NULL, für Keyset-Cursor), Standard-Sortierung, Filter, ausgeblendete Felder
+    'receipts': {
+        'table': 'medical_receipts',
+        'sort_fields': ('id', 'created_at', 'updated_at', 'receipt_date', 'amount'),
+        'default_sort': 'created_at',
+        'filters': receipt_list_filters,
+        'hidden_fields': ('ocr_data', 'file_path', 'prescription_file_path'),
+    },
+    'providers': {
+        'table': 'service_providers',
+        'sort_fields': ('id', 'name', 'created_at'),
+        'default_sort': 'name',
+        'filters': _api_v1_provider_filters,
+        'hidden_fields': ('name_key',),
+    },
+    'reminders': {
+        'table': 'payment_reminders',
+        'sort_fields': ('id', 'due_date', 'sent_date'),
+        'default_sort': 'due_date',
+        'filters': _api_v1_reminder_filters,
+        'hidden_fields': (),
+    },
+    'notices': {
+        'table': 'reimbursement_notices',
+        'sort_fields': ('id', 'notice_date', 'processed_date'),
+        'default_sort': 'notice_date',
+        'filters': _api_v1_notice_filters,
+        'hidden_fields': ('notice_file_path',),
+    },
+}
+
+_api_v1_columns = {}
+
+def api_v1_columns(table):
+    """Spalten einer Tabelle (einmal per PRAGMA ermittelt)"""
+    if table not in _api_v1_columns:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'PRAGMA table_info({table})')
+        _api_v1_columns[table] = [row['name'] for row in cursor.fetchall()]
+        conn.close()
+    return _api_v1_columns[table]
+
+def api_v1_fields(spec):
+    """?fields=a,b,c gegen die Tabellenspalten prüfen (ohne Angabe: alle sichtbaren Felder)"""
+    columns = api_v1_columns(spec['table'])
+    requested = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    if not requested:
+        return [column for column in columns if column not in spec['hidden_fields']]
+    unknown = [field for field in requested if field not in columns]
+    if unknown:
+        raise ValueError(f"Unbekannte Felder: {', '.join(unknown)}")
+    return requested
+
+def encode_api_cursor(sort_value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode()).decode().rstrip('=')
+
+def decode_api_cursor(token):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Ungültiger Cursor')
+
+def api_json_response(payload, status=200):
+    """JSON mit schwachem ETag (304 bei If-None-Match) - gzip- und unkomprimierter Body teilen sich den Wert"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    response = Response(body, status=status, mimetype='application/json')
+    response.set_etag(hashlib.md5(body).hexdigest(), weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def api_v1_error(message, status=400):
+    return api_json_response({'success': False, 'message': message}, status=status)
+
+def api_v1_list(entity):
+    """Generische Listen-Abfrage: Filter, Feldauswahl, Keyset-Pagination über (sort, id)"""
+    spec = API_V1_ENTITIES[entity]
+    try:
+        fields = api_v1_fields(spec)
+        sort_field = request.args.get('sort', spec['default_sort'])
+        if sort_field not in spec['sort_fields']:
+            raise ValueError(f"Sortierung nur nach: {', '.join(spec['sort_fields'])}")
+        descending = request.args.get('order', 'desc').lower() != 'asc'
+        limit = max(1, min(int(request.args.get('limit', API_V1_DEFAULT_LIMIT)), API_V1_MAX_LIMIT))
+        clauses, params = spec['filters'](request.args)
+        if request.args.get('after'):
+            sort_value, row_id = decode_api_cursor(request.args['after'])
+            clauses.append(f"({sort_field}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend([sort_value, row_id])
+    except ValueError as e:
+        return api_v1_error(str(e))
+    
+    select_fields = list(dict.fromkeys(fields + [sort_field, 'id']))
+    direction = 'DESC' if descending else 'ASC'
+    query = f"SELECT {', '.join(select_fields)} FROM {spec['table']}"
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    query += f' ORDER BY {sort_field} {direction}, id {direction} LIMIT ?'
+    params.append(limit + 1)
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_api_cursor(rows[-1][sort_field], rows[-1]['id']) if has_more else None
+    return api_json_response({
+        'success': True,
+        'data': [{field: row[field] for field in fields} for row in rows],
+        'count': len(rows),
+        'limit': limit,
+        'next_cursor': next_cursor,
+    })
+
+def api_v1_detail(entity, key_column, key):
+    """Einzelner Datensatz mit Feldauswahl"""
+    spec = API_V1_ENTITIES[entity]
+    try:
+        fields = api_v1_fields(spec)
+    except ValueError as e:
+        return api_v1_error(str(e))
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(fields)} FROM {spec['table']} WHERE {key_column} = ?", (key,))
+    row = cursor.fetchone()
+    conn.close()
+    
+    if not row:
+        return api_v1_error('Nicht gefunden', status=404)
+    return api_json_response({'success': True, 'data': dict(row)})
+
+@app.route('/api/v1/receipts')
+def api_v1_receipts():
+    """🔗 Belege (Filter wie /receipts: status, provider, search + provider_id, date_from, date_to)"""
+    return api_v1_list('receipts')
+
+@app.route('/api/v1/receipts/<receipt_id>')
+def api_v1_receipt(receipt_id):
+    return api_v1_detail('receipts', 'receipt_id', receipt_id)
+
+@app.route('/api/v1/providers')
+def api_v1_providers():
+    """🔗 Anbieter (Filter: type, search)"""
+    return api_v1_list('providers')
+
+@app.route('/api/v1/providers/<int:provider_id>')
+def api_v1_provider(provider_id):
+    return api_v1_detail('providers', 'id', provider_id)
+
+@app.route('/api/v1/reminders')
+def api_v1_reminders():
+    """🔗 Mahnungen (Filter: status, level, receipt_id)"""
+    return api_v1_list('reminders')
+
+@app.route('/api/v1/notices')
+def api_v1_notices():
+    """🔗 Erstattungsbescheide (Filter: type, receipt_id)"""
+    return api_v1_list('notices')
+
+@app.route('/api/v1/stats')
+def api_v1_stats():
+    """🔗 Kennzahlen wie im Dashboard (+ Anbieter-Statistik mit ?providers=1)"""
+    payload = {'success': True, 'stats': compute_summary_stats()}
+    if request.args.get('providers'):
+        payload['providers'] = list(get_provider_stats().values())
+    return api_json_response(payload)
+
+# 📤 DATEN-EXPORT - Belege, Bescheide und Mahnungen blockweise als CSV, XLSX oder Parquet (nie alles im Speicher)
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024  # XLSX/Parquet bis zu dieser Größe im Speicher, darüber Temp-Datei
+EXPORT_FORMATS = {
+    # Format: (MIME-Typ, benötigte Module)
+    'csv': ('text/csv', ()),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', ('openpyxl',)),
+    'parquet': ('application/vnd.apache.parquet', ('pandas', 'pyarrow')),
+}
+EXPORT_ENTITIES = ('receipts', 'notices', 'reminders')  # Tabellen/ausgeblendete Felder wie in API_V1_ENTITIES
+EXPORT_AVAILABLE_FORMATS = [fmt for fmt, (_, modules) in EXPORT_FORMATS.items()
+                            if all(module_installed(module) for module in modules)]
+
+def export_query(entity, filters):
+    """SELECT für einen Export → (Query, Parameter, Spalten)
+    
+    Filter wie in receipts_list() (status, provider, search) plus provider_id, date_from/date_to
+    und year; Bescheide und Mahnungen folgen den Beleg-Filtern über ihre receipt_id.
+    """
+    spec = API_V1_ENTITIES[entity]
+    filters = dict(filters)
+    if filters.get('year'):
+        year = int(filters['year'])
+        filters.setdefault('date_from', f'{year}-01-01')
+        filters.setdefault('date_to', f'{year}-12-31')
+    clauses, params = receipt_list_filters(filters)
+    if clauses and entity != 'receipts':
+        clauses = [f"receipt_id IN (SELECT receipt_id FROM medical_receipts WHERE {' AND '.join(clauses)})"]
+    
+    columns = [column for column in api_v1_columns(spec['table']) if column not in spec['hidden_fields']]
+    query = f"SELECT {', '.join(columns)} FROM {spec['table']}"
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+    return query + ' ORDER BY id', params, columns
+
+def iter_export_chunks(query, params):
+    """Zeilen blockweise per fetchmany (die Verbindung bleibt nur während des Exports offen)"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+    finally:
+        conn.close()
+
+def iter_export_csv(query, params, columns):
+    """CSV für Excel (Semikolon, UTF-8 mit BOM) als Text-Blöcke - für Streaming-Antworten"""
+    import csv
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerow(columns)
+    yield '\ufeff' + buffer.getvalue()
+    for rows in iter_export_chunks(query, params):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+def write_export_xlsx(fileobj, entity, query, params, columns):
+    """XLSX im write_only-Modus: openpyxl hält keine Zellen im Speicher"""
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=entity)
+    sheet.append(columns)
+    for rows in iter_export_chunks(query, params):
+        for row in rows:
+            sheet.append(row)
+    workbook.save(fileobj)
+
+def write_export_parquet(fileobj, entity, query, params, columns):
+    """Parquet: pandas read_sql in Blöcken, jeder Block wird eine Row-Group"""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    # Feste Typen aus dem Schema, sonst kippt eine Spalte mit nur NULL im ersten Block den Typ
+    declared_types = {}
+    conn = get_db_connection()
+    for row in conn.execute(f"PRAGMA table_info({API_V1_ENTITIES[entity]['table']})"):
+        declared_types[row['name']] = (row['type'] or '').upper()
+    conn.row_factory = None  # pandas erwartet Tupel, keine sqlite3.Row
+    schema = pa.schema([
+        (column, pa.int64() if declared_types.get(column) in ('INTEGER', 'BOOLEAN')
+         else pa.float64() if declared_types.get(column) == 'REAL' else pa.string())
+        for column in columns
+    ])
+    
+    try:
+        with pq.ParquetWriter(fileobj, schema, compression='zstd') as writer:
+            for frame in pd.read_sql_query(query, conn, params=params, chunksize=EXPORT_CHUNK_ROWS):
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+    finally:
+        conn.close()
+
+def export_data(entity, fmt, fileobj, filters):
+    """Export in ein binäres Datei-Objekt schreiben (Route und --export)"""
+    if entity not in EXPORT_ENTITIES:
+        raise ValueError(f"Unbekannter Export: {entity}")
+    if fmt not in EXPORT_AVAILABLE_FORMATS:
+        modules = ', '.join(EXPORT_FORMATS[fmt][1]) if fmt in EXPORT_FORMATS else ''
+        raise ValueError(f"Format {fmt} nicht verfügbar" + (f" (pip install {modules})" if modules else ''))
+    
+    query, params, columns = export_query(entity, filters)
+    if fmt == 'csv':
+        for block in iter_export_csv(query, params, columns):
+            fileobj.write(block.encode('utf-8'))
+    elif fmt == 'xlsx':
+        write_export_xlsx(fileobj, entity, query, params, columns)
+    else:
+        write_export_parquet(fileobj, entity, query, params, columns)
+
+@app.route('/export/<entity>.<fmt>')
+def export_download(entity, fmt):
+    """📤 Export mit den Filtern der Belegliste, z.B. /export/receipts.xlsx?status=paid&year=2024"""
+    import tempfile
+    
+    filters = request.args.to_dict()
+    filename = f"belegmeister_{entity}_{filters.get('year') or datetime.now().strftime('%Y%m%d')}.{fmt}"
+    try:
+        if fmt == 'csv' and entity in EXPORT_ENTITIES:
+            # CSV direkt streamen - Zeilen gehen raus, während die Abfrage noch läuft
+            query, params, columns = export_query(entity, filters)
+            logger.info(f"📤 Export {entity}.{fmt} ({filters})")
+            return Response(iter_export_csv(query, params, columns), mimetype='text/csv',
+                            headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+        
+        fileobj = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+        export_data(entity, fmt, fileobj, filters)
+        fileobj.seek(0)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Fehler beim Export {entity}.{fmt}: {e}")
+        return jsonify({'success': False, 'message': 'Export fehlgeschlagen!'}), 500
+    
+    logger.info(f"📤 Export {entity}.{fmt} ({filters})")
+    return send_file(fileobj, mimetype=EXPORT_FORMATS[fmt][0], as_attachment=True, download_name=filename)
+
+# 🧾 JAHRESBERICHT - Rechnungsbeträge, Erstattungen und Eigenanteil je Jahr, Patient und Anbietertyp
+REPORT_CACHE_TTL_SECONDS = 300  # Änderungen anderer Worker spätestens nach fünf Minuten sichtbar
+REPORT_DATE_BASIS = {
+    # Zuordnung zum Jahr: Rechnungsdatum oder Zahlungsdatum (Abflussprinzip für die Steuererklärung)
+    'receipt': 'receipt_date',
+    'payment': 'payment_date',
+}
+REPORT_PROVIDER_TYPES = {'doctor': 'Arzt', 'pharmacy': 'Apotheke', 'hospital': 'Krankenhaus', 'specialist': 'Spezialist'}
+REPORT_COLUMNS = (
+    # Schlüssel, Überschrift
+    ('receipt_count', 'Belege'),
+    ('invoiced', 'Rechnungsbetrag'),
+    ('debeka', 'Debeka'),
+    ('beihilfe', 'Beihilfe'),
+    ('remaining', 'Eigenanteil'),
+)
+
+def sum_report_rows(rows):
+    """Summenzeile über Gruppen-Zeilen (Erstattung/Eigenanteil aus den Summen abgeleitet)"""
+    total = {'receipt_count': 0, 'invoiced': 0.0, 'debeka': 0.0, 'beihilfe': 0.0, 'paid': 0.0, 'not_submitted': 0}
+    for row in rows:
+        for key in total:
+            total[key] += row[key]
+    total['reimbursed'] = total['debeka'] + total['beihilfe']
+    total['remaining'] = total['invoiced'] - total['reimbursed']
+    return {key: round(value, 2) if isinstance(value, float) else value for key, value in total.items()}
+
+def compute_yearly_report(year, basis='receipt'):
+    """Jahresbericht: EINE GROUP BY-Abfrage je (Patient, Anbietertyp), Teilsummen in Python über die Gruppen"""
+    date_column = REPORT_DATE_BASIS[basis]
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT patient_name, provider_type,
+               COUNT(*) AS receipt_count,
+               TOTAL(amount) AS invoiced,
+               TOTAL(debeka_amount) AS debeka,
+               TOTAL(beihilfe_amount) AS beihilfe,
+               TOTAL(CASE WHEN payment_status = 'paid' THEN amount END) AS paid,
+               SUM(CASE WHEN debeka_status = 'none' AND beihilfe_status = 'none' THEN 1 ELSE 0 END) AS not_submitted
+        FROM medical_receipts
+        WHERE {date_column} >= ? AND {date_column} < ?
+        GROUP BY patient_name, provider_type
+        ORDER BY patient_name, provider_type
+    ''', (f'{year}-01-01', f'{year + 1}-01-01'))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    
+    by_patient, by_provider_type = {}, {}
+    for row in rows:
+        row.update(sum_report_rows([row]))
+        by_patient.setdefault(row['patient_name'], []).append(row)
+        by_provider_type.setdefault(row['provider_type'], []).append(row)
+    
+    return {
+        'year': year,
+        'basis': basis,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'rows': rows,
+        'by_patient': {patient: sum_report_rows(group) for patient, group in by_patient.items()},
+        'by_provider_type': {provider_type: sum_report_rows(by_provider_type[provider_type])
+                             for provider_type in sorted(by_provider_type, key=lambda t: REPORT_PROVIDER_TYPES.get(t, t))},
+        'total': sum_report_rows(rows),
+    }
+
+def get_yearly_report(year, basis='receipt'):
+    """Jahresbericht aus dem Cache (pro Jahr und Basis, REPORT_CACHE_TTL_SECONDS gültig)"""
+    import time
+    
+    key = (year, basis)
+    with _yearly_report_lock:
+        cached = _yearly_report_cache.get(key)
+    if cached and time.monotonic() - cached[0] < REPORT_CACHE_TTL_SECONDS:
+        return cached[1]
+    
+    report = compute_yearly_report(year, basis)
+    with _yearly_report_lock:
+        _yearly_report_cache[key] = (time.monotonic(), report)
+    return report
+
+def report_years():
+    """Jahre mit Belegen, neueste zuerst (über den receipt_date-Index)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT substr(receipt_date, 1, 4) AS year FROM medical_receipts ORDER BY year DESC")
+    years = [int(row['year']) for row in cursor.fetchall() if row['year'] and row['year'].isdigit()]
+    conn.close()
+    return years
+
+def yearly_report_tables(report):
+    """Tabellen des Berichts als (Titel, Kopfzeile, Zeilen) - gemeinsame Grundlage für XLSX und PDF"""
+    header = [title for _, title in REPORT_COLUMNS]
+    def values(totals):
+        return [totals[key] for key, _ in REPORT_COLUMNS]
+    return [
+        ('Je Patient', ['Patient'] + header,
+         [[patient] + values(totals) for patient, totals in report['by_patient'].items()]),
+        ('Je Anbietertyp', ['Anbietertyp'] + header,
+         [[REPORT_PROVIDER_TYPES.get(provider_type, provider_type)] + values(totals)
+          for provider_type, totals in report['by_provider_type'].items()]),
+        ('Details', ['Patient', 'Anbietertyp'] + header,
+         [[row['patient_name'], REPORT_PROVIDER_TYPES.get(row['provider_type'], row['provider_type'])] + values(row)
+          for row in report['rows']]),
+    ]
+
+def build_yearly_report_xlsx(report):
+    """Jahresbericht als XLSX (ein Blatt je Tabelle, Summenzeile) - None falls openpyxl fehlt"""
+    try:
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+    except ImportError:
+        return None
+    
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    total_values = [report['total'][key] for key, _ in REPORT_COLUMNS]
+    for title, header, rows in yearly_report_tables(report):
+        sheet = workbook.create_sheet(title=title)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        label_columns = len(header) - len(REPORT_COLUMNS)
+        sheet.append(['Gesamt'] + [''] * (label_columns - 1) + total_values)
+        for cell in sheet[1] + sheet[sheet.max_row]:
+            cell.font = Font(bold=True)
+        for column_cells in sheet.iter_cols(min_col=label_columns + 2, min_row=2):
+            for cell in column_cells:
+                cell.number_format = '#,##0.00 €'
+        for index in range(1, len(header) + 1):
+            sheet.column_dimensions[sheet.cell(row=1, column=index).column_letter].width = 18 if index > label_columns else 28
+    
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+class TextPdf:
+    """Minimaler PDF-Schreiber mit echter Textebene (Standardschrift Courier, WinAnsi) - ohne Zusatzpaket
+    
+    Courier ist dicktengleich, Tabellen werden daher als ausgerichtete Textzeilen geschrieben und
+    bleiben beim Kopieren spaltenweise lesbar.
+    """
+    PAGE_SIZE = (595, 842)  # A4 in Punkt
+    CHAR_WIDTH = 0.6  # jedes Courier-Zeichen ist 600/1000 em breit
+    
+    def __init__(self, title=''):
+        self.title = title
+        self.pages = []
+    
+    def new_page(self):
+        self.pages.append([])
+    
+    def text(self, x, y, text, size=10, bold=False):
+        """Text an (x, y) - y wie bei Pillow von oben gemessen (Oberkante der Zeile)"""
+        escaped = self.escape(text)
+        font = b'/F2' if bold else b'/F1'
+        self.pages[-1].append(b'BT %s %d Tf %.2f %.2f Td (%s) Tj ET' % (font, size, x, self.PAGE_SIZE[1] - y - size, escaped))
+    
+    def line(self, x1, y, x2, width=0.5):
+        """Waagrechte Linie bei y (von oben gemessen)"""
+        y = self.PAGE_SIZE[1] - y
+        self.pages[-1].append(b'%.2f w %.2f %.2f m %.2f %.2f l S' % (width, x1, y, x2, y))
+    
+    @staticmethod
+    def escape(text):
+        return str(text).encode('cp1252', 'replace').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    
+    def to_bytes(self):
+        import zlib
+        
+        page_width, page_height = self.PAGE_SIZE
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None,  # Seitenbaum, sobald die Seiten-Nummern feststehen
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold /Encoding /WinAnsiEncoding >>',
+            b'<< /Title (%s) /Producer (Belegmeister) >>' % self.escape(self.title),
+        ]
+        page_refs = []
+        for operations in self.pages or [[]]:
+            content = zlib.compress(b'\n'.join(operations))
+            objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(content), content))
+            objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                           b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>' % (page_width, page_height, len(objects)))
+            page_refs.append(b'%d 0 R' % len(objects))
+        objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(page_refs), len(page_refs))
+        
+        output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref_offset = len(output)
+        output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        output += b'trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_offset)
+        return bytes(output)
+
+def build_yearly_report_pdf(report):
+    """Jahresbericht als A4-PDF mit Textebene (durchsuchbar und kopierbar)"""
+    pdf = TextPdf(title=f"Jahresbericht {report['year']}")
+    page_width, page_height = TextPdf.PAGE_SIZE
+    margin, font_size, line_height = 40, 8, 12
+    row_chars = int((page_width - 2 * margin) / (font_size * TextPdf.CHAR_WIDTH))
+    count_chars, amount_chars = 7, 16  # Spalte 'Belege', dann die Beträge
+    basis_label = 'Zahlungsdatum' if report['basis'] == 'payment' else 'Rechnungsdatum'
+    
+    y = page_height
+    def new_page():
+        nonlocal y
+        pdf.new_page()
+        y = margin
+    
+    def draw_row(cells, label_columns, bold=False):
+        nonlocal y
+        if y + line_height > page_height - margin:
+            new_page()
+        label_chars = (row_chars - count_chars - amount_chars * (len(REPORT_COLUMNS) - 1)) // label_columns
+        text = ''
+        for index, cell in enumerate(cells):
+            if index < label_columns:
+                text += str(cell)[:label_chars - 1].ljust(label_chars)
+            else:
+                value = f"{cell:.2f}" if isinstance(cell, float) else str(cell)
+                text += value.rjust(count_chars if index == label_columns else amount_chars)
+        pdf.text(margin, y, text, font_size, bold=bold)
+        if bold:
+            pdf.line(margin, y + line_height - 2, page_width - margin)
+        y += line_height
+    
+    new_page()
+    pdf.text(margin, y, f"Jahresbericht {report['year']} - Krankheitskosten", 16, bold=True)
+    y += 28
+    pdf.text(margin, y, f"Zuordnung nach {basis_label}, alle Beträge in EUR, erstellt {report['generated_at'][:10]}", 9)
+    y += 2 * line_height
+    
+    total_values = [report['total'][key] for key, _ in REPORT_COLUMNS]
+    for title, header, rows in yearly_report_tables(report):
+        label_columns = len(header) - len(REPORT_COLUMNS)
+        if y + 4 * line_height > page_height - margin:
+            new_page()
+        pdf.text(margin, y, title, 12, bold=True)
+        y += 20
+        draw_row(header, label_columns, bold=True)
+        for row in rows:
+            draw_row(row, label_columns)
+        draw_row(['Gesamt'] + [''] * (label_columns - 1) + total_values, label_columns, bold=True)
+        y += line_height
+    
+    return pdf.to_bytes()
+
+@app.route('/reports')
+@app.route('/reports/<int:year>')
+def yearly_report(year=None):
+    """🧾 Jahresbericht für Steuererklärung und Beihilfe (?basis=payment ordnet nach Zahlungsdatum zu)"""
+    years = report_years()
+    year = year or (years[0] if years else datetime.now().year)
+    basis = request.args.get('basis', 'receipt')
+    if basis not in REPORT_DATE_BASIS:
+        basis = 'receipt'
+    report = get_yearly_report(year, basis)
+    
+    export_format = request.args.get('format')
+    if export_format in ('xlsx', 'pdf'):
+        if export_format == 'xlsx':
+            data = build_yearly_report_xlsx(report)
+            mimetype = EXPORT_FORMATS['xlsx'][0]
+            if data is None:
+                flash('XLSX-Ausgabe nicht verfügbar (openpyxl fehlt)', 'warning')
+                return redirect(url_for('yearly_report', year=year, basis=basis))
+        else:
+            data = build_yearly_report_pdf(report)
+            mimetype = 'application/pdf'
+        return send_file(io.BytesIO(data), mimetype=mimetype, as_attachment=True,
+                         download_name=f"jahresbericht_{year}_{basis}.{export_format}")
+    
+    return render_template_string("""
+    <!DOCTYPE html>
+    <html lang="de">
+    <head>
+        <meta charset="UTF-8">
+        <title>🧾 Jahresbericht {{ report.year }}</title>
+        <link href="{{ vendor_asset('bootstrap.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor_asset('bootstrap-icons.css') }}" rel="stylesheet">
+        <link href="{{ asset_url('app.css') }}" rel="stylesheet">
+        <script src="{{ asset_url('app.js') }}"></script>
+    </head>
+    <body class="bg-light">
+        <div class="container mt-4">
+            {% with messages = get_flashed_messages(with_categories=true) %}
+                {% for category, message in messages %}
+                    <div class="alert alert-{{ 'danger' if category == 'error' else category }}">{{ message }}</div>
+                {% endfor %}
+            {% endwith %}
+            <div class="card shadow-lg">
+                <div class="card-header bg-primary text-white d-flex justify-content-between align-items-center">
+                    <h2 class="mb-0">
+                        <i class="bi bi-journal-text me-2"></i>Jahresbericht {{ report.year }}
+                    </h2>
+                    <div>
+                        <a href="/reports/{{ report.year }}?basis={{ report.basis }}&format=xlsx" class="btn btn-light btn-sm">
+                            <i class="bi bi-file-earmark-excel"></i> XLSX
+                        </a>
+                        <a href="/reports/{{ report.year }}?basis={{ report.basis }}&format=pdf" class="btn btn-light btn-sm">
+                            <i class="bi bi-file-earmark-pdf"></i> PDF
+                        </a>
+                    </div>
+                </div>
+                <div class="card-body p-4">
+                    <form method="get" class="row g-2 mb-4" onsubmit="this.action = '/reports/' + this.year.value;">
+                        <div class="col-md-3">
+                            <select name="year" class="form-select">
+                                {% for y in years %}
+                                    <option value="{{ y }}" {{ 'selected' if y == report.year }}>{{ y }}</option>
+                                {% endfor %}
+                            </select>
+                        </div>
+                        <div class="col-md-5">
+                            <select name="basis" class="form-select">
+                                <option value="receipt" {{ 'selected' if report.basis == 'receipt' }}>Nach Rechnungsdatum</option>
+                                <option value="payment" {{ 'selected' if report.basis == 'payment' }}>Nach Zahlungsdatum (Steuererklärung)</option>
+                            </select>
+                        </div>
+                        <div class="col-md-2">
+                            <button type="submit" class="btn btn-primary w-100">Anzeigen</button>
+                        </div>
+                    </form>
+                    
+                    <div class="row g-3 mb-4 text-center">
+                        <div class="col-md-3"><div class="card border-primary"><div class="card-body">
+                            <h5 class="text-primary">{{ "%.2f"|format(report.total.invoiced) }} €</h5><small>Rechnungsbetrag ({{ report.total.receipt_count }} Belege)</small>
+                        </div></div></div>
+                        <div class="col-md-3"><div class="card border-info"><div class="card-body">
+                            <h5 class="text-info">{{ "%.2f"|format(report.total.debeka) }} €</h5><small>Debeka</small>
+                        </div></div></div>
+                        <div class="col-md-3"><div class="card border-success"><div class="card-body">
+                            <h5 class="text-success">{{ "%.2f"|format(report.total.beihilfe) }} €</h5><small>Beihilfe</small>
+                        </div></div></div>
+                        <div class="col-md-3"><div class="card border-danger"><div class="card-body">
+                            <h5 class="text-danger">{{ "%.2f"|format(report.total.remaining) }} €</h5><small>Eigenanteil</small>
+                        </div></div></div>
+                    </div>
+                    {% if report.total.not_submitted %}
+                    <div class="alert alert-warning">
+                        <i class="bi bi-exclamation-triangle me-2"></i>{{ report.total.not_submitted }} Belege wurden noch nicht eingereicht - der Eigenanteil kann noch sinken.
+                    </div>
+                    {% endif %}
+                    
+                    {% for title, header, rows in tables %}
+                    <h4 class="mt-4">{{ title }}</h4>
+                    <div class="table-responsive">
+                        <table class="table table-hover">
+                            <thead class="table-dark">
+                                <tr>{% for column in header %}<th class="{{ 'text-end' if loop.index > header|length - 5 }}">{{ column }}</th>{% endfor %}</tr>
+                            </thead>
+                            <tbody>
+                                {% for row in rows %}
+                                <tr>
+                                    {% for cell in row %}
+                                        {% if loop.index > row|length - 4 %}<td class="text-end">{{ "%.2f"|format(cell) }} €</td>
+                                        {% else %}<td class="{{ 'text-end' if loop.index > row|length - 5 }}">{{ cell }}</td>{% endif %}
+                                    {% endfor %}
+                                </tr>
+                                {% endfor %}
+                            </tbody>
+                        </table>
+                    </div>
+                    {% endfor %}
+                    
+                    <div class="text-center mt-4">
+                        <a href="/" class="btn btn-primary btn-lg">
+                            <i class="bi bi-house me-2"></i>Dashboard
+                        </a>
+                    </div>
+                </div>
+            </div>
+        </div>
+        <script src="{{ vendor_asset('bootstrap.bundle.min.js') }}"></script>
+    </body>
+    </html>
+    """, report=report, years=years or [year], tables=yearly_report_tables(report))
+
+# 🚀 PRODUKTIONS-SERVER - waitress (plattformunabhängig) bzw. gunicorn über gunicorn.conf.py, Health-Probes
+SERVER_THREADS = int(os.environ.get('BELEGMEISTER_THREADS', 8))
+
+READINESS_CACHE_SECONDS = 5  # Probes innerhalb dieses Fensters bekommen das letzte Ergebnis
+READINESS_WRITABLE_DIRS = (app.config['UPLOAD_FOLDER'], 'receipts', 'reimbursements')
+_readiness = {'result': None, 'checked_at': 0.0, 'conn': None, 'in_flight': 0}
+_readiness_lock = threading.Lock()
+_in_flight_lock = threading.Lock()
+
+@app.before_request
+def count_request_start():
+    with _in_flight_lock:
+        _readiness['in_flight'] += 1
+
+@app.teardown_request
+def count_request_end(exception=None):
+    with _in_flight_lock:
+        _readiness['in_flight'] -= 1
+
+def _readiness_db_ping():
+    """Ping über eine dauerhaft offene Probe-Verbindung (kein connect() pro Probe)"""
+    try:
+        if _readiness['conn'] is None:
+            _readiness['conn'] = sqlite3.connect(DATABASE_PATH, timeout=1, check_same_thread=False)
+        _readiness['conn'].execute('SELECT 1 FROM system_settings LIMIT 1').fetchone()
+        return True, None
+    except sqlite3.Error as e:
+        if _readiness['conn'] is not None:
+            _readiness['conn'].close()
+            _readiness['conn'] = None
+        return False, str(e)
+
+def check_readiness():
+    """Abhängigkeiten prüfen: Datenbank, beschreibbare Verzeichnisse, OCR-Backends, Auslastung"""
+    db_ok, db_error = _readiness_db_ping()
+    directories = {directory: os.access(directory, os.W_OK) for directory in READINESS_WRITABLE_DIRS}
+    scheduler_thread = _reminder_scheduler['thread']
+    checks = {
+        'database': {'ok': db_ok, 'error': db_error} if db_error else {'ok': db_ok},
+        'directories': {'ok': all(directories.values()), 'writable': directories},
+        # OCR ist optional (manuelle Erfassung geht immer) → nur melden, nicht ready-relevant
+        'ocr': ocr_backend_status(),
+        'queue': {
+            'in_flight_requests': _readiness['in_flight'],
+            'reminder_scheduler': bool(scheduler_thread and scheduler_thread.is_alive()),
+            'reminder_last_run': get_reminder_last_run() if db_ok else None,
+        },
+    }
+    return {'ready': db_ok and checks['directories']['ok'], 'checks': checks}
+
+@app.route('/healthz')
+def healthz():
+    """Liveness-Probe für Docker/Load-Balancer - ohne Datenbank und Template"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness-Probe: Abhängigkeiten prüfen, Ergebnis READINESS_CACHE_SECONDS zwischenspeichern"""
+    import time
+    
+    with _readiness_lock:
+        age = time.monotonic() - _readiness['checked_at']
+        if _readiness['result'] is None or age >= READINESS_CACHE_SECONDS:
+            _readiness['result'] = check_readiness()
+            _readiness['checked_at'] = time.monotonic()
+            age = 0.0
+        result = _readiness['result']
+    return jsonify({'status': 'ready' if result['ready'] else 'not_ready', 'age': round(age, 3), **result}), (200 if result['ready'] else 503)
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def serve_production(host, port):
+    """App mit waitress starten; SIGTERM beendet den Server und den Mahnlauf sauber"""
+    import signal
+    
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("⚠️ waitress nicht installiert - Flask-Server ohne Debug (pip install waitress)")
+        serve = None
+    
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    start_reminder_scheduler()
+    logger.info(f"🚀 BelegMeister auf {host}:{port} ({SERVER_THREADS} Threads)")
+    try:
+        if serve:
+            serve(app, host=host, port=port, threads=SERVER_THREADS, ident='BelegMeister')
+        else:
+            app.run(host=host, port=port, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.info("🛑 BelegMeister wird beendet...")
+        stop_reminder_scheduler()
+
+def measure_import_time(top=15):
+    """Importzeit der App in einem frischen Prozess messen (python -X importtime)
+    
+    Läuft in einem leeren Temp-Verzeichnis mit BELEGMEISTER_INIT_ON_IMPORT=0, damit weder die echte
+    Datenbank angefasst wird noch das Datenbank-Setup in der Importzeit steckt; initialize_app() wird
+    danach getrennt gemessen. Gibt (Import-ms, initialize_app-ms, [(Modul, kumulierte ms), ...]) der
+    direkt von der App importierten Module zurück.
+    """
+    import subprocess
+    import sys
+    import tempfile
+    
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    code = ('import time, medical_receipt_tracker as app\n'
+            'started = time.perf_counter()\n'
+            'app.initialize_app()\n'
+            'print((time.perf_counter() - started) * 1000)')
+    env = dict(os.environ, PYTHONPATH=app_dir, BELEGMEISTER_INIT_ON_IMPORT='0', BELEGMEISTER_LOG_FILE='',
+               BELEGMEISTER_LOG_LEVEL='WARNING')
+    with tempfile.TemporaryDirectory(prefix='belegmeister-importtime-') as work_dir:
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                              capture_output=True, text=True, cwd=work_dir, env=env, check=True)
+    init_ms = float(proc.stdout.strip().splitlines()[-1])
+    total_ms = 0.0
+    modules = []
+    children = []
+    # Kinder stehen vor ihrem Eltern-Modul; Einrückung 1 = oberste Ebene, 3 = direkter Import
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = len(name) - len(name.lstrip(' '))
+        if depth == 3:
+            children.append((name.strip(), int(cumulative) / 1000))
+        elif depth == 1:
+            if name.strip() == 'medical_receipt_tracker':
+                total_ms = int(cumulative) / 1000
+                modules = children
+            children = []
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return total_ms, init_ms, modules[:top]
+
 if __name__ == "__main__":
+    import sys
+    
+    if '--download-assets' in sys.argv:
+        download_vendor_assets()
+        print(f"📦 Bootstrap-Assets in {ASSET_VENDOR_DIR} - Offline-Modus mit BELEGMEISTER_OFFLINE_ASSETS=1")
+        sys.exit(0)
+    
+    # ⏱️ Startzeit prüfen: python medical_receipt_tracker.py --import-time
+    if '--import-time' in sys.argv:
+        total_ms, init_ms, modules = measure_import_time()
+        print(f"⏱️ Import medical_receipt_tracker: {total_ms:.0f} ms (+ {init_ms:.0f} ms initialize_app auf leerer Datenbank)")
+        for module, cumulative_ms in modules:
+            print(f"   {cumulative_ms:8.1f} ms  {module}")
+        sys.exit(0)
+    
+    initialize_app()  # no-op, außer der Import lief mit BELEGMEISTER_INIT_ON_IMPORT=0
+    
+    # 📤 Export ohne Server: python medical_receipt_tracker.py --export receipts_2024.parquet receipts year=2024
+    if '--export' in sys.argv:
+        index = sys.argv.index('--export')
+        if len(sys.argv) < index + 3:
+            print(f"Aufruf: python {sys.argv[0]} --export <datei.{'|'.join(EXPORT_AVAILABLE_FORMATS)}> "
+                  f"<{'|'.join(EXPORT_ENTITIES)}> [feld=wert ...]")
+            sys.exit(2)
+        path, entity = sys.argv[index + 1], sys.argv[index + 2]
+        filters = dict(arg.split('=', 1) for arg in sys.argv[index + 3:] if '=' in arg)
+        # Erst in eine Temp-Datei schreiben - bei Fehlern bleibt keine leere/halbe Zieldatei liegen
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                export_data(entity, path.rsplit('.', 1)[-1].lower(), f, filters)
+            os.replace(temp_path, path)
+        except ValueError as e:
+            print(f"❌ Export fehlgeschlagen: {e}")
+            sys.exit(1)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        print(f"📤 {entity} exportiert: {path}")
+        sys.exit(0)
+    
+    # ⏰ Cron-Betrieb: python medical_receipt_tracker.py --run-reminders
+    if '--run-reminders' in sys.argv:
+        result = run_reminder_pass(force=True)
+        print(f"⏰ Mahnlauf {result['date']}: {result['created']} neu, {result['escalated']} eskaliert, "
+              f"{result['overdue']} überfällig, {result['closed']} geschlossen")
+        sys.exit(0)
+    
     print("\n" + "="*80)
     print("🎯 BELEGMEISTER v1.0 - DER MEISTER IST BEREIT!")
     print("="*80)
@@ -6267,4 +9272,10 @@ if __name__ == "__main__":
     print("="*80 + "\n")
     
     port = int(os.environ.get("PORT", 5031))
-    app.run(debug=True, host="0.0.0.0", port=port) 
\ No newline at end of file
+    if '--debug' in sys.argv:
+        # 🔧 Entwicklung: Flask-Dev-Server mit Reloader/Debugger (Reloader startet den Mahnlauf nur im Kind-Prozess)
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_reminder_scheduler()
+        app.run(debug=True, host="0.0.0.0", port=port)
+    else:
+        serve_production("0.0.0.0", port) 
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+🧪 Gemeinsame Fixtures - App-Modul in einem temporären Verzeichnis (eigene Datenbank, keine Log-Datei)
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """medical_receipt_tracker importieren - legt Datenbank und Upload-Ordner im Temp-Verzeichnis an"""
+    work_dir = tmp_path_factory.mktemp('belegmeister')
+    previous_dir = os.getcwd()
+    os.chdir(work_dir)
+    os.environ.setdefault('BELEGMEISTER_LOG_FILE', '')
+    os.environ.setdefault('BELEGMEISTER_LOG_LEVEL', 'WARNING')
+    import medical_receipt_tracker
+    yield medical_receipt_tracker
+    os.chdir(previous_dir)
+
+
+@pytest.fixture
+def fresh_db(app_module, tmp_path, monkeypatch):
+    """Leere, migrierte Datenbank nur für diesen Test"""
+    monkeypatch.setattr(app_module, 'DATABASE_PATH', str(tmp_path / 'medical_receipts.db'))
+    app_module.init_database()
+    return app_module
@@ -0,0 +1,52 @@
+"""Importzeit der App: frischer Prozess, Zeitbudget, keine schweren OCR-/Cloud-/Export-SDKs beim Import"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.environ.get('BELEGMEISTER_IMPORT_BUDGET_MS', '1500'))
+
+# Werden erst beim ersten Gebrauch geladen (OCR, Cloud-OCR, Excel-/Parquet-Export)
+LAZY_MODULES = ('pytesseract', 'pdf2image', 'PyPDF2', 'PIL', 'boto3', 'botocore', 'google.cloud.vision',
+                'azure.cognitiveservices.vision.computervision', 'msrest', 'pandas', 'pyarrow', 'openpyxl')
+
+IMPORT_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import medical_receipt_tracker as app
+import_ms = (time.perf_counter() - started) * 1000
+if sys.argv[1] == 'init':
+    app.initialize_app()
+print(json.dumps({'import_ms': import_ms, 'modules': sorted(sys.modules)}))
+'''
+
+
+def import_app(tmp_path, init):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, BELEGMEISTER_INIT_ON_IMPORT='0', BELEGMEISTER_LOG_FILE='',
+               BELEGMEISTER_LOG_LEVEL='WARNING')
+    proc = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT, 'init' if init else 'import'],
+                          capture_output=True, text=True, cwd=tmp_path, env=env, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def loaded_lazy_modules(modules):
+    return sorted(name for name in modules
+                  if any(name == lazy or name.startswith(lazy + '.') for lazy in LAZY_MODULES))
+
+
+def test_import_stays_within_budget(tmp_path):
+    result = import_app(tmp_path, init=False)
+    assert result['import_ms'] < IMPORT_BUDGET_MS
+    assert not (tmp_path / 'medical_receipts.db').exists()
+
+
+@pytest.mark.parametrize('init', [False, True], ids=['import', 'initialize_app'])
+def test_import_does_not_load_ocr_cloud_or_export_sdks(tmp_path, init):
+    result = import_app(tmp_path, init=init)
+    assert loaded_lazy_modules(result['modules']) == []
+    assert (tmp_path / 'medical_receipts.db').exists() == init
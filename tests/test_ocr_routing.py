@@ -0,0 +1,93 @@
+"""OCR-Routing mit lokalen Stub-Backends: Reihenfolge, eine Engine pro Dokument, schwache Historie, spätes Laden"""
+
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def ocr(app_module, monkeypatch, tmp_path):
+    """Leere Backend-Registry und Statistik; Rückgabe: (App-Modul, Beleg-Pfad, Liste der Aufrufe)"""
+    monkeypatch.setattr(app_module, 'OCR_BACKENDS', {})
+    monkeypatch.setattr(app_module, '_ocr_backend_stats', {})
+    receipt = tmp_path / 'beleg.png'
+    receipt.write_bytes(b'stub')
+    return app_module, str(receipt), []
+
+
+def stub(calls, name, confidence):
+    def extract(file_path):
+        calls.append(name)
+        return {'provider_name': name, 'confidence': confidence} if confidence is not None else None
+    return extract
+
+
+def routed_names(app, file_path):
+    return [backend['name'] for backend in app.route_ocr_backends(file_path)]
+
+
+def test_cheap_backends_first_then_better_confidence_then_faster(ocr):
+    app, receipt, calls = ocr
+    app.register_ocr_backend('cloud', stub(calls, 'cloud', 0.9), cost=0.15, latency_ms=800)
+    app.register_ocr_backend('local_slow', stub(calls, 'local_slow', 0.5), cost=0, latency_ms=2000)
+    app.register_ocr_backend('local_fast', stub(calls, 'local_fast', 0.5), cost=0, latency_ms=300)
+    app.register_ocr_backend('pdf_only', stub(calls, 'pdf_only', 0.5), capabilities=('pdf',))
+    assert routed_names(app, receipt) == ['local_fast', 'local_slow', 'cloud']
+
+    for _ in range(app.OCR_ROUTING_MIN_RUNS):
+        app.record_ocr_run('local_slow', 'image', 2000, confidence=0.8)
+    assert routed_names(app, receipt) == ['local_slow', 'local_fast', 'cloud']
+
+
+def test_each_engine_runs_once_per_document(ocr):
+    app, receipt, calls = ocr
+    app.register_ocr_backend('tesseract', stub(calls, 'tesseract', 0.4), cost=0)
+    app.register_ocr_backend('vision_fallback', stub(calls, 'vision_fallback', 0.4), engine='tesseract', cost=0.15)
+    app.register_ocr_backend('cloud', stub(calls, 'cloud', 0.6), cost=0.15)
+    assert routed_names(app, receipt) == ['tesseract', 'cloud']
+
+    result = app.extract_ocr_data(receipt)
+    assert calls == ['tesseract', 'cloud']
+    assert result['backend_used'] == 'cloud'
+
+
+def test_weak_history_is_demoted_behind_expensive_backends(ocr):
+    app, receipt, calls = ocr
+    app.register_ocr_backend('local', stub(calls, 'local', None), cost=0)
+    app.register_ocr_backend('cloud', stub(calls, 'cloud', 0.95), cost=0.15)
+    for _ in range(app.OCR_ROUTING_MIN_RUNS - 1):
+        app.extract_ocr_data(receipt)
+    assert routed_names(app, receipt) == ['local', 'cloud']
+
+    app.extract_ocr_data(receipt)
+    assert routed_names(app, receipt) == ['cloud', 'local']
+    calls.clear()
+    assert app.extract_ocr_data(receipt)['backend_used'] == 'cloud'
+    assert calls == ['cloud']
+
+
+def test_backends_are_loaded_only_when_tried(ocr, monkeypatch):
+    app, receipt, calls = ocr
+    monkeypatch.delitem(sys.modules, 'wave', raising=False)
+    app.register_ocr_backend('local', stub(calls, 'local', 0.95), cost=0)
+    app.register_ocr_backend('cloud', stub(calls, 'cloud', 0.95), modules=('wave',), cost=0.15)
+    app.register_ocr_backend('not_installed', stub(calls, 'not_installed', 0.95), modules=('belegmeister_no_such_sdk',))
+    assert routed_names(app, receipt) == ['local', 'cloud']
+    assert app.OCR_BACKENDS['cloud']['state'] == 'available'
+
+    assert app.extract_ocr_data(receipt)['backend_used'] == 'local'
+    assert app.OCR_BACKENDS['cloud']['state'] == 'available'
+    assert 'wave' not in sys.modules
+
+
+def test_unloadable_backend_hands_over_to_next_backend_of_its_engine(ocr):
+    app, receipt, calls = ocr
+    app.register_ocr_backend('broken', stub(calls, 'broken', 0.95), modules=('wave',), engine='tesseract', cost=0)
+    app.register_ocr_backend('fallback', stub(calls, 'fallback', 0.95), engine='tesseract', cost=0.15)
+    app.OCR_BACKENDS['broken']['modules'] = ('belegmeister_no_such_sdk',)
+
+    result = app.extract_ocr_data(receipt)
+    assert app.OCR_BACKENDS['broken']['state'] == 'failed'
+    assert calls == ['fallback']
+    assert result['backend_used'] == 'fallback'
+    assert routed_names(app, receipt) == ['fallback']
@@ -0,0 +1,46 @@
+"""Abfragepläne der Mahnungs-Übersicht: offene und fällige Mahnungen ohne Tabellen-Scan"""
+
+import pytest
+
+from synthetic_data import generate
+
+
+def query_plan(app, query, params):
+    conn = app.get_db_connection()
+    try:
+        return [row['detail'] for row in conn.execute('EXPLAIN QUERY PLAN ' + query, params)]
+    finally:
+        conn.close()
+
+
+def full_scans(plan):
+    return [detail for detail in plan if detail.startswith('SCAN') and 'INDEX' not in detail]
+
+
+@pytest.fixture(params=['empty', 'analyzed'])
+def reminder_db(request, fresh_db):
+    """Leere Datenbank bzw. synthetische Daten mit ANALYZE-Statistik (wie nach einiger Laufzeit)"""
+    if request.param == 'analyzed':
+        generate(fresh_db, receipts=3000)
+    return fresh_db
+
+
+def test_open_query_reads_reminders_through_an_index(reminder_db):
+    plan = query_plan(reminder_db, reminder_db.REMINDER_OPEN_QUERY, ('2025-01-01',))
+    assert not full_scans(plan), plan
+    assert any(detail.startswith('SEARCH pr USING') or detail.startswith('SCAN pr USING') for detail in plan), plan
+
+
+def test_open_query_uses_partial_index_once_analyzed(fresh_db):
+    """Mit Statistik ist status IN ('sent', 'overdue') kaum selektiv - der Teilindex verhindert den Scan"""
+    generate(fresh_db, receipts=3000)
+    plan = query_plan(fresh_db, fresh_db.REMINDER_OPEN_QUERY, ('2025-01-01',))
+    assert any('idx_payment_reminders_open_due' in detail for detail in plan), plan
+    assert not any('TEMP B-TREE' in detail for detail in plan), plan
+
+
+def test_due_query_uses_status_date_and_receipt_status_indexes(reminder_db):
+    plan = query_plan(reminder_db, reminder_db.REMINDER_DUE_QUERY, ('2025-01-01', '2024-12-01'))
+    assert not full_scans(plan), plan
+    assert any('idx_medical_receipts_status_date' in detail for detail in plan), plan
+    assert any('idx_payment_reminders_receipt_status' in detail for detail in plan), plan
@@ -0,0 +1,39 @@
+"""SQL-Zeit je Request: auch das Abholen der Zeilen (fetch*/Iteration) zählt, nicht nur execute()"""
+
+import time
+
+import pytest
+
+ROW_DELAY = 0.01
+ROWS = 10
+
+
+@pytest.fixture
+def slow_query(fresh_db):
+    """Verbindung mit slow(x): jede Ergebniszeile kostet ROW_DELAY Sekunden"""
+    app = fresh_db
+    conn = app.get_db_connection()
+
+    def slow(value):
+        time.sleep(ROW_DELAY)
+        return value
+
+    conn.create_function('slow', 1, slow)
+    sql = f'WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < {ROWS}) SELECT slow(x) FROM n'
+    with app.app.test_request_context('/'):
+        app.g.request_profile = {'started': time.perf_counter(), 'sql_count': 0, 'sql_seconds': 0.0, 'statements': []}
+        yield conn, sql, app.g.request_profile
+    conn.close()
+
+
+@pytest.mark.parametrize('consume', [
+    lambda cursor: cursor.fetchall(),
+    lambda cursor: list(cursor),
+    lambda cursor: [cursor.fetchone() for _ in range(ROWS + 1)],
+    lambda cursor: cursor.fetchmany(ROWS // 2) + cursor.fetchmany(ROWS),
+], ids=['fetchall', 'iteration', 'fetchone', 'fetchmany'])
+def test_fetch_time_counts_towards_request_sql_seconds(slow_query, consume):
+    conn, sql, profile = slow_query
+    rows = consume(conn.execute(sql))
+    assert len([row for row in rows if row is not None]) == ROWS
+    assert profile['sql_seconds'] >= ROWS * ROW_DELAY * 0.9